@@ -0,0 +1,395 @@
+"""
+2단계 캐스케이드 추론: 작은 모델(YOLOv8n)로 선별 → 애매한 계란만 큰 모델(YOLOv8s)로 재분류
+
+대부분의 계란은 명백히 정상인데도 모두 큰 모델 비용을 냅니다. CascadeDetector는
+    1) 작은 모델을 매 프레임 실행
+    2) 클래스 confidence가 불확실 구간 [low, high)에 있는 탐지만 주변을 잘라(crop) 큰 모델로 재분류
+       — 같은 프레임의 crop은 한 번에 배치 추론
+    3) 재분류 결과(클래스·confidence)로 바꾼 뒤 최종 confidence 임계값 적용
+
+불확실 구간은 검증 데이터에서 보정합니다: 큰 모델 단독 mAP50 대비 허용 오차(--tolerance) 안에서
+재분류 비율이 가장 낮은 구간을 고르고 <작은 모델 이름>.cascade.json에 저장합니다.
+
+    python cascade.py --small ../models/egg_classifier.onnx --large ../models/egg_classifier_s.onnx \\
+        --data ../data/data.yaml --tolerance 0.01
+"""
+
+from pathlib import Path
+import argparse
+import itertools
+import json
+import time
+
+import cv2
+import numpy as np
+
+import evaluate_onnx as ev
+from egg_detector import EggDetector
+from egg_tracker import iou_matrix
+
+DEFAULT_LOWS = (0.1, 0.2, 0.3, 0.4, 0.5)
+DEFAULT_HIGHS = (0.6, 0.7, 0.8, 0.9, 1.01)  # 1.01 = 위쪽 제한 없음
+
+
+def band_path(small_path) -> Path:
+    """보정 결과 경로: <작은 모델 이름>.cascade.json"""
+    small_path = Path(small_path)
+    return small_path.with_name(f"{small_path.stem}.cascade.json")
+
+
+def crop_region(box: np.ndarray, shape: tuple, scale: float) -> tuple:
+    """탐지 박스 중심의 정사각형 영역 (한 변 = 긴 변 × scale, 이미지 안으로 제한)"""
+    h, w = shape
+    cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    side = max(box[2] - box[0], box[3] - box[1]) * scale
+    x0, y0 = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+    x1, y1 = int(min(w, cx + side / 2)), int(min(h, cy + side / 2))
+    return x0, y0, max(x1, x0 + 1), max(y1, y0 + 1)
+
+
+def reclassify(
+    large: EggDetector,
+    image: np.ndarray,
+    dets: np.ndarray,
+    crop_scale: float = 2.0,
+    match_iou: float = 0.3,
+) -> np.ndarray:
+    """
+    탐지별 crop을 큰 모델로 배치 추론해 클래스 재판정
+
+    Returns:
+        np.ndarray: [K, 2] (class_id, conf), 큰 모델이 같은 위치에서 못 찾으면 (-1, 0)
+    """
+    result = np.tile(np.array([-1.0, 0.0], dtype=np.float32), (len(dets), 1))
+    if len(dets) == 0:
+        return result
+    regions = [crop_region(d[:4], image.shape[:2], crop_scale) for d in dets]
+    crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in regions]
+    inputs = [large.preprocess(crop) for crop in crops]
+    outputs = large.infer_batch([t for t, _ in inputs])
+
+    for i, (det, (x0, y0, _, _), crop, (_, params), out) in enumerate(
+        zip(dets, regions, crops, inputs, outputs)
+    ):
+        found = large.postprocess(out, params, crop.shape[:2])
+        if len(found) == 0:
+            continue
+        target = det[:4] - np.array([x0, y0, x0, y0], dtype=np.float32)
+        ious = iou_matrix(target[None], found[:, :4])[0]
+        best = int(ious.argmax())
+        if ious[best] >= match_iou:
+            result[i] = found[best, 5], found[best, 4]
+    return result
+
+
+def apply_band(dets: np.ndarray, reclass: np.ndarray, low: float, high: float) -> tuple:
+    """
+    구간 안 탐지를 재분류 결과로 교체
+
+    Args:
+        reclass: dets와 같은 길이의 [K, 2] (구간 밖 탐지 값은 쓰이지 않음)
+
+    Returns:
+        tuple: (교체된 [K, 6] 탐지 결과, 재분류한 탐지 수)
+    """
+    band = (dets[:, 4] >= low) & (dets[:, 4] < high)
+    out = dets.copy()
+    found = band & (reclass[:, 0] >= 0)
+    out[found, 5] = reclass[found, 0]
+    out[found, 4] = reclass[found, 1]
+    out[band & ~found, 4] = 0.0  # 큰 모델이 같은 위치에서 못 찾음 → 오검출로 처리
+    return out, int(band.sum())
+
+
+class CascadeDetector:
+    """
+    작은 모델 선별 + 불확실 탐지 큰 모델 재분류
+
+    Args:
+        small: 매 프레임 실행할 EggDetector (conf_threshold는 low 이하로 설정)
+        large: 재분류용 EggDetector
+        low, high: 불확실 구간 [low, high)
+        conf_threshold: 재분류 후 최종 confidence 임계값 (앱 기본 0.5)
+        crop_scale: crop 한 변 = 박스 긴 변 × crop_scale
+    """
+
+    def __init__(
+        self,
+        small: EggDetector,
+        large: EggDetector,
+        low: float = 0.3,
+        high: float = 0.8,
+        conf_threshold: float = 0.5,
+        crop_scale: float = 2.0,
+    ):
+        self.small = small
+        self.large = large
+        self.low = low
+        self.high = high
+        self.conf_threshold = conf_threshold
+        self.crop_scale = crop_scale
+        self.frames = 0
+        self.escalated = 0
+
+    @classmethod
+    def from_calibration(cls, small_path: str, **kwargs) -> "CascadeDetector":
+        """<작은 모델>.cascade.json의 큰 모델·구간으로 생성"""
+        with open(band_path(small_path), "r", encoding="utf-8") as f:
+            band = json.load(f)
+        small = EggDetector(small_path, conf_threshold=min(band["low"], 0.5))
+        large = EggDetector(band["large_model"], conf_threshold=0.01)
+        return cls(small, large, band["low"], band["high"], **kwargs)
+
+    def detect(self, image: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: [N, 6] (x1, y1, x2, y2, conf, class_id), 신뢰도 내림차순
+        """
+        dets = self.small.detect(image)
+        band = (dets[:, 4] >= self.low) & (dets[:, 4] < self.high)
+        reclass = np.zeros((len(dets), 2), dtype=np.float32)
+        if band.any():
+            reclass[band] = reclassify(self.large, image, dets[band], self.crop_scale)
+        dets, escalated = apply_band(dets, reclass, self.low, self.high)
+        self.frames += 1
+        self.escalated += escalated
+        dets = dets[dets[:, 4] >= self.conf_threshold]
+        return dets[np.argsort(-dets[:, 4], kind="stable")]
+
+
+def calibrate_band(
+    small: EggDetector,
+    large: EggDetector,
+    data_yaml: str,
+    tolerance: float = 0.01,
+    lows=DEFAULT_LOWS,
+    highs=DEFAULT_HIGHS,
+    num_images: int = None,
+    crop_scale: float = 2.0,
+) -> dict:
+    """
+    검증 데이터로 불확실 구간 보정
+
+    모든 후보 탐지의 재분류 결과를 한 번만 계산해 두고 구간 조합별로 다시 채점합니다.
+    mAP는 작은 모델의 낮은 confidence 탐지(0.001 이상)까지 포함해 계산합니다.
+
+    Returns:
+        dict: 선택 구간, 큰/작은 모델 단독 mAP50, 구간별 mAP50·재분류 비율 표
+    """
+    image_paths, label_paths, class_names = ev.load_dataset(data_yaml)
+    image_paths, label_paths = image_paths[:num_images], label_paths[:num_images]
+    floor_conf, large_conf = small.conf_threshold, large.conf_threshold
+    small.conf_threshold, large.conf_threshold = 0.001, 0.001
+
+    try:
+        images = [cv2.imread(str(p)) for p in image_paths]
+        labels = [
+            ev.load_labels(lp, img.shape[1], img.shape[0])
+            for lp, img in zip(label_paths, images)
+        ]
+        small_dets = [small.detect(img) for img in images]
+        large_dets = [large.detect(img) for img in images]
+
+        large.conf_threshold = 0.01
+        lo, hi = min(lows), max(highs)
+        reclass = []
+        for img, dets in zip(images, small_dets):
+            r = np.zeros((len(dets), 2), dtype=np.float32)
+            candidates = (dets[:, 4] >= lo) & (dets[:, 4] < hi)
+            r[candidates] = reclassify(large, img, dets[candidates], crop_scale)
+            reclass.append(r)
+    finally:
+        small.conf_threshold, large.conf_threshold = floor_conf, large_conf
+
+    def score(dets_list):
+        stats = [ev.image_stats(d, l) for d, l in zip(dets_list, labels)]
+        return ev.summarize(stats, class_names)["mAP50"]
+
+    large_map, small_map = score(large_dets), score(small_dets)
+    target = large_map - tolerance
+    total = sum(int((d[:, 4] >= lo).sum()) for d in small_dets)
+
+    rows = []
+    for low, high in itertools.product(lows, highs):
+        if low >= high:
+            continue
+        results = [apply_band(d, r, low, high) for d, r in zip(small_dets, reclass)]
+        escalated = sum(n for _, n in results)
+        rows.append(
+            {
+                "low": low,
+                "high": high,
+                "mAP50": score([d for d, _ in results]),
+                "escalation_rate": escalated / max(total, 1),
+                "crops_per_image": escalated / len(images),
+            }
+        )
+
+    passing = [r for r in rows if r["mAP50"] >= target]
+    if passing:
+        best = min(passing, key=lambda r: (r["escalation_rate"], -r["mAP50"]))
+    else:
+        best = max(rows, key=lambda r: r["mAP50"])
+    return {
+        "low": best["low"],
+        "high": best["high"],
+        "tolerance": tolerance,
+        "met_tolerance": bool(passing),
+        "small_mAP50": small_map,
+        "large_mAP50": large_map,
+        "cascade_mAP50": best["mAP50"],
+        "escalation_rate": best["escalation_rate"],
+        "bands": rows,
+    }
+
+
+def measure_latency(detectors: dict, images: list, rounds: int = 7) -> dict:
+    """
+    구성별 이미지당 평균 지연 (ms)
+
+    호스트 부하 변화가 한 구성에만 몰리지 않도록 라운드마다 구성 순서를 돌려가며 번갈아 측정합니다.
+    워밍업은 전체 이미지로 한 번 실행해 캐스케이드가 만나는 crop 배치 크기를 모두 거칩니다.
+
+    Returns:
+        dict: {구성: {"median": 라운드 중앙값, "min": 최소, "max": 최대}}
+    """
+    for detect in detectors.values():
+        for img in images:
+            detect(img)
+
+    names = list(detectors)
+    samples = {name: [] for name in names}
+    for r in range(rounds):
+        for name in names[r % len(names) :] + names[: r % len(names)]:
+            start = time.perf_counter()
+            for img in images:
+                detectors[name](img)
+            samples[name].append((time.perf_counter() - start) / len(images) * 1000)
+    return {
+        name: {
+            "median": float(np.median(values)),
+            "min": float(min(values)),
+            "max": float(max(values)),
+        }
+        for name, values in samples.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Calibrate and benchmark a small->large two-stage cascade"
+    )
+    parser.add_argument(
+        "--small",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="매 프레임 실행할 작은 모델 (YOLOv8n)",
+    )
+    parser.add_argument(
+        "--large", type=str, required=True, help="재분류용 큰 모델 (YOLOv8s)"
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.01,
+        help="큰 모델 단독 대비 허용 mAP50 손실",
+    )
+    parser.add_argument(
+        "--band",
+        type=float,
+        nargs=2,
+        default=None,
+        metavar=("LOW", "HIGH"),
+        help="보정 없이 지정 구간 사용",
+    )
+    parser.add_argument(
+        "--crop-scale", type=float, default=2.0, help="crop 크기 = 박스 긴 변 × 배율"
+    )
+    parser.add_argument(
+        "--conf", type=float, default=0.5, help="재분류 후 최종 confidence 임계값"
+    )
+    parser.add_argument(
+        "--num-images", type=int, default=None, help="보정 이미지 수 (기본: 전체)"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=7, help="지연 측정 라운드 수 (구성별 번갈아 측정)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="보정 결과 JSON (기본: <작은 모델 이름>.cascade.json)",
+    )
+
+    args = parser.parse_args()
+
+    small = EggDetector(args.small)
+    large = EggDetector(args.large, conf_threshold=0.01)
+
+    if args.band:
+        low, high = args.band
+        report = {"low": low, "high": high}
+    else:
+        report = calibrate_band(
+            small,
+            large,
+            args.data,
+            tolerance=args.tolerance,
+            num_images=args.num_images,
+            crop_scale=args.crop_scale,
+        )
+        low, high = report["low"], report["high"]
+        print(
+            f"\nmAP50: small {report['small_mAP50']:.4f}, large {report['large_mAP50']:.4f}"
+            f" (target >= {report['large_mAP50'] - args.tolerance:.4f})"
+        )
+        print(f"  {'band':>12s} {'mAP50':>7s} {'escalated':>9s} {'crops/img':>9s}")
+        for r in report["bands"]:
+            mark = " *" if (r["low"], r["high"]) == (low, high) else ""
+            print(
+                f"  [{r['low']:.2f}, {r['high']:.2f}) {r['mAP50']:7.4f}"
+                f" {r['escalation_rate']:9.1%} {r['crops_per_image']:9.2f}{mark}"
+            )
+        if not report["met_tolerance"]:
+            print("  ※ No band met the tolerance; using the most accurate band")
+
+    small.conf_threshold = min(low, args.conf)
+    cascade = CascadeDetector(small, large, low, high, args.conf, args.crop_scale)
+    image_paths, _, _ = ev.load_dataset(args.data)
+    images = [cv2.imread(str(p)) for p in image_paths[: args.num_images]]
+    large_only = EggDetector(args.large, conf_threshold=args.conf)
+    small_only = EggDetector(args.small, conf_threshold=args.conf)
+    latency = measure_latency(
+        {
+            "small": small_only.detect,
+            "large": large_only.detect,
+            "cascade": cascade.detect,
+        },
+        images,
+        args.rounds,
+    )
+    report["latency_ms"] = latency
+    report["cascade_crops_per_image"] = cascade.escalated / max(cascade.frames, 1)
+
+    print(
+        f"\nBand [{low:.2f}, {high:.2f}) — latency per image "
+        f"(median of {args.rounds} interleaved rounds, min-max):"
+    )
+    for name, ms in latency.items():
+        print(f"  {name:8s} {ms['median']:8.1f} ms  ({ms['min']:.1f}-{ms['max']:.1f})")
+    cascade_ms, large_ms = latency["cascade"], latency["large"]
+    print(
+        f"  Cascade saves {1 - cascade_ms['median'] / large_ms['median']:.0%} vs large model"
+        f" (range {1 - cascade_ms['max'] / large_ms['min']:.0%}"
+        f" to {1 - cascade_ms['min'] / large_ms['max']:.0%}),"
+        f" {report['cascade_crops_per_image']:.2f} crops/image escalated"
+    )
+
+    output = Path(args.output or band_path(args.small))
+    report.update({"small_model": str(args.small), "large_model": str(args.large)})
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved: {output}")
@@ -0,0 +1,768 @@
+"""
+Python 참조 추론 엔진 (앱 Models/YoloDetector.cs 동작 재현)
+
+배포용 egg_classifier.onnx를 앱과 같은 방식으로 실행합니다.
+    - 전처리: Letterbox (float32 스케일, int 절삭, 좌우/상하 균등 114 패딩) → BGR→RGB → /255 → NCHW
+    - 후처리: [1, 9, 8400] (또는 전치) 출력에서 앵커별 최대 클래스 점수 >= conf 필터
+              → Letterbox 좌표 복원 + 정수 Rect 절삭/경계 보정 → 클래스 무관 NMS (IoU > nms 억제)
+
+후처리 전 단계를 NumPy로 벡터화했으며, 앱의 스칼라 루프를 그대로 옮긴 참조 구현과 결과가 같습니다.
+
+사용 예:
+    detector = EggDetector("../models/egg_classifier.onnx")
+    detections = detector.detect(cv2.imread("egg.jpg"))  # [N, 6] (x1, y1, x2, y2, conf, class_id)
+
+    # 스레드마다 IOBinding 세션을 하나씩 빌려 쓰는 풀 (입출력 버퍼 재사용)
+    detector = EggDetector("../models/egg_classifier.onnx", pool_size=4)
+"""
+
+import argparse
+import ast
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+# 앱 YoloDetector.ClassNames 순서 (모델 메타데이터에 names가 없을 때 사용)
+CLASS_NAMES = ["normal", "crack", "foreign_matter", "discoloration", "deformed"]
+
+
+def letterbox(image: np.ndarray, imgsz: int = 640, out: np.ndarray = None):
+    """
+    앱 Preprocess와 같은 Letterbox (스케일·리사이즈 크기 계산을 float32로 수행)
+
+    Args:
+        out: 재사용할 [imgsz, imgsz, 3] uint8 캔버스 (None이면 새로 할당)
+
+    Returns:
+        tuple: (canvas [imgsz, imgsz, 3] BGR uint8, (scale, pad_x, pad_y))
+    """
+    h, w = image.shape[:2]
+    size = np.float32(imgsz)
+    scale = min(size / np.float32(w), size / np.float32(h))
+    new_w, new_h = int(np.float32(w) * scale), int(np.float32(h) * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+
+    if out is None:
+        canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    else:
+        canvas = out
+        canvas.fill(114)
+    canvas[pad_y : pad_y + new_h, pad_x : pad_x + new_w] = cv2.resize(
+        image, (new_w, new_h)
+    )
+    return canvas, (scale, pad_x, pad_y)
+
+
+def to_tensor(canvas: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Letterbox 캔버스(BGR) → [1, 3, H, W] float32 (RGB, 0~1)
+
+    out([3, H, W] 또는 [1, 3, H, W] float32)을 주면 새로 할당하지 않고 그 자리에 씁니다.
+    """
+    if out is not None:
+        np.copyto(out, canvas[..., ::-1].transpose(2, 0, 1).reshape(out.shape))
+        out /= np.float32(255.0)
+        return out
+    tensor = canvas[..., ::-1].transpose(2, 0, 1)[None].astype(np.float32)
+    tensor /= 255.0
+    return np.ascontiguousarray(tensor)
+
+
+def decode(output: np.ndarray, params: tuple, shape: tuple, conf_threshold) -> tuple:
+    """
+    YOLOv8 출력 디코딩 (벡터화)
+
+    Args:
+        output: [4 + nc, A] 또는 [A, 4 + nc] (배치 축 제외)
+        params: letterbox()의 (scale, pad_x, pad_y)
+        shape: 원본 이미지 (h, w)
+        conf_threshold: 스칼라 또는 클래스별 임계값 [nc]
+
+    Returns:
+        tuple: (rects [K, 4] int32 (x, y, w, h), conf [K], class_id [K])
+    """
+    if output.shape[0] > output.shape[1]:  # [A, 4 + nc] 전치 출력
+        output = output.T
+    scores = output[4:]
+    class_ids = scores.argmax(0)
+    conf = scores[class_ids, np.arange(scores.shape[1])]
+
+    threshold = np.asarray(conf_threshold, dtype=np.float32)
+    keep = conf >= (threshold[class_ids] if threshold.ndim else threshold)
+    cx, cy, w, h = output[:4, keep]
+    conf, class_ids = conf[keep], class_ids[keep]
+
+    # Letterbox 좌표 → 원본 좌표 (float32), C# (int) 캐스트와 같은 0 방향 절삭
+    scale = np.float32(params[0])
+    pad_x, pad_y = np.float32(params[1]), np.float32(params[2])
+    x1 = np.trunc((cx - w / 2 - pad_x) / scale).astype(np.int32)
+    y1 = np.trunc((cy - h / 2 - pad_y) / scale).astype(np.int32)
+    bw = np.trunc(w / scale).astype(np.int32)
+    bh = np.trunc(h / scale).astype(np.int32)
+
+    # 경계 검사 (앱과 동일한 순서)
+    img_h, img_w = shape
+    x1 = np.clip(x1, 0, img_w - 1)
+    y1 = np.clip(y1, 0, img_h - 1)
+    bw = np.minimum(bw, img_w - x1)
+    bh = np.minimum(bh, img_h - y1)
+
+    return np.stack([x1, y1, bw, bh], 1), conf, class_ids
+
+
+def nms_rects(rects: np.ndarray, conf: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    앱 ApplyNMS와 같은 Greedy NMS (정수 Rect, IoU > 임계값이면 억제, 동점은 원래 순서 유지)
+
+    Returns:
+        np.ndarray: 유지할 인덱스 (신뢰도 내림차순)
+    """
+    order = np.argsort(-conf, kind="stable")
+    x1, y1 = rects[:, 0].astype(np.int64), rects[:, 1].astype(np.int64)
+    x2, y2 = x1 + rects[:, 2], y1 + rects[:, 3]
+    areas = rects[:, 2].astype(np.int64) * rects[:, 3]
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        inter = np.maximum(
+            0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])
+        ) * np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        union = areas[i] + areas[rest] - inter
+        iou = np.where(union > 0, inter.astype(np.float32) / np.maximum(union, 1), 0.0)
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def _postprocess_scalar(
+    output: np.ndarray, params: tuple, shape: tuple, conf_threshold, nms_threshold
+) -> np.ndarray:
+    """앱 Postprocess/ApplyNMS 스칼라 루프를 그대로 옮긴 참조 구현 (검증·벤치마크용)"""
+    if output.shape[0] > output.shape[1]:
+        output = output.T
+    nc, num = output.shape[0] - 4, output.shape[1]
+    thresholds = np.broadcast_to(np.asarray(conf_threshold, dtype=np.float32), (nc,))
+    scale, pad_x, pad_y = np.float32(params[0]), params[1], params[2]
+    img_h, img_w = shape
+
+    boxes, confs, ids = [], [], []
+    for i in range(num):
+        max_conf, max_id = np.float32(0), 0
+        for c in range(nc):
+            if output[4 + c, i] > max_conf:
+                max_conf, max_id = output[4 + c, i], c
+        if max_conf < thresholds[max_id]:
+            continue
+        cx, cy, w, h = output[0, i], output[1, i], output[2, i], output[3, i]
+        x1 = int((cx - w / 2 - np.float32(pad_x)) / scale)
+        y1 = int((cy - h / 2 - np.float32(pad_y)) / scale)
+        bw, bh = int(w / scale), int(h / scale)
+        x1 = max(0, min(x1, img_w - 1))
+        y1 = max(0, min(y1, img_h - 1))
+        boxes.append((x1, y1, min(bw, img_w - x1), min(bh, img_h - y1)))
+        confs.append(max_conf)
+        ids.append(max_id)
+
+    def iou(a, b):
+        ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+        iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+        union = a[2] * a[3] + b[2] * b[3] - ix * iy
+        return 0.0 if union <= 0 else np.float32(ix * iy) / np.float32(union)
+
+    keep, suppressed = [], [False] * len(boxes)
+    for i in sorted(range(len(boxes)), key=lambda k: -confs[k]):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        for j in range(len(boxes)):
+            if i != j and not suppressed[j] and iou(boxes[i], boxes[j]) > nms_threshold:
+                suppressed[j] = True
+
+    return np.array(
+        [
+            [x, y, x + w, y + h, confs[k], ids[k]]
+            for k, (x, y, w, h) in ((k, boxes[k]) for k in keep)
+        ],
+        dtype=np.float32,
+    ).reshape(-1, 6)
+
+
+def load_thresholds(thresholds_json: str) -> tuple:
+    """optimize_thresholds.py 결과 JSON → (클래스별 임계값 list, NMS 임계값)"""
+    with open(thresholds_json, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["thresholds"], data.get("nms_threshold", 0.45)
+
+
+_INPUT_DTYPES = {"tensor(float)": np.float32, "tensor(uint8)": np.uint8}
+
+
+class BoundSession:
+    """
+    미리 할당한 입출력 버퍼에 IOBinding으로 묶인 세션 1개
+
+    session.run()은 호출마다 입력 dict를 받고 출력 배열을 ORT가 새로 할당합니다.
+    여기서는 생성 시 input/output/canvas 버퍼를 한 번 할당해 바인딩하고,
+    run()은 그 버퍼에 그대로 씁니다. 한 번에 한 스레드만 사용해야 합니다 (SessionPool 참고).
+
+    Args:
+        model_path: .onnx 경로 (출력 1개 모델)
+        sess_options: ort.SessionOptions
+        batch: 동적 배치 모델의 버퍼 배치 크기 (고정 배치 모델은 모델 값 사용)
+    """
+
+    def __init__(self, model_path: str, sess_options, batch: int = 1):
+        import onnxruntime as ort
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=sess_options,
+            providers=["CPUExecutionProvider"],
+        )
+        if len(self.session.get_inputs()) > 1:
+            raise ValueError(
+                f"{model_path}: models with embedded NMS (--embed-nms) are not supported"
+            )
+        inp, out = self.session.get_inputs()[0], self.session.get_outputs()[0]
+        shape = [d if isinstance(d, int) else batch for d in inp.shape]
+        self.input = np.zeros(shape, dtype=_INPUT_DTYPES.get(inp.type, np.float32))
+        # 출력 shape·dtype은 한 번 실행해 확인 (심볼릭 차원이 남은 모델 대비)
+        self.output = np.ascontiguousarray(
+            self.session.run([out.name], {inp.name: self.input})[0]
+        )
+        imgsz = shape[1] if shape[-1] == 3 else shape[2]
+        self.canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+
+        self.binding = self.session.io_binding()
+        self.binding.bind_input(
+            inp.name,
+            "cpu",
+            0,
+            self.input.dtype,
+            self.input.shape,
+            self.input.ctypes.data,
+        )
+        self.binding.bind_output(
+            out.name,
+            "cpu",
+            0,
+            self.output.dtype,
+            self.output.shape,
+            self.output.ctypes.data,
+        )
+
+    @property
+    def batch(self) -> int:
+        return self.input.shape[0]
+
+    def run(self) -> np.ndarray:
+        """self.input → self.output (반환값은 다음 run()에서 덮어쓰이는 버퍼)"""
+        self.session.run_with_iobinding(self.binding)
+        return self.output
+
+
+class SessionPool:
+    """
+    BoundSession 풀 — 워커(스레드)마다 세션과 입출력 버퍼를 하나씩 독점
+
+    세션 프로파일이 없으면 CPU 코어를 세션 수로 나눠 intra-op 스레드를 지정해
+    동시에 실행되는 세션끼리 코어를 두고 경쟁하지 않게 합니다.
+
+    Args:
+        model_path: .onnx 경로
+        size: 세션 수 (동시에 추론할 수 있는 워커 수)
+        batch: 세션별 입력 버퍼 배치 크기 (동적 배치 모델만 해당)
+        profile: tune_session.py 프로파일 dict
+    """
+
+    def __init__(
+        self, model_path: str, size: int = 2, batch: int = 1, profile: dict = None
+    ):
+        from tune_session import session_options
+
+        if profile is None:
+            profile = {"intra_op_num_threads": max(1, (os.cpu_count() or 1) // size)}
+        self.profile = profile
+        self.sessions = [
+            BoundSession(model_path, session_options(profile), batch)
+            for _ in range(size)
+        ]
+        self._free = queue.Queue()
+        for session in self.sessions:
+            self._free.put(session)
+
+    @contextmanager
+    def session(self):
+        """빈 세션을 빌림 (모두 사용 중이면 반납될 때까지 대기)"""
+        session = self._free.get()
+        try:
+            yield session
+        finally:
+            self._free.put(session)
+
+    def run(self, tensor: np.ndarray) -> np.ndarray:
+        """
+        [N, ...] 입력을 버퍼 배치 크기 단위로 실행
+
+        Returns:
+            np.ndarray: [N, ...] 출력 (버퍼 복사본)
+        """
+        with self.session() as bound:
+            outputs = []
+            for i in range(0, len(tensor), bound.batch):
+                chunk = tensor[i : i + bound.batch]
+                bound.input[: len(chunk)] = chunk
+                outputs.append(bound.run()[: len(chunk)].copy())
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+class EggDetector:
+    """
+    YoloDetector.cs와 같은 결과를 내는 ONNX 추론 엔진 (CPU)
+
+    Args:
+        model_path: .onnx 경로 (float NCHW 입력 또는 --fuse-preprocess의 uint8 NHWC 입력)
+        conf_threshold: 스칼라 또는 클래스별 임계값
+        nms_threshold: NMS IoU 임계값
+        thresholds_json: optimize_thresholds.py 결과 (지정 시 conf/nms 임계값을 덮어씀)
+        session_profile: tune_session.py 프로파일 JSON (현재 호스트 항목이 있으면 적용)
+        pool_size: 0보다 크면 IOBinding 세션 풀 사용 (detect()를 여러 스레드에서 호출할 때 세션 수)
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        conf_threshold=0.5,
+        nms_threshold: float = 0.45,
+        thresholds_json: str = None,
+        session_profile: str = None,
+        pool_size: int = 0,
+    ):
+        import onnxruntime as ort
+        from tune_session import load_session_profile, session_options
+
+        profile = (
+            load_session_profile(model_path, session_profile)
+            if session_profile
+            else None
+        )
+        self.pool = None
+        if pool_size:
+            # infer_batch()가 쓰는 배치 실행도 풀을 거치므로 별도 세션은 만들지 않음
+            self.pool = SessionPool(model_path, pool_size, profile=profile)
+            self.session = self.pool.sessions[0].session
+        else:
+            self.session = ort.InferenceSession(
+                str(model_path),
+                sess_options=session_options(profile),
+                providers=["CPUExecutionProvider"],
+            )
+
+        inputs = self.session.get_inputs()
+        if len(inputs) > 1:
+            raise ValueError(
+                f"{model_path}: models with embedded NMS (--embed-nms) are not supported"
+            )
+        self.input_name = inputs[0].name
+        self.uint8_input = inputs[0].type == "tensor(uint8)"
+        self.imgsz = int(inputs[0].shape[1] if self.uint8_input else inputs[0].shape[2])
+        # 고정 배치 크기 (동적 배치 모델이면 None)
+        self.batch_size = (
+            inputs[0].shape[0] if isinstance(inputs[0].shape[0], int) else None
+        )
+
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.class_names = (
+            list(ast.literal_eval(names).values()) if names else list(CLASS_NAMES)
+        )
+
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        if thresholds_json:
+            self.conf_threshold, self.nms_threshold = load_thresholds(thresholds_json)
+
+    def preprocess(self, image: np.ndarray) -> tuple:
+        """BGR 이미지 → (모델 입력, letterbox 파라미터)"""
+        canvas, params = letterbox(image, self.imgsz)
+        return (canvas[None] if self.uint8_input else to_tensor(canvas)), params
+
+    def infer(self, tensor: np.ndarray) -> np.ndarray:
+        """모델 원시 출력 (배치 축 포함)"""
+        if self.pool is not None:
+            return self.pool.run(tensor)
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+    def infer_batch(self, tensors: list) -> np.ndarray:
+        """
+        preprocess() 결과 여러 개를 한 번에 추론
+
+        동적 배치 모델은 한 번에 실행하고, 고정 배치 모델은 배치 크기 단위로 나눠
+        마지막 묶음은 마지막 입력을 복제해 채웁니다.
+
+        Returns:
+            np.ndarray: [len(tensors), ...] 원시 출력
+        """
+        if self.batch_size is None:
+            return self.infer(np.concatenate(tensors))
+
+        outputs = []
+        for i in range(0, len(tensors), self.batch_size):
+            chunk = tensors[i : i + self.batch_size]
+            padded = chunk + [chunk[-1]] * (self.batch_size - len(chunk))
+            outputs.append(self.infer(np.concatenate(padded))[: len(chunk)])
+        return np.concatenate(outputs)
+
+    def postprocess(
+        self, output: np.ndarray, params: tuple, shape: tuple
+    ) -> np.ndarray:
+        """
+        단일 이미지 출력 → 탐지 결과
+
+        Returns:
+            np.ndarray: [N, 6] (x1, y1, x2, y2, conf, class_id), 신뢰도 내림차순
+        """
+        rects, conf, class_ids = decode(output, params, shape, self.conf_threshold)
+        keep = nms_rects(rects, conf, self.nms_threshold)
+        rects = rects[keep]
+        return np.concatenate(
+            [
+                rects[:, :2],
+                rects[:, :2] + rects[:, 2:],
+                conf[keep, None],
+                class_ids[keep, None],
+            ],
+            1,
+            dtype=np.float32,
+        )
+
+    def detect(self, image: np.ndarray) -> np.ndarray:
+        """YoloDetector.Detect와 동일: 전처리 → 추론 → 후처리"""
+        if self.pool is not None:
+            return self._detect_bound(image)
+        tensor, params = self.preprocess(image)
+        return self.postprocess(self.infer(tensor)[0], params, image.shape[:2])
+
+    def _detect_bound(self, image: np.ndarray) -> np.ndarray:
+        """풀에서 빌린 세션의 canvas·input·output 버퍼만 사용하는 detect()"""
+        with self.pool.session() as bound:
+            canvas, params = letterbox(image, self.imgsz, out=bound.canvas)
+            if self.uint8_input:
+                bound.input[0] = canvas
+            else:
+                to_tensor(canvas, out=bound.input[0])
+            # decode()가 필요한 값만 골라 복사하므로 반납 전에 후처리까지 끝냄
+            return self.postprocess(bound.run()[0], params, image.shape[:2])
+
+    def to_records(self, detections: np.ndarray) -> list:
+        """[N, 6] → 앱 Detection과 같은 필드의 dict 목록 (BoundingBox = x, y, w, h)"""
+        return [
+            {
+                "class_id": int(c),
+                "class_name": self.class_names[int(c)],
+                "confidence": float(conf),
+                "box": [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+            }
+            for x1, y1, x2, y2, conf, c in detections
+        ]
+
+
+def benchmark_stages(detector: EggDetector, frames: list, runs: int = 3) -> dict:
+    """
+    단계별 평균 비용 (ms/frame)
+
+    letterbox → tensor(정규화·NCHW) → inference → decode → nms,
+    그리고 앱 스칼라 루프를 옮긴 참조 후처리와의 결과 일치 여부·속도 비교
+
+    Returns:
+        dict: 단계별 ms, 참조 후처리 ms, 일치한 프레임 수
+    """
+    stages = ["letterbox", "tensor", "inference", "decode", "nms"]
+    totals = dict.fromkeys(stages + ["scalar_postprocess"], 0.0)
+    matched = 0
+
+    def timed(key, fn, *args):
+        start = time.perf_counter_ns()
+        result = fn(*args)
+        totals[key] += (time.perf_counter_ns() - start) / 1e6
+        return result
+
+    detector.detect(frames[0])  # warm-up
+    for run in range(runs):
+        for frame in frames:
+            canvas, params = timed("letterbox", letterbox, frame, detector.imgsz)
+            tensor = (
+                canvas[None]
+                if detector.uint8_input
+                else timed("tensor", to_tensor, canvas)
+            )
+            output = timed("inference", detector.infer, tensor)[0]
+            rects, conf, class_ids = timed(
+                "decode",
+                decode,
+                output,
+                params,
+                frame.shape[:2],
+                detector.conf_threshold,
+            )
+            timed("nms", nms_rects, rects, conf, detector.nms_threshold)
+
+            # 참조 구현은 느리므로 첫 회차만 측정
+            if run == 0:
+                reference = timed(
+                    "scalar_postprocess",
+                    _postprocess_scalar,
+                    output,
+                    params,
+                    frame.shape[:2],
+                    detector.conf_threshold,
+                    detector.nms_threshold,
+                )
+                detections = detector.postprocess(output, params, frame.shape[:2])
+                matched += int(np.array_equal(reference, detections))
+
+    n = runs * len(frames)
+    report = {key: totals[key] / n for key in stages}
+    report["total"] = sum(report.values())
+    report["scalar_postprocess"] = totals["scalar_postprocess"] / len(frames)
+    report["matched_frames"] = matched
+    report["frames"] = len(frames)
+
+    print(f"\nPer-stage cost ({len(frames)} frames x {runs} runs, ms/frame):")
+    for key in stages + ["total"]:
+        share = report[key] / report["total"] * 100 if report["total"] else 0.0
+        print(f"  {key:12s} {report[key]:8.3f}  ({share:4.1f}%)")
+    vectorized = report["decode"] + report["nms"]
+    print(
+        f"  Post-process: vectorized {vectorized:.3f} ms vs scalar port of the app "
+        f"{report['scalar_postprocess']:.3f} ms "
+        f"({report['scalar_postprocess'] / max(vectorized, 1e-9):.0f}x), "
+        f"identical on {matched}/{len(frames)} frames"
+    )
+    return report
+
+
+def _page_faults() -> int:
+    """프로세스 누적 페이지 폴트 수 (새로 할당한 메모리를 처음 건드릴 때 발생)"""
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    except ImportError:  # Windows
+        import psutil
+
+        return psutil.Process().memory_info().num_page_faults
+
+
+def benchmark_pool(
+    model_path: str,
+    frames: list,
+    iterations: int = 500,
+    threads: int = 1,
+    pool_size: int = None,
+    session_profile: str = None,
+) -> dict:
+    """
+    세션 풀(IOBinding + 버퍼 재사용) vs 기본 session.run 경로의 지속 부하 비교
+
+    기본 경로는 verify_onnx처럼 호출마다 입력 텐서를 새로 만들고 session.run이 출력을 할당합니다.
+    두 경로 모두 풀과 같은 세션 옵션(intra-op 스레드 수)을 사용합니다.
+    threads개 스레드가 쉬지 않고 detect()를 호출하며, 호출별 지연과
+    할당 지표(tracemalloc으로 잡은 NumPy 할당 바이트, 페이지 폴트)를 기록합니다.
+
+    Returns:
+        dict: 경로별 p50/p95/p99/max 지연(ms), 처리량, 호출당 할당 바이트·페이지 폴트
+    """
+    import tracemalloc
+
+    import onnxruntime as ort
+    from tune_session import session_options
+
+    pooled = EggDetector(
+        model_path, session_profile=session_profile, pool_size=pool_size or threads
+    )
+    naive = EggDetector(model_path, session_profile=session_profile)
+    # 기본 경로도 풀 세션과 같은 intra-op 스레드 수로 맞춰 IOBinding 효과만 비교
+    naive.session = ort.InferenceSession(
+        str(model_path),
+        sess_options=session_options(pooled.pool.profile),
+        providers=["CPUExecutionProvider"],
+    )
+    modes = {"session.run": naive, "pooled iobinding": pooled}
+    per_thread = max(1, iterations // threads)
+    latencies = {name: [[] for _ in range(threads)] for name in modes}
+    elapsed, faults = dict.fromkeys(modes, 0.0), dict.fromkeys(modes, 0)
+    for detector in modes.values():
+        for frame in frames[:5]:  # warm-up
+            detector.detect(frame)
+
+    def worker(name, k, count):
+        detector = modes[name]
+        for i in range(count):
+            frame = frames[(k + i * threads) % len(frames)]
+            start = time.perf_counter_ns()
+            detector.detect(frame)
+            latencies[name][k].append((time.perf_counter_ns() - start) / 1e6)
+
+    # 호스트 부하·클럭 변화가 한쪽에만 몰리지 않도록 두 경로를 라운드마다 번갈아 실행
+    rounds = min(5, per_thread)
+    for r in range(rounds):
+        count = per_thread // rounds + (r < per_thread % rounds)
+        for name in modes:
+            before, start = _page_faults(), time.perf_counter()
+            workers = [
+                threading.Thread(target=worker, args=(name, k, count))
+                for k in range(threads)
+            ]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed[name] += time.perf_counter() - start
+            faults[name] += _page_faults() - before
+
+    report = {}
+    for name, detector in modes.items():
+        # 할당량은 지연 측정과 분리해 단일 스레드로 측정 (tracemalloc 자체 비용 때문)
+        allocated = 0
+        tracemalloc.start()
+        for frame in frames[:20]:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            detector.detect(frame)
+            allocated += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+
+        lat = np.concatenate(latencies[name])
+        report[name] = {
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "max_ms": float(lat.max()),
+            "std_ms": float(lat.std()),
+            "fps": len(lat) / elapsed[name],
+            "peak_alloc_kb_per_call": allocated / min(len(frames), 20) / 1024,
+            "page_faults_per_call": faults[name] / len(lat),
+            "intra_op_threads": detector.session.get_session_options().intra_op_num_threads,
+        }
+
+    print(
+        f"\nSustained load ({threads} thread(s) x {per_thread} detect calls, "
+        f"pool size {pool_size or threads}):"
+    )
+    print(
+        f"  {'path':18s} {'intra':>5s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'max':>7s} {'std':>6s}"
+        f" {'fps':>7s} {'alloc KB/call':>13s} {'faults/call':>11s}"
+    )
+    for name, r in report.items():
+        print(
+            f"  {name:18s} {r['intra_op_threads']:5d} {r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r['p99_ms']:7.2f}"
+            f" {r['max_ms']:7.2f} {r['std_ms']:6.2f} {r['fps']:7.1f}"
+            f" {r['peak_alloc_kb_per_call']:13.0f} {r['page_faults_per_call']:11.1f}"
+        )
+    naive, pooled = report["session.run"], report["pooled iobinding"]
+    print(
+        f"  p99 {naive['p99_ms']:.2f} -> {pooled['p99_ms']:.2f} ms "
+        f"({pooled['p99_ms'] / naive['p99_ms'] - 1:+.1%}), "
+        f"allocations {naive['peak_alloc_kb_per_call']:.0f} -> "
+        f"{pooled['peak_alloc_kb_per_call']:.0f} KB/call"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the deployed ONNX model exactly like the desktop app (YoloDetector)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument(
+        "--image", type=str, nargs="*", default=[], help="탐지할 이미지 경로"
+    )
+    parser.add_argument("--conf", type=float, default=0.5, help="confidence 임계값")
+    parser.add_argument("--nms", type=float, default=0.45, help="NMS IoU 임계값")
+    parser.add_argument(
+        "--thresholds",
+        type=str,
+        default=None,
+        help="클래스별 임계값 JSON (optimize_thresholds.py 결과)",
+    )
+    parser.add_argument(
+        "--session-profile",
+        type=str,
+        default=None,
+        help="tune_session.py 프로파일 JSON",
+    )
+    parser.add_argument("--benchmark", action="store_true", help="단계별 비용 벤치마크")
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="../data/data.yaml",
+        help="벤치마크용 data.yaml (없으면 노이즈 프레임)",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="벤치마크 반복 횟수")
+    parser.add_argument(
+        "--pool-benchmark",
+        action="store_true",
+        help="세션 풀(IOBinding) vs session.run 지속 부하 비교",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=1, help="풀 벤치마크 동시 호출 스레드 수"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=None, help="풀 세션 수 (기본: --threads)"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=500, help="풀 벤치마크 총 detect 호출 수"
+    )
+
+    args = parser.parse_args()
+
+    detector = EggDetector(
+        args.model,
+        conf_threshold=args.conf,
+        nms_threshold=args.nms,
+        thresholds_json=args.thresholds,
+        session_profile=args.session_profile,
+    )
+
+    for path in args.image:
+        records = detector.to_records(detector.detect(cv2.imread(path)))
+        print(json.dumps({"image": path, "detections": records}, ensure_ascii=False))
+
+    if args.benchmark or args.pool_benchmark:
+        try:
+            from evaluate_onnx import load_dataset
+
+            frames = [
+                cv2.imread(str(p)) for p in load_dataset(args.data, "val")[0][:32]
+            ]
+        except (FileNotFoundError, OSError):
+            rng = np.random.default_rng(0)
+            frames = [
+                rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(16)
+            ]
+    if args.benchmark:
+        benchmark_stages(detector, frames, args.runs)
+    if args.pool_benchmark:
+        benchmark_pool(
+            args.model,
+            frames,
+            args.iterations,
+            args.threads,
+            args.pool_size,
+            args.session_profile,
+        )
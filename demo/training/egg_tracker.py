@@ -0,0 +1,395 @@
+"""
+IoU 기반 계란 추적기 (ByteTrack 방식 2단계 매칭) — 계란마다 판정 1건
+
+앱 DetectionViewModel.UpdateTracking은 같은 클래스끼리만 IoU 매칭하므로, 계란이 화면을 지나는 동안
+클래스가 한 번만 흔들려도 새 추적이 생기고 SaveInspectionAsync(기록 + 이미지 업로드)가 다시 호출됩니다.
+EggTracker는 클래스와 무관하게 위치로 매칭하고, 추적마다 클래스 투표(confidence 가중)를 모아
+추적이 끝날 때 최종 판정 1건을 냅니다.
+
+    1단계: 예측 위치(등속 모델)와 높은 confidence 탐지(>= high_thresh) IoU 매칭
+    2단계: 남은 추적과 낮은 confidence 탐지(low_thresh ~ high_thresh) 매칭 — 흐림·가림 프레임 유지
+    남은 높은 탐지 → 새 추적, max_missing 프레임 동안 못 찾은 추적 → 종료 + 판정
+
+녹화 영상으로 앱 방식 대비 추론 호출 수 / 저장 기록 수 비교:
+    python egg_tracker.py --model ../models/egg_classifier.onnx --video conveyor.mp4 --detect-interval 3
+"""
+
+import argparse
+import json
+
+import cv2
+import numpy as np
+
+from egg_detector import EggDetector
+
+# 앱 DetectionViewModel 상수
+APP_IOU_THRESHOLD = 0.5
+APP_MIN_FRAMES_TO_SAVE = 10
+APP_MAX_MISSING_FRAMES = 10
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    박스 간 IoU 행렬 (벡터화)
+
+    Args:
+        a: [N, 4], b: [M, 4] (x1, y1, x2, y2)
+
+    Returns:
+        np.ndarray: [N, M] float32
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0).astype(np.float32)
+
+
+def greedy_match(iou: np.ndarray, threshold: float) -> list:
+    """
+    IoU 큰 쌍부터 1:1 매칭
+
+    Returns:
+        list[tuple]: (행 index, 열 index)
+    """
+    pairs = np.argwhere(iou >= threshold)
+    if pairs.size == 0:
+        return []
+    order = np.argsort(-iou[pairs[:, 0], pairs[:, 1]], kind="stable")
+    used_rows, used_cols, matches = set(), set(), []
+    for r, c in pairs[order]:
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((int(r), int(c)))
+    return matches
+
+
+class Track:
+    """추적 중인 계란 1개 (위치·속도 + 클래스 투표)"""
+
+    def __init__(self, track_id: int, det: np.ndarray, frame: int, num_classes: int):
+        self.track_id = track_id
+        self.box = det[:4].astype(np.float64)
+        self.velocity = np.zeros(2)
+        self.votes = np.zeros(num_classes)
+        self.conf_sum = np.zeros(num_classes)
+        self.counts = np.zeros(num_classes, dtype=np.int64)
+        self.hits = 0
+        self.missing = 0
+        self.first_frame = frame
+        self.last_frame = frame
+        self.best = (0.0, frame, det[:4].copy())  # (conf, frame, box)
+        self.add(det, frame)
+
+    def predict(self):
+        """등속 모델로 한 프레임 진행"""
+        self.box += np.tile(self.velocity, 2)
+
+    def add(self, det: np.ndarray, frame: int):
+        """매칭된 탐지 반영 (예측 위치는 이미 predict()로 진행된 상태)"""
+        if self.hits:
+            # 예측 위치와 실제 위치 차이의 절반만큼 프레임당 속도 보정
+            gap = max(frame - self.last_frame, 1)
+            self.velocity += 0.5 * (det[:2] - self.box[:2]) / gap
+        self.box = det[:4].astype(np.float64)
+        c, conf = int(det[5]), float(det[4])
+        self.votes[c] += conf
+        self.conf_sum[c] += conf
+        self.counts[c] += 1
+        if conf > self.best[0]:
+            self.best = (conf, frame, det[:4].copy())
+        self.hits += 1
+        self.missing = 0
+        self.last_frame = frame
+
+    def verdict(self, class_names: list = None) -> dict:
+        """최종 판정 (confidence 가중 투표 최다 클래스, box는 to_records()와 같은 x, y, w, h)"""
+        c = int(self.votes.argmax())
+        return {
+            "track_id": self.track_id,
+            "class_id": c,
+            "class_name": class_names[c] if class_names else str(c),
+            "confidence": float(self.conf_sum[c] / max(self.counts[c], 1)),
+            "vote_share": float(self.votes[c] / max(self.votes.sum(), 1e-9)),
+            "frames": self.hits,
+            "first_frame": self.first_frame,
+            "last_frame": self.last_frame,
+            "best_frame": self.best[1],
+            "box": [int(v) for v in self.best[2][:2]]
+            + [int(v) for v in self.best[2][2:] - self.best[2][:2]],
+        }
+
+
+class EggTracker:
+    """
+    ByteTrack 방식 다중 계란 추적기
+
+    Args:
+        num_classes: 클래스 수
+        high_thresh: 이 confidence 이상 탐지만 1단계 매칭·새 추적 생성 (앱 기본 0.5)
+        low_thresh: 2단계 매칭에 쓰는 낮은 confidence 하한 (탐지기 임계값도 이 값으로 설정)
+        match_iou: 1단계 IoU 임계값
+        low_match_iou: 2단계 IoU 임계값
+        max_missing: 이 프레임 수 동안 못 찾으면 추적 종료
+        min_hits: 판정을 내기 위한 최소 탐지 프레임 수 (미만이면 잡음으로 버림)
+        class_names: 판정 기록용 클래스 이름
+    """
+
+    def __init__(
+        self,
+        num_classes: int,
+        high_thresh: float = 0.5,
+        low_thresh: float = 0.1,
+        match_iou: float = 0.3,
+        low_match_iou: float = 0.5,
+        max_missing: int = 10,
+        min_hits: int = 3,
+        class_names: list = None,
+    ):
+        self.num_classes = num_classes
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_missing = max_missing
+        self.min_hits = min_hits
+        self.class_names = class_names
+        self.tracks = []
+        self.next_id = 1
+
+    def settled(self) -> bool:
+        """보이는 모든 추적이 min_hits 이상 (새 계란이 확정 대기 중이 아님)"""
+        return all(t.hits >= self.min_hits for t in self.tracks)
+
+    def predict(self, frame: int) -> list:
+        """추론을 건너뛴 프레임: 위치만 예측 진행 (미탐지로 세지 않음)"""
+        for t in self.tracks:
+            t.predict()
+        return []
+
+    def update(self, detections: np.ndarray, frame: int) -> list:
+        """
+        탐지 결과 반영
+
+        Args:
+            detections: [N, 6] (x1, y1, x2, y2, conf, class_id) — EggDetector.detect() 출력
+            frame: 프레임 번호
+
+        Returns:
+            list[dict]: 이번 프레임에 종료된 추적의 판정
+        """
+        for t in self.tracks:
+            t.predict()
+        detections = detections[detections[:, 4] >= self.low_thresh]
+        high = np.flatnonzero(detections[:, 4] >= self.high_thresh)
+        low = np.flatnonzero(detections[:, 4] < self.high_thresh)
+
+        # 1단계: 전체 추적 × 높은 탐지
+        boxes = np.array([t.box for t in self.tracks]).reshape(-1, 4)
+        matches = greedy_match(iou_matrix(boxes, detections[high, :4]), self.match_iou)
+        for r, c in matches:
+            self.tracks[r].add(detections[high[c]], frame)
+        rest = sorted(set(range(len(self.tracks))) - {r for r, _ in matches})
+        new = sorted(set(range(len(high))) - {c for _, c in matches})
+
+        # 2단계: 남은 추적 × 낮은 탐지
+        matches = greedy_match(
+            iou_matrix(boxes[rest], detections[low, :4]), self.low_match_iou
+        )
+        for r, c in matches:
+            self.tracks[rest[r]].add(detections[low[c]], frame)
+        for r in set(range(len(rest))) - {r for r, _ in matches}:
+            self.tracks[rest[r]].missing += 1
+
+        for c in new:
+            self.tracks.append(
+                Track(self.next_id, detections[high[c]], frame, self.num_classes)
+            )
+            self.next_id += 1
+
+        finished = [t for t in self.tracks if t.missing > self.max_missing]
+        self.tracks = [t for t in self.tracks if t.missing <= self.max_missing]
+        return self._verdicts(finished)
+
+    def flush(self) -> list:
+        """영상 끝: 남은 추적 모두 종료"""
+        finished, self.tracks = self.tracks, []
+        return self._verdicts(finished)
+
+    def _verdicts(self, tracks: list) -> list:
+        return [t.verdict(self.class_names) for t in tracks if t.hits >= self.min_hits]
+
+
+def app_tracking_saves(frames: list, conf_threshold: float = 0.5) -> int:
+    """
+    앱 UpdateTracking 규칙을 그대로 적용했을 때 SaveInspectionAsync 호출 수
+
+    같은 클래스끼리 IoU >= 0.5 매칭, 10프레임 유지 시 저장, 10프레임 미탐지 시 제거.
+    """
+    tracks, saves = [], 0  # [box, class, consecutive, missing, saved]
+    for dets in frames:
+        dets = dets[dets[:, 4] >= conf_threshold]
+        matched = set()
+        for t in tracks:
+            found = False
+            ious = iou_matrix(np.asarray(t[0])[None], dets[:, :4])[0]
+            for i in range(len(dets)):
+                if i in matched:
+                    continue
+                if ious[i] >= APP_IOU_THRESHOLD and int(dets[i, 5]) == t[1]:
+                    t[0], t[2], t[3] = dets[i, :4], t[2] + 1, 0
+                    matched.add(i)
+                    found = True
+                    break
+            if not found:
+                t[3] += 1
+        for i in range(len(dets)):
+            if i not in matched:
+                tracks.append([dets[i, :4], int(dets[i, 5]), 1, 0, False])
+        kept = []
+        for t in tracks:
+            if t[2] >= APP_MIN_FRAMES_TO_SAVE and not t[4]:
+                t[4] = True
+                saves += 1
+            if t[3] < APP_MAX_MISSING_FRAMES:
+                kept.append(t)
+        tracks = kept
+    return saves
+
+
+def read_detections(detector: EggDetector, video: str, max_frames: int = None):
+    """영상 전체 프레임 탐지 (추적 간격별 비교에 재사용)"""
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(detector.detect(frame))
+    capture.release()
+    if not frames:
+        raise FileNotFoundError(f"No frames could be read from {video}")
+    return frames
+
+
+def run_tracker(frames: list, tracker: EggTracker, detect_interval: int = 1):
+    """
+    프레임별 탐지 결과로 추적 실행
+
+    detect_interval > 1이면 모든 추적이 확정(settled)된 동안에는 N프레임마다만 추론하고
+    사이 프레임은 위치만 예측합니다. 새 계란은 최대 N-1프레임 늦게 잡힙니다.
+
+    Returns:
+        tuple: (판정 목록, 추론 호출 수)
+    """
+    verdicts, calls = [], 0
+    for index, dets in enumerate(frames):
+        if detect_interval > 1 and tracker.settled() and index % detect_interval:
+            tracker.predict(index)
+            continue
+        calls += 1
+        verdicts += tracker.update(dets, index)
+    return verdicts + tracker.flush(), calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Track eggs across video frames and emit one verdict per egg"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument("--video", type=str, required=True, help="녹화된 컨베이어 영상")
+    parser.add_argument(
+        "--conf", type=float, default=0.5, help="새 추적 생성 confidence (앱 기본값)"
+    )
+    parser.add_argument(
+        "--low-conf", type=float, default=0.1, help="2단계 매칭 confidence 하한"
+    )
+    parser.add_argument("--nms", type=float, default=0.45, help="NMS IoU 임계값")
+    parser.add_argument(
+        "--match-iou", type=float, default=0.3, help="추적-탐지 IoU 임계값"
+    )
+    parser.add_argument(
+        "--max-missing", type=int, default=10, help="추적 종료까지 미탐지 프레임 수"
+    )
+    parser.add_argument(
+        "--min-hits", type=int, default=3, help="판정에 필요한 최소 탐지 프레임 수"
+    )
+    parser.add_argument(
+        "--detect-interval",
+        type=int,
+        default=1,
+        help="모든 추적이 확정된 동안 N프레임마다만 추론 (1 = 매 프레임)",
+    )
+    parser.add_argument("--max-frames", type=int, default=None, help="최대 프레임 수")
+    parser.add_argument(
+        "--output", type=str, default=None, help="판정 JSONL 저장 경로 (계란당 한 줄)"
+    )
+
+    args = parser.parse_args()
+
+    detector = EggDetector(
+        args.model, conf_threshold=args.low_conf, nms_threshold=args.nms
+    )
+    frames = read_detections(detector, args.video, args.max_frames)
+
+    def make_tracker():
+        return EggTracker(
+            len(detector.class_names),
+            high_thresh=args.conf,
+            low_thresh=args.low_conf,
+            match_iou=args.match_iou,
+            max_missing=args.max_missing,
+            min_hits=args.min_hits,
+            class_names=detector.class_names,
+        )
+
+    per_detection = sum(int((d[:, 4] >= args.conf).sum()) for d in frames)
+    app_saves = app_tracking_saves(frames, args.conf)
+    verdicts, calls = run_tracker(frames, make_tracker())
+
+    print(f"\n{args.video}: {len(frames)} frames")
+    print(f"  {'mode':28s} {'inference':>9s} {'records':>8s}")
+    print(f"  {'per-detection (every frame)':28s} {len(frames):9d} {per_detection:8d}")
+    print(f"  {'app UpdateTracking':28s} {len(frames):9d} {app_saves:8d}")
+    print(f"  {'EggTracker':28s} {calls:9d} {len(verdicts):8d}")
+    if args.detect_interval > 1:
+        sparse, sparse_calls = run_tracker(frames, make_tracker(), args.detect_interval)
+        label = f"EggTracker (interval {args.detect_interval})"
+        print(f"  {label:28s} {sparse_calls:9d} {len(sparse):8d}")
+        print(
+            f"  Inference calls: -{1 - sparse_calls / len(frames):.0%} vs every frame"
+        )
+    if per_detection:
+        print(
+            f"  Stored records: -{1 - len(verdicts) / per_detection:.0%} vs per detection, "
+            f"{len(verdicts)} vs {app_saves} with the app's tracking rule"
+        )
+
+    def class_summary(items):
+        counts = np.bincount(
+            [v["class_id"] for v in items], minlength=len(detector.class_names)
+        )
+        return ", ".join(f"{n}={c}" for n, c in zip(detector.class_names, counts))
+
+    print(f"  Verdicts: {class_summary(verdicts)}")
+    if args.detect_interval > 1:
+        print(f"  Verdicts (interval {args.detect_interval}): {class_summary(sparse)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for v in verdicts:
+                f.write(json.dumps(v, ensure_ascii=False) + "\n")
+        print(f"  Saved: {args.output}")
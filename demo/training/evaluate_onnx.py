@@ -0,0 +1,649 @@
+"""
+ONNX 모델 mAP 평가 스크립트 (torch / ultralytics 불필요)
+
+배포용 .onnx 파일을 ONNX Runtime으로 직접 실행하여 검증 데이터셋의 mAP50 / mAP50-95를 계산합니다.
+전처리(Letterbox), YOLOv8 출력 디코딩, NMS, mAP 계산은 모두 NumPy로 벡터화되어 있으며
+이미지는 프로세스 풀에 나누어 병렬로 평가합니다.
+
+매칭·AP 계산 방식은 ultralytics DetectionValidator와 동일합니다
+(IoU 0.50:0.95 10단계, 101점 보간 AP, 클래스별 NMS, multi-label).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import yaml
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz  # numpy < 2.0 호환
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ============================================================================
+# 1. 전처리 (앱 YoloDetector.Preprocess 와 동일한 Letterbox)
+# ============================================================================
+
+
+def letterbox(img: np.ndarray, imgsz: int = 640):
+    """
+    종횡비 유지 리사이즈 + 114 회색 패딩
+
+    Returns:
+        tuple: (canvas [imgsz, imgsz, 3] BGR uint8, scale, pad_x, pad_y)
+    """
+    h, w = img.shape[:2]
+    scale = min(imgsz / w, imgsz / h)
+    new_w, new_h = int(w * scale), int(h * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[pad_y : pad_y + new_h, pad_x : pad_x + new_w] = cv2.resize(
+        img, (new_w, new_h)
+    )
+    return canvas, scale, pad_x, pad_y
+
+
+def preprocess_batch(images: list, imgsz: int = 640):
+    """
+    여러 장의 BGR 이미지를 한 번에 NCHW float32 텐서로 변환
+
+    Returns:
+        tuple: (tensor [B, 3, imgsz, imgsz], params [B, 3] = (scale, pad_x, pad_y))
+    """
+    boxed = [letterbox(img, imgsz) for img in images]
+    canvases = np.stack([b[0] for b in boxed])
+    params = np.array([b[1:] for b in boxed], dtype=np.float32)
+
+    # BGR → RGB, NHWC → NCHW, 0~255 → 0~1 (배치 전체 일괄 처리)
+    tensor = canvases[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor), params
+
+
+# ============================================================================
+# 2. 후처리 (YOLOv8 출력 디코딩 + NMS)
+# ============================================================================
+
+
+def xywh2xyxy(boxes: np.ndarray) -> np.ndarray:
+    """(cx, cy, w, h) → (x1, y1, x2, y2)"""
+    out = np.empty_like(boxes)
+    half_w, half_h = boxes[..., 2] / 2, boxes[..., 3] / 2
+    out[..., 0] = boxes[..., 0] - half_w
+    out[..., 1] = boxes[..., 1] - half_h
+    out[..., 2] = boxes[..., 0] + half_w
+    out[..., 3] = boxes[..., 1] + half_h
+    return out
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU 행렬 [len(a), len(b)] (xyxy)"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-7)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy NMS (신뢰도 내림차순, 매 단계 남은 후보 전체와 IoU를 한 번에 계산)
+
+    Returns:
+        np.ndarray: 유지할 인덱스 (신뢰도 내림차순)
+    """
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def candidate_boxes(pred: np.ndarray, params, conf_threshold: float = 0.001) -> tuple:
+    """
+    단일 이미지 출력 [4 + nc, A]에서 NMS 이전 후보 추출
+
+    최대 클래스 점수가 conf_threshold 이하인 앵커는 버리고,
+    나머지의 박스를 원본 이미지 좌표(xyxy, 클리핑 전)로 복원합니다.
+
+    Returns:
+        tuple: (boxes [K, 4], scores [K, nc])
+    """
+    scale, pad_x, pad_y = params
+    scores = pred[4:].T  # [A, nc]
+    keep = scores.max(1) > conf_threshold
+
+    xyxy = xywh2xyxy(pred[:4, keep].T)
+    xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale
+    xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale
+    return xyxy, scores[keep]
+
+
+def select_detections(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    shape: tuple,
+    conf_threshold: float = 0.001,
+    iou_threshold: float = 0.7,
+    multi_label: bool = True,
+    max_det: int = 300,
+    max_nms: int = 30000,
+    agnostic: bool = False,
+) -> np.ndarray:
+    """
+    NMS 이전 후보에 신뢰도 필터 + 클래스별 NMS 적용
+
+    Args:
+        boxes / scores: candidate_boxes 결과 (원본 이미지 좌표)
+        shape: 원본 이미지 (h, w) — 최종 박스 클리핑용
+        conf_threshold: 신뢰도 임계값 (스칼라 또는 클래스별 배열 [nc])
+        multi_label: 앵커 하나에 대해 임계값을 넘는 모든 클래스를 후보로 사용 (ultralytics val 방식)
+        agnostic: 클래스 구분 없이 NMS 적용 (앱 YoloDetector.ApplyNMS 방식)
+
+    Returns:
+        np.ndarray: [N, 6] (x1, y1, x2, y2, conf, class_id)
+    """
+    # conf_threshold는 스칼라 또는 클래스별 임계값 배열 [nc]
+    threshold = np.asarray(conf_threshold, dtype=np.float32)
+    if multi_label:
+        anchor_idx, class_ids = np.nonzero(scores > threshold)
+        conf = scores[anchor_idx, class_ids]
+    else:
+        class_ids = scores.argmax(1)
+        conf = scores[np.arange(len(scores)), class_ids]
+        per_anchor = threshold[class_ids] if threshold.ndim else threshold
+        anchor_idx = np.nonzero(conf > per_anchor)[0]
+        class_ids, conf = class_ids[anchor_idx], conf[anchor_idx]
+
+    if conf.size > max_nms:
+        top = conf.argsort()[::-1][:max_nms]
+        anchor_idx, class_ids, conf = anchor_idx[top], class_ids[top], conf[top]
+
+    xyxy = boxes[anchor_idx].astype(np.float32)
+    conf = conf.astype(np.float32)
+
+    # 클래스별 NMS: 클래스마다 좌표를 오프셋하여 한 번의 NMS로 처리
+    offset = 0.0 if agnostic else class_ids[:, None].astype(np.float32) * 7680.0
+    keep = nms(xyxy + offset, conf, iou_threshold)[:max_det]
+    xyxy, conf, class_ids = xyxy[keep], conf[keep], class_ids[keep]
+
+    h, w = shape
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+
+    return np.concatenate(
+        [xyxy, conf[:, None], class_ids[:, None].astype(np.float32)], 1
+    )
+
+
+def decode_output(
+    output: np.ndarray,
+    params: np.ndarray,
+    shapes: list,
+    conf_threshold: float = 0.001,
+    iou_threshold: float = 0.7,
+    multi_label: bool = True,
+    max_det: int = 300,
+) -> list:
+    """
+    YOLOv8 출력 [B, 4 + nc, A] (또는 [B, A, 4 + nc])을 이미지별 탐지 결과로 변환
+
+    Args:
+        output: 모델 원시 출력
+        params: preprocess_batch가 반환한 (scale, pad_x, pad_y) [B, 3]
+        shapes: 원본 이미지 (h, w) 목록
+
+    Returns:
+        list[np.ndarray]: 이미지별 [N, 6] (x1, y1, x2, y2, conf, class_id) — 원본 이미지 좌표
+    """
+    if output.shape[1] > output.shape[2]:  # [B, A, 4 + nc] → [B, 4 + nc, A]
+        output = output.transpose(0, 2, 1)
+
+    return [
+        select_detections(
+            *candidate_boxes(pred, p, conf_threshold),
+            shape,
+            conf_threshold,
+            iou_threshold,
+            multi_label,
+            max_det,
+        )
+        for pred, p, shape in zip(output, params, shapes)
+    ]
+
+
+# ============================================================================
+# 3. mAP 계산
+# ============================================================================
+
+
+def match_predictions(
+    pred_classes: np.ndarray, true_classes: np.ndarray, iou: np.ndarray
+) -> np.ndarray:
+    """
+    IoU 임계값 10단계에 대해 예측-정답 매칭 (ultralytics와 동일한 1:1 매칭)
+
+    Args:
+        iou: [num_gt, num_pred] IoU 행렬
+
+    Returns:
+        np.ndarray: [num_pred, 10] bool — 임계값별 TP 여부
+    """
+    correct = np.zeros((len(pred_classes), len(IOU_THRESHOLDS)), dtype=bool)
+    iou = iou * (true_classes[:, None] == pred_classes[None, :])
+
+    for i, threshold in enumerate(IOU_THRESHOLDS):
+        matches = np.array(np.nonzero(iou >= threshold)).T  # [K, 2] (gt, pred)
+        if matches.shape[0] == 0:
+            continue
+        if matches.shape[0] > 1:
+            order = iou[matches[:, 0], matches[:, 1]].argsort()[::-1]
+            matches = matches[order]
+            matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+            matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+        correct[matches[:, 1], i] = True
+
+    return correct
+
+
+def image_stats(det: np.ndarray, labels: np.ndarray) -> tuple:
+    """
+    이미지 1장의 매칭 통계
+
+    Args:
+        det: [N, 6] 탐지 결과
+        labels: [M, 5] (class_id, x1, y1, x2, y2)
+
+    Returns:
+        tuple: (correct [N, 10], conf [N], pred_cls [N], target_cls [M])
+    """
+    if len(det) == 0 or len(labels) == 0:
+        correct = np.zeros((len(det), len(IOU_THRESHOLDS)), dtype=bool)
+    else:
+        iou_matrix = box_iou(labels[:, 1:], det[:, :4])
+        correct = match_predictions(det[:, 5], labels[:, 0], iou_matrix)
+    return correct, det[:, 4], det[:, 5], labels[:, 0]
+
+
+def compute_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    """PR 곡선의 AP (101점 보간, COCO 방식)"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+
+    x = np.linspace(0, 1, 101)
+    return float(_trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def ap_per_class(
+    tp: np.ndarray,
+    conf: np.ndarray,
+    pred_cls: np.ndarray,
+    target_cls: np.ndarray,
+    nc: int,
+) -> dict:
+    """
+    클래스별 AP / Precision / Recall 계산
+
+    Returns:
+        dict: ap [nc, 10], precision [nc], recall [nc] (mAP50 기준 최대 F1 지점), counts [nc]
+    """
+    order = np.argsort(-conf)
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+
+    ap = np.zeros((nc, tp.shape[1]))
+    precision = np.zeros(nc)
+    recall = np.zeros(nc)
+    counts = np.bincount(target_cls.astype(np.int64), minlength=nc)
+
+    for c in range(nc):
+        mask = pred_cls == c
+        n_gt, n_pred = counts[c], mask.sum()
+        if n_gt == 0 or n_pred == 0:
+            continue
+
+        tpc = tp[mask].cumsum(0)
+        fpc = (1 - tp[mask]).cumsum(0)
+        rec = tpc / (n_gt + 1e-16)
+        prec = tpc / (tpc + fpc)
+
+        for j in range(tp.shape[1]):
+            ap[c, j] = compute_ap(rec[:, j], prec[:, j])
+
+        f1 = 2 * prec[:, 0] * rec[:, 0] / (prec[:, 0] + rec[:, 0] + 1e-16)
+        best = f1.argmax()
+        precision[c], recall[c] = prec[best, 0], rec[best, 0]
+
+    return {"ap": ap, "precision": precision, "recall": recall, "counts": counts}
+
+
+# ============================================================================
+# 4. 데이터셋 / 병렬 평가
+# ============================================================================
+
+
+def load_dataset(data_yaml: str, split: str = "val"):
+    """
+    data.yaml에서 이미지 목록과 클래스 이름 로드
+
+    Returns:
+        tuple: (image_paths, label_paths, class_names)
+    """
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    names = data["names"]
+    class_names = (
+        [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+    )
+
+    image_dir = Path(data["path"]) / data[split]
+    label_dir = Path(data["path"]) / data[split].replace("images", "labels")
+
+    image_paths = sorted(
+        p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+    label_paths = [label_dir / f"{p.stem}.txt" for p in image_paths]
+    return image_paths, label_paths, class_names
+
+
+def load_labels(label_path: Path, w: int, h: int) -> np.ndarray:
+    """YOLO 라벨(정규화 xywh) → [M, 5] (class_id, x1, y1, x2, y2) 픽셀 좌표"""
+    if not label_path.exists():
+        return np.zeros((0, 5), dtype=np.float32)
+
+    rows = np.loadtxt(label_path, dtype=np.float32, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0, 5), dtype=np.float32)
+
+    boxes = xywh2xyxy(rows[:, 1:5]) * np.array([w, h, w, h], dtype=np.float32)
+    return np.concatenate([rows[:, :1], boxes], 1)
+
+
+def create_session(onnx_path: str, intra_threads: int = 0):
+    """CPU ONNX Runtime 세션 생성"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = intra_threads
+    return ort.InferenceSession(
+        onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+
+def model_input_info(session):
+    """
+    Returns:
+        tuple: (입력 이름, imgsz, 고정 배치 크기 또는 None(동적))
+    """
+    inp = session.get_inputs()[0]
+    batch_dim = inp.shape[0] if isinstance(inp.shape[0], int) else None
+    return inp.name, int(inp.shape[2]), batch_dim
+
+
+def run_inference(session, images: list, batch: int = 8):
+    """
+    이미지 목록 추론 (모델이 고정 배치면 그 크기에 맞춰 실행)
+
+    Returns:
+        tuple: (raw outputs [N, 4 + nc, A], letterbox params [N, 3])
+    """
+    name, imgsz, fixed_batch = model_input_info(session)
+    step = fixed_batch or batch
+
+    outputs, params = [], []
+    for start in range(0, len(images), step):
+        chunk = images[start : start + step]
+        tensor, p = preprocess_batch(chunk, imgsz)
+        if fixed_batch and len(chunk) < fixed_batch:  # 마지막 배치 패딩
+            pad = np.zeros((fixed_batch - len(chunk),) + tensor.shape[1:], tensor.dtype)
+            tensor = np.concatenate([tensor, pad])
+        out = session.run(None, {name: tensor})[0][: len(chunk)]
+        outputs.append(out)
+        params.append(p)
+
+    return np.concatenate(outputs), np.concatenate(params)
+
+
+_worker = {}
+
+
+def _init_worker(onnx_path: str, intra_threads: int):
+    _worker["session"] = create_session(onnx_path, intra_threads)
+
+
+def _evaluate_chunk(args):
+    """워커: 이미지 묶음을 추론하고 매칭 통계(tp, conf, pred_cls, target_cls)를 반환"""
+    image_paths, label_paths, batch, conf, iou = args
+    session = _worker["session"]
+
+    images = [cv2.imread(str(p)) for p in image_paths]
+    shapes = [img.shape[:2] for img in images]
+    raw, params = run_inference(session, images, batch)
+    detections = decode_output(raw, params, shapes, conf, iou)
+
+    return [
+        image_stats(det, load_labels(label_path, w, h))
+        for det, label_path, (h, w) in zip(detections, label_paths, shapes)
+    ]
+
+
+def evaluate_onnx(
+    onnx_path: str,
+    data_yaml: str,
+    batch: int = 8,
+    workers: int = None,
+    conf: float = 0.001,
+    iou: float = 0.7,
+    split: str = "val",
+    chunk_size: int = 64,
+) -> dict:
+    """
+    ONNX 모델 mAP 평가
+
+    Args:
+        onnx_path: 평가할 .onnx 경로
+        data_yaml: data.yaml 경로
+        batch: 추론 배치 크기 (동적 배치 모델일 때만 적용)
+        workers: 프로세스 수 (기본: CPU 코어 수 // 2)
+        conf / iou: NMS 신뢰도·IoU 임계값 (ultralytics val 기본값과 동일)
+
+    Returns:
+        dict: mAP50, mAP50-95, precision, recall, per_class, images, seconds
+    """
+    image_paths, label_paths, class_names = load_dataset(data_yaml, split)
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    intra_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    print(f"\nEvaluating ONNX model: {onnx_path}")
+    print(f"  Images: {len(image_paths)}")
+    print(f"  Workers: {workers} (intra-op threads: {intra_threads})")
+
+    tasks = [
+        (
+            image_paths[i : i + chunk_size],
+            label_paths[i : i + chunk_size],
+            batch,
+            conf,
+            iou,
+        )
+        for i in range(0, len(image_paths), chunk_size)
+    ]
+
+    start = time.perf_counter()
+    stats = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(onnx_path), intra_threads),
+    ) as pool:
+        for chunk_stats in pool.map(_evaluate_chunk, tasks):
+            stats.extend(chunk_stats)
+    elapsed = time.perf_counter() - start
+
+    metrics = summarize(stats, class_names)
+    metrics["images"] = len(image_paths)
+    metrics["seconds"] = elapsed
+
+    print_metrics(metrics)
+    return metrics
+
+
+def summarize(stats: list, class_names: list) -> dict:
+    """
+    이미지별 매칭 통계를 전체 메트릭으로 집계
+
+    Returns:
+        dict: mAP50, mAP50-95, precision, recall, per_class
+    """
+    tp, confs, pred_cls, target_cls = (np.concatenate(x, 0) for x in zip(*stats))
+    result = ap_per_class(tp, confs, pred_cls, target_cls, len(class_names))
+    ap, present = result["ap"], result["counts"] > 0
+
+    return {
+        "mAP50": float(ap[present, 0].mean()) if present.any() else 0.0,
+        "mAP50-95": float(ap[present].mean()) if present.any() else 0.0,
+        "precision": (
+            float(result["precision"][present].mean()) if present.any() else 0.0
+        ),
+        "recall": float(result["recall"][present].mean()) if present.any() else 0.0,
+        "per_class": {
+            name: {
+                "instances": int(result["counts"][c]),
+                "precision": float(result["precision"][c]),
+                "recall": float(result["recall"][c]),
+                "mAP50": float(ap[c, 0]),
+                "mAP50-95": float(ap[c].mean()),
+            }
+            for c, name in enumerate(class_names)
+        },
+    }
+
+
+def print_metrics(metrics: dict):
+    """평가 결과 표 출력"""
+    print(
+        f"\n  {'Class':16s} {'Inst':>6s} {'P':>7s} {'R':>7s} {'mAP50':>7s} {'mAP50-95':>9s}"
+    )
+    for name, m in metrics["per_class"].items():
+        print(
+            f"  {name:16s} {m['instances']:6d} {m['precision']:7.4f} {m['recall']:7.4f} "
+            f"{m['mAP50']:7.4f} {m['mAP50-95']:9.4f}"
+        )
+    print(
+        f"  {'all':16s} {sum(m['instances'] for m in metrics['per_class'].values()):6d} "
+        f"{metrics['precision']:7.4f} {metrics['recall']:7.4f} "
+        f"{metrics['mAP50']:7.4f} {metrics['mAP50-95']:9.4f}"
+    )
+    print(
+        f"\n  {metrics['images']} images in {metrics['seconds']:.1f}s "
+        f"({metrics['images'] / max(metrics['seconds'], 1e-9):.1f} img/s)"
+    )
+
+
+def compare_with_ultralytics(
+    metrics: dict,
+    pt_path: str,
+    data_yaml: str,
+    imgsz: int = 640,
+    tolerance: float = 0.01,
+) -> bool:
+    """
+    동일 모델의 .pt를 ultralytics로 평가하여 결과 비교 (ultralytics 설치 필요)
+
+    ultralytics val은 rect 배치(최소 패딩)를 사용하므로 정사각 Letterbox 평가와
+    소폭 차이가 날 수 있습니다.
+    """
+    from ultralytics import YOLO
+
+    results = YOLO(pt_path).val(data=data_yaml, imgsz=imgsz, verbose=False, plots=False)
+    reference = {"mAP50": float(results.box.map50), "mAP50-95": float(results.box.map)}
+
+    print(f"\nComparison with ultralytics ({pt_path}):")
+    ok = True
+    for key, ref in reference.items():
+        delta = metrics[key] - ref
+        within = abs(delta) <= tolerance
+        ok &= within
+        print(
+            f"  {key:9s} onnx={metrics[key]:.4f} ultralytics={ref:.4f} "
+            f"delta={delta:+.4f} {'OK' if within else 'MISMATCH'}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evaluate an exported ONNX model (mAP50 / mAP50-95)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--split", type=str, default="val", help="평가할 split (data.yaml 키)"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=8, help="추론 배치 크기 (동적 배치 모델만 적용)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="프로세스 수 (기본: 코어 수 // 2)"
+    )
+    parser.add_argument(
+        "--conf", type=float, default=0.001, help="NMS confidence threshold"
+    )
+    parser.add_argument("--iou", type=float, default=0.7, help="NMS IoU threshold")
+    parser.add_argument(
+        "--compare-pt",
+        type=str,
+        default=None,
+        help="동일 모델 .pt 경로 (ultralytics 결과와 비교)",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01, help="ultralytics 비교 허용 오차"
+    )
+
+    args = parser.parse_args()
+
+    metrics = evaluate_onnx(
+        args.model,
+        args.data,
+        batch=args.batch,
+        workers=args.workers,
+        conf=args.conf,
+        iou=args.iou,
+        split=args.split,
+    )
+
+    if args.compare_pt:
+        session = create_session(args.model)
+        imgsz = model_input_info(session)[1]
+        if not compare_with_ultralytics(
+            metrics, args.compare_pt, args.data, imgsz, args.tolerance
+        ):
+            raise SystemExit(1)
@@ -0,0 +1,245 @@
+"""
+다중 해상도 × 정밀도 내보내기 매트릭스 + 정확도/지연 파레토 리포트
+
+학습된 .pt를 여러 입력 크기(imgsz)와 FP32/INT8로 내보내고, 각각의 mAP와 CPU 지연을 측정합니다.
+컨베이어 위 계란은 화면에서 크게 보이므로 640보다 작은 입력에서도 정확도 손실이 거의 없을 수 있습니다.
+정확도 하한을 만족하는 가장 빠른 구성을 추천합니다.
+
+결과 (runs/export_matrix/<모델 이름>_<.pt 해시>/ — 재학습한 가중치는 새 디렉토리에 내보냄):
+    <모델 이름>_<imgsz>.onnx, <모델 이름>_<imgsz>_int8.onnx
+    report.json   전체 측정 결과 + 추천 구성
+    report.md     파레토 표 (지연 오름차순)
+
+※ 앱(YoloDetector.cs)은 입력 크기 640이 고정이므로 다른 imgsz 모델을 배포하려면
+  앱이 모델 입력 크기를 읽도록 바꿔야 합니다.
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+
+from evaluate_onnx import evaluate_onnx
+from export_onnx import export_to_onnx, measure_latency, quantize_int8
+from prediction_cache import model_hash
+
+
+def build_matrix(
+    pt_path: str,
+    data_yaml: str = "../data/data.yaml",
+    sizes=(320, 416, 512, 640),
+    precisions=("fp32", "int8"),
+    output_dir: str = None,
+    calib_samples: int = 300,
+    latency_runs: int = 50,
+) -> tuple:
+    """
+    imgsz × 정밀도 조합별 내보내기 + mAP / CPU 지연 / 크기 측정
+
+    같은 .pt(내용 해시 기준)로 이미 내보낸 파일이 있으면 재사용합니다 (측정만 다시 수행).
+
+    Returns:
+        tuple: (조합별 결과 list[dict], 결과 디렉토리)
+    """
+    pt_path = Path(pt_path)
+    output_dir = Path(
+        output_dir
+        or Path("runs/export_matrix") / f"{pt_path.stem}_{model_hash(pt_path)[:12]}"
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    for imgsz in sizes:
+        fp32_path = output_dir / f"{pt_path.stem}_{imgsz}.onnx"
+        if fp32_path.exists():
+            print(f"\nReusing exported model: {fp32_path}")
+        else:
+            export_to_onnx(
+                str(pt_path),
+                output_dir=str(output_dir),
+                output_name=fp32_path.name,
+                imgsz=imgsz,
+            )
+
+        for precision in precisions:
+            path = fp32_path
+            if precision == "int8":
+                path = fp32_path.with_name(f"{fp32_path.stem}_int8.onnx")
+                if path.exists():
+                    print(f"Reusing quantized model: {path}")
+                else:
+                    quantize_int8(fp32_path, data_yaml, calib_samples, path)
+
+            print(f"\nEvaluating {path.name} ...")
+            metrics = evaluate_onnx(str(path), data_yaml)
+            rows.append(
+                {
+                    "imgsz": imgsz,
+                    "precision": precision,
+                    "model": str(path),
+                    "mAP50": metrics["mAP50"],
+                    "mAP50-95": metrics["mAP50-95"],
+                    "latency_ms": measure_latency(path, runs=latency_runs),
+                    "size_mb": os.path.getsize(path) / (1024 * 1024),
+                }
+            )
+    return rows, output_dir
+
+
+def pareto_front(rows: list, metric: str = "mAP50") -> list:
+    """
+    지연-정확도 파레토 최적 여부 표시
+
+    다른 구성보다 느리면서 정확도도 같거나 낮으면 파레토 최적이 아닙니다.
+    """
+    for row in rows:
+        row["pareto"] = not any(
+            other["latency_ms"] <= row["latency_ms"]
+            and other[metric] >= row[metric]
+            and (other["latency_ms"] < row["latency_ms"] or other[metric] > row[metric])
+            for other in rows
+        )
+    return sorted(rows, key=lambda r: r["latency_ms"])
+
+
+def recommend(
+    rows: list, metric: str = "mAP50", floor: float = None, max_drop: float = None
+):
+    """
+    정확도 하한을 만족하는 가장 빠른 구성
+
+    Args:
+        floor: 절대 하한 (예: 0.95)
+        max_drop: 기준(가장 큰 imgsz의 FP32) 대비 허용 하락폭 (예: 0.01)
+                  floor와 함께 지정하면 둘 중 높은 값을 하한으로 사용
+
+    Returns:
+        tuple: (추천 구성 dict 또는 None, 적용한 하한)
+    """
+    reference = max(
+        (r for r in rows if r["precision"] == "fp32"),
+        key=lambda r: r["imgsz"],
+        default=None,
+    )
+    limits = []
+    if floor is not None:
+        limits.append(floor)
+    if max_drop is not None and reference is not None:
+        limits.append(reference[metric] - max_drop)
+    threshold = max(limits) if limits else 0.0
+
+    eligible = [r for r in rows if r[metric] >= threshold]
+    best = min(eligible, key=lambda r: r["latency_ms"]) if eligible else None
+    return best, threshold
+
+
+def write_report(
+    rows: list, best, threshold: float, metric: str, output_dir: Path
+) -> Path:
+    """파레토 표(report.md) + 전체 결과(report.json) 저장"""
+    lines = [
+        "| imgsz | precision | mAP50 | mAP50-95 | latency (ms) | size (MB) | pareto |",
+        "|------:|-----------|------:|---------:|-------------:|----------:|:------:|",
+    ]
+    for r in rows:
+        mark = "★" if r["pareto"] else ""
+        if r is best:
+            mark += " ✅"
+        lines.append(
+            f"| {r['imgsz']} | {r['precision']} | {r['mAP50']:.4f} | {r['mAP50-95']:.4f} "
+            f"| {r['latency_ms']:.2f} | {r['size_mb']:.2f} | {mark} |"
+        )
+    if best:
+        lines.append(
+            f"\nRecommended: **{best['imgsz']} {best['precision']}** "
+            f"(fastest with {metric} >= {threshold:.4f})"
+        )
+    else:
+        lines.append(f"\nNo configuration meets {metric} >= {threshold:.4f}")
+
+    md_path = output_dir / "report.md"
+    md_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    with open(output_dir / "report.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "metric": metric,
+                "threshold": threshold,
+                "recommended": best,
+                "results": rows,
+            },
+            f,
+            indent=2,
+        )
+    return md_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export a checkpoint at several input sizes / precisions and report the accuracy-latency Pareto front"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier_best.pt",
+        help="Path to trained .pt model",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[320, 416, 512, 640],
+        help="내보낼 입력 크기 목록",
+    )
+    parser.add_argument(
+        "--precisions",
+        type=str,
+        nargs="+",
+        choices=["fp32", "int8"],
+        default=["fp32", "int8"],
+        help="내보낼 정밀도",
+    )
+    parser.add_argument(
+        "--metric",
+        type=str,
+        choices=["mAP50", "mAP50-95"],
+        default="mAP50",
+        help="정확도 기준 지표",
+    )
+    parser.add_argument(
+        "--floor", type=float, default=None, help="정확도 절대 하한 (예: 0.95)"
+    )
+    parser.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.01,
+        help="가장 큰 imgsz FP32 대비 허용 정확도 하락폭",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="결과 디렉토리 (기본: runs/export_matrix/<모델 이름>_<.pt 해시>, 지정 시 기존 파일을 그대로 재사용)",
+    )
+    parser.add_argument(
+        "--calib-samples", type=int, default=300, help="INT8 캘리브레이션 이미지 수"
+    )
+
+    args = parser.parse_args()
+
+    rows, output_dir = build_matrix(
+        args.model,
+        args.data,
+        sizes=args.sizes,
+        precisions=args.precisions,
+        output_dir=args.output,
+        calib_samples=args.calib_samples,
+    )
+    rows = pareto_front(rows, args.metric)
+    best, threshold = recommend(rows, args.metric, args.floor, args.max_drop)
+    md_path = write_report(rows, best, threshold, args.metric, output_dir)
+
+    print(f"\n{md_path.read_text(encoding='utf-8')}")
+    print(f"Saved report: {md_path}")
@@ -2,7 +2,6 @@
 YOLOv8 모델 ONNX 내보내기 스크립트
 """
 
-from ultralytics import YOLO
 from pathlib import Path
 import argparse
 import shutil
@@ -15,7 +14,18 @@ def export_to_onnx(
     imgsz: int = 640,
     simplify: bool = True,
     opset: int = 12,
-    half: bool = False
+    half: bool = False,
+    batch: int = 1,
+    dynamic_batch: bool = False,
+    int8: bool = False,
+    fuse_preprocess: bool = False,
+    embed_nms: bool = False,
+    offline_optimize: str = None,
+    parity: bool = False,
+    parity_threshold: float = 0.95,
+    parity_samples: int = 50,
+    data_yaml: str = '../data/data.yaml',
+    calib_samples: int = 300
 ):
     """
     YOLOv8 모델을 ONNX 포맷으로 내보내기
@@ -27,7 +37,23 @@ def export_to_onnx(
         simplify: ONNX 모델 단순화 여부
         opset: ONNX opset 버전
         half: FP16 반정밀도 사용 여부
+        batch: 고정 배치 크기 (기본 1)
+        dynamic_batch: 배치 축만 동적으로 내보내기 (공간 크기는 imgsz로 고정)
+        int8: FP32 모델을 INT8 정적 양자화한 모델(<이름>_int8.onnx)도 함께 생성
+        fuse_preprocess: 전처리를 그래프에 포함해 uint8 NHWC BGR 입력을 받는 모델(<이름>_nhwc.onnx)도 함께 생성
+        embed_nms: 디코딩·신뢰도 필터·NMS를 그래프에 포함한 모델(<이름>_nms.onnx)도 함께 생성
+        offline_optimize: 'onnx' 또는 'ort' — 현재 CPU 기준으로 그래프 최적화를 미리 적용한 모델도 함께 생성
+        parity: 검증 이미지로 .pt와 최종 ONNX 모델의 출력·탐지 일치도 확인 (미달 시 내보낸 파일 삭제 후 RuntimeError)
+        parity_threshold: 클래스별 탐지 일치도 하한
+        parity_samples: 일치도 확인에 사용할 검증 이미지 수 (클래스 층화 샘플링)
+        data_yaml: INT8 캘리브레이션·비교 평가·전처리/NMS 동등성 검증에 사용할 data.yaml
+        calib_samples: INT8 캘리브레이션 이미지 수
+
+    Returns:
+        Path: 최종 모델 경로 (int8=True면 INT8 모델 경로)
     """
+    from ultralytics import YOLO  # --onnx 검증/벤치마크만 할 때는 torch 로드 불필요
+
     print(f"Loading model: {model_path}")
     model = YOLO(model_path)
 
@@ -36,6 +62,7 @@ def export_to_onnx(
     print(f"  Simplify: {simplify}")
     print(f"  Opset: {opset}")
     print(f"  Half precision: {half}")
+    print(f"  Batch: {'dynamic' if dynamic_batch else batch}")
 
     # ONNX 내보내기
     export_path = model.export(
@@ -44,9 +71,14 @@ def export_to_onnx(
         simplify=simplify,
         opset=opset,
         half=half,
-        dynamic=False,  # 고정 입력 크기 (추론 속도 향상)
+        batch=batch,
+        dynamic=dynamic_batch,  # 기본은 고정 입력 크기 (추론 속도 향상)
     )
 
+    # ultralytics의 dynamic은 배치·공간 축을 모두 동적으로 만들므로 공간 축은 다시 고정
+    if dynamic_batch:
+        _fix_spatial_dims(export_path, imgsz)
+
     print(f"\nExported to: {export_path}")
 
     # 출력 디렉토리로 복사
@@ -72,11 +104,997 @@ def export_to_onnx(
     file_size = os.path.getsize(final_path) / (1024 * 1024)
     print(f"\nModel size: {file_size:.2f} MB")
 
+    written = [final_path]
+    if int8:
+        int8_path = quantize_int8(final_path, data_yaml, calib_samples)
+        compare_models(final_path, int8_path, data_yaml)
+        final_path = int8_path
+        written.append(int8_path)
+
+    # FP16 / INT8 변환 후의 최종 모델 기준으로 확인
+    if parity:
+        ok, _ = check_parity(model_path, final_path, data_yaml, parity_samples,
+                             min_agreement=parity_threshold)
+        if not ok:
+            # 앱이 불러가는 배포 경로에 불합격 모델을 남기지 않음
+            for path in written:
+                Path(path).unlink(missing_ok=True)
+            print(f"  Removed rejected model(s): {', '.join(Path(p).name for p in written)}")
+            raise RuntimeError(f"PyTorch/ONNX parity below {parity_threshold:.2f}: {final_path}")
+
+    if fuse_preprocess:
+        fused_path = fuse_preprocessing(final_path)
+        compare_fused_preprocessing(final_path, fused_path, data_yaml)
+
+    if embed_nms:
+        nms_path = embed_nms_postprocess(final_path)
+        compare_embedded_nms(final_path, nms_path, data_yaml)
+
+    if offline_optimize:
+        optimized_path = save_optimized_model(final_path, fmt=offline_optimize)
+        compare_startup(final_path, optimized_path)
+
     return final_path
 
 
-def verify_onnx(onnx_path: str, imgsz: int = 640):
-    """ONNX 모델 검증"""
+def _fix_spatial_dims(onnx_path, imgsz: int):
+    """입력 H/W와 출력 앵커 축을 고정값으로 되돌리고 배치 축만 동적으로 유지"""
+    import onnx
+
+    model = onnx.load(str(onnx_path))
+    num_anchors = sum((imgsz // stride) ** 2 for stride in (8, 16, 32))
+
+    input_dims = model.graph.input[0].type.tensor_type.shape.dim
+    input_dims[0].dim_param = 'batch'
+    for axis in (2, 3):
+        input_dims[axis].dim_value = imgsz
+
+    output_dims = model.graph.output[0].type.tensor_type.shape.dim
+    output_dims[0].dim_param = 'batch'
+    if len(output_dims) == 3:
+        output_dims[2].dim_value = num_anchors
+
+    onnx.save(model, str(onnx_path))
+
+
+def stratified_calibration_images(data_yaml: str, num_samples: int = 300, seed: int = 0):
+    """
+    클래스 층화 캘리브레이션 이미지 샘플링
+
+    각 검증 이미지를 포함된 클래스 중 가장 드문 클래스에 배정한 뒤 클래스별로 균등하게 뽑아
+    소수 클래스(외형이상 등)도 활성값 범위 추정에 반영되도록 합니다.
+    """
+    import random
+    from collections import Counter
+    from evaluate_onnx import load_dataset
+
+    image_paths, label_paths, class_names = load_dataset(data_yaml, 'val')
+
+    image_classes = []
+    for label_path in label_paths:
+        classes = set()
+        if label_path.exists():
+            with open(label_path, 'r') as f:
+                classes = {int(line.split()[0]) for line in f if line.strip()}
+        image_classes.append(classes)
+
+    frequency = Counter(c for classes in image_classes for c in classes)
+    groups = {c: [] for c in range(len(class_names))}
+    unlabeled = []
+    for path, classes in zip(image_paths, image_classes):
+        if classes:
+            groups[min(classes, key=lambda c: frequency[c])].append(path)
+        else:
+            unlabeled.append(path)
+
+    rng = random.Random(seed)
+    per_class = max(1, num_samples // len(class_names))
+    selected = []
+    for paths in groups.values():
+        selected += rng.sample(paths, min(per_class, len(paths)))
+
+    # 부족분은 나머지 이미지에서 무작위로 채움
+    remaining = [p for p in image_paths if p not in set(selected)]
+    selected += rng.sample(remaining, min(num_samples - len(selected), len(remaining)))
+    return selected
+
+
+def _head_nodes_to_exclude(onnx_path: str):
+    """
+    양자화 제외 노드: Detect 헤드의 Conv(cv2/cv3)를 제외한 디코딩 부분
+
+    DFL softmax, 앵커 덧셈/스트라이드 곱, sigmoid, concat은 출력 좌표·점수에 직접 영향을 주므로
+    FP32로 유지합니다 (INT8로 두면 박스 좌표가 양자화 스텝만큼 흔들림).
+    """
+    import onnx
+    import re
+
+    model = onnx.load(onnx_path)
+    layer_ids = [int(m.group(1)) for n in model.graph.node
+                 if (m := re.match(r'/model\.(\d+)/', n.name))]
+    head = f'/model.{max(layer_ids)}/'
+
+    return [n.name for n in model.graph.node
+            if n.name.startswith(head) and '/cv2.' not in n.name and '/cv3.' not in n.name]
+
+
+def quantize_int8(
+    fp32_path,
+    data_yaml: str = '../data/data.yaml',
+    calib_samples: int = 300,
+    output_path=None,
+    per_channel: bool = True
+):
+    """
+    INT8 정적 양자화 (QDQ 포맷, 가중치 채널별 양자화)
+
+    캘리브레이션 이미지는 앱과 동일한 Letterbox(114 패딩) → RGB → /255 전처리를 거칩니다.
+
+    Returns:
+        Path: INT8 모델 경로 (기본: <FP32 이름>_int8.onnx)
+    """
+    import tempfile
+    import cv2
+    import onnx
+    import onnxruntime as ort
+    from onnx import version_converter
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    from evaluate_onnx import preprocess_batch
+
+    fp32_path = Path(fp32_path)
+    output_path = Path(output_path or fp32_path.with_name(f"{fp32_path.stem}_int8.onnx"))
+
+    session = ort.InferenceSession(str(fp32_path), providers=['CPUExecutionProvider'])
+    inp = session.get_inputs()[0]
+    input_name, imgsz = inp.name, int(inp.shape[2])
+    batch = inp.shape[0] if isinstance(inp.shape[0], int) else 1
+    del session
+
+    images = stratified_calibration_images(data_yaml, calib_samples)
+    print(f"\nQuantizing to INT8 (QDQ, per-channel={per_channel})")
+    print(f"  Calibration images: {len(images)} (stratified by class)")
+
+    class LetterboxCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            # 고정 배치 모델은 배치 크기 단위로 공급 (남는 이미지는 버림)
+            self.chunks = iter([images[i:i + batch]
+                                for i in range(0, len(images) - batch + 1, batch)])
+
+        def get_next(self):
+            paths = next(self.chunks, None)
+            if paths is None:
+                return None
+            tensor, _ = preprocess_batch([cv2.imread(str(p)) for p in paths], imgsz)
+            return {input_name: tensor}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 심볼릭 shape 추론 + 그래프 정리 (양자화 권장 전처리)
+        prepared = Path(tmp) / 'prepared.onnx'
+        quant_pre_process(str(fp32_path), str(prepared), skip_symbolic_shape=False)
+
+        # 채널별 QDQ(DequantizeLinear axis 속성)는 opset 13 이상 필요
+        model = onnx.load(str(prepared))
+        opset = next(o.version for o in model.opset_import if o.domain in ('', 'ai.onnx'))
+        if opset < 13:
+            print(f"  Upgrading opset {opset} -> 13 for per-channel QDQ")
+            onnx.save(version_converter.convert_version(model, 13), str(prepared))
+
+        quantize_static(
+            str(prepared),
+            str(output_path),
+            LetterboxCalibrationReader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=_head_nodes_to_exclude(str(prepared)),
+        )
+
+    print(f"INT8 model saved: {output_path}")
+    return output_path
+
+
+def measure_latency(onnx_path, runs: int = 50, warmup: int = 5):
+    """CPU 추론 지연 (ms, 중앙값) — 고정 배치 모델은 배치 1회 기준"""
+    import time
+    import onnxruntime as ort
+    import numpy as np
+
+    session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    inp = session.get_inputs()[0]
+    batch = inp.shape[0] if isinstance(inp.shape[0], int) else 1
+    dummy = np.random.rand(batch, 3, inp.shape[2], inp.shape[3]).astype(np.float32)
+
+    for _ in range(warmup):
+        session.run(None, {inp.name: dummy})
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        session.run(None, {inp.name: dummy})
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(timings))
+
+
+def compare_models(reference_path, candidate_path, data_yaml: str = '../data/data.yaml'):
+    """
+    두 ONNX 모델의 mAP / CPU 지연 / 파일 크기 비교 (예: FP32 vs INT8)
+
+    Returns:
+        dict: {'reference': {...}, 'candidate': {...}}
+    """
+    import os
+    from evaluate_onnx import evaluate_onnx
+
+    report = {}
+    for label, path in (('reference', reference_path), ('candidate', candidate_path)):
+        metrics = evaluate_onnx(str(path), data_yaml)
+        report[label] = {
+            'model': str(path),
+            'mAP50': metrics['mAP50'],
+            'mAP50-95': metrics['mAP50-95'],
+            'latency_ms': measure_latency(path),
+            'size_mb': os.path.getsize(path) / (1024 * 1024),
+        }
+
+    ref, cand = report['reference'], report['candidate']
+    print(f"\nComparison: {Path(cand['model']).name} vs {Path(ref['model']).name}")
+    print(f"  {'':12s} {'reference':>10s} {'candidate':>10s} {'delta':>10s}")
+    for key, fmt in (('mAP50', '.4f'), ('mAP50-95', '.4f'), ('latency_ms', '.2f'), ('size_mb', '.2f')):
+        delta = cand[key] - ref[key]
+        print(f"  {key:12s} {ref[key]:10{fmt}} {cand[key]:10{fmt}} {delta:+10{fmt}}")
+    print(f"  Speedup: {ref['latency_ms'] / cand['latency_ms']:.2f}x, "
+          f"size ratio: {cand['size_mb'] / ref['size_mb']:.2f}")
+
+    return report
+
+
+def check_parity(pt_path, onnx_path, data_yaml: str = '../data/data.yaml', num_images: int = 50,
+                 conf_threshold: float = 0.5, iou_threshold: float = 0.45,
+                 min_agreement: float = 0.95, match_iou: float = 0.5):
+    """
+    PyTorch(.pt)와 ONNX 모델의 동등성 확인 (동일 Letterbox 전처리, 실제 검증 이미지)
+
+    - 원시 출력 텐서: 박스(픽셀) / 클래스 점수 각각 최대·평균 절대 오차
+    - 최종 탐지(앱 방식 후처리): 클래스별로 같은 클래스·IoU >= match_iou인 탐지를 1:1 매칭하여
+      일치도 = 2 × 매칭 수 / (PyTorch 탐지 수 + ONNX 탐지 수)
+
+    Returns:
+        tuple: (모든 클래스 일치도 >= min_agreement 여부, 결과 dict)
+    """
+    import cv2
+    import numpy as np
+    import onnxruntime as ort
+    import torch
+    from ultralytics import YOLO
+    from evaluate_onnx import box_iou, candidate_boxes, load_dataset, preprocess_batch, select_detections
+
+    class_names = load_dataset(data_yaml, 'val')[2]
+    image_paths = stratified_calibration_images(data_yaml, num_images)
+
+    # 내보내기와 같은 Conv+BN 융합 FP32 모델
+    model = YOLO(str(pt_path)).model.float().fuse(verbose=False).eval()
+    session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    inp = session.get_inputs()[0]
+    imgsz = int(inp.shape[2])
+    batch = inp.shape[0] if isinstance(inp.shape[0], int) else 1
+    dtype = np.float16 if inp.type == 'tensor(float16)' else np.float32
+
+    def detect(pred):
+        boxes, scores = candidate_boxes(pred, (1.0, 0.0, 0.0), conf_threshold)
+        return select_detections(boxes, scores, (imgsz, imgsz), conf_threshold, iou_threshold,
+                                 multi_label=False, agnostic=True)
+
+    box_err, score_err = [], []
+    counts = np.zeros((len(class_names), 3), dtype=np.int64)  # pytorch, onnx, matched
+    for path in image_paths:
+        tensor = preprocess_batch([cv2.imread(str(path))] * batch, imgsz)[0]
+        with torch.no_grad():
+            reference = model(torch.from_numpy(tensor))[0][0].numpy()
+        output = session.run(None, {inp.name: tensor.astype(dtype)})[0][0].astype(np.float32)
+        if output.shape != reference.shape:  # [A, 4 + nc] 전치 출력 대응
+            output = output.T
+
+        diff = np.abs(output - reference)
+        box_err.append(diff[:4])
+        score_err.append(diff[4:])
+
+        det_ref, det_onnx = detect(reference), detect(output)
+        for c in range(len(class_names)):
+            a, b = det_ref[det_ref[:, 5] == c, :4], det_onnx[det_onnx[:, 5] == c, :4]
+            counts[c, 0] += len(a)
+            counts[c, 1] += len(b)
+            if len(a) and len(b):
+                # IoU 내림차순 탐욕 1:1 매칭
+                iou = box_iou(a, b)
+                while iou.size and iou.max() >= match_iou:
+                    i, j = np.unravel_index(iou.argmax(), iou.shape)
+                    counts[c, 2] += 1
+                    iou[i, :] = 0
+                    iou[:, j] = 0
+
+    box_err, score_err = np.concatenate(box_err, 1), np.concatenate(score_err, 1)
+    per_class = {}
+    for c, name in enumerate(class_names):
+        n_ref, n_onnx, matched = counts[c]
+        per_class[name] = {
+            'pytorch': int(n_ref),
+            'onnx': int(n_onnx),
+            'matched': int(matched),
+            'agreement': 2 * matched / (n_ref + n_onnx) if n_ref + n_onnx else None,
+        }
+    total = counts.sum(0)
+    report = {
+        'pt_model': str(pt_path),
+        'onnx_model': str(onnx_path),
+        'images': len(image_paths),
+        'box_max_abs_err': float(box_err.max()),
+        'box_mean_abs_err': float(box_err.mean()),
+        'score_max_abs_err': float(score_err.max()),
+        'score_mean_abs_err': float(score_err.mean()),
+        'agreement': 2 * total[2] / (total[0] + total[1]) if total[:2].sum() else 1.0,
+        'per_class': per_class,
+    }
+    ok = all(c['agreement'] is None or c['agreement'] >= min_agreement for c in per_class.values())
+
+    print(f"\nPyTorch vs ONNX parity ({len(image_paths)} val images, conf={conf_threshold}, "
+          f"iou={iou_threshold}):")
+    print(f"  Raw output abs error: boxes max {report['box_max_abs_err']:.4f} px / "
+          f"mean {report['box_mean_abs_err']:.2e}, "
+          f"scores max {report['score_max_abs_err']:.4f} / mean {report['score_mean_abs_err']:.2e}")
+    print(f"  {'Class':16s} {'PyTorch':>8s} {'ONNX':>8s} {'Matched':>8s} {'Agree':>7s}")
+    for name, c in per_class.items():
+        agreement = '-' if c['agreement'] is None else f"{c['agreement']:.4f}"
+        print(f"  {name:16s} {c['pytorch']:8d} {c['onnx']:8d} {c['matched']:8d} {agreement:>7s}")
+    print(f"  Overall agreement: {report['agreement']:.4f} "
+          f"({'OK' if ok else f'FAILED, min per-class {min_agreement:.2f}'})")
+
+    return ok, report
+
+
+def fuse_preprocessing(onnx_path, output_path=None):
+    """
+    전처리(BGR→RGB, /255, NHWC→NCHW)를 모델 그래프 앞단에 추가
+
+    Letterbox가 끝난 uint8 HxWx3 BGR 버퍼(OpenCV Mat)를 [N, H, W, 3] 입력으로 바로 받습니다.
+    Letterbox 자체는 그래프에 넣지 않습니다 (앱의 OpenCV 리사이즈와 보간 결과가 달라짐).
+
+    Returns:
+        Path: 전처리 포함 모델 경로 (기본: <이름>_nhwc.onnx)
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+    import numpy as np
+
+    onnx_path = Path(onnx_path)
+    output_path = Path(output_path or onnx_path.with_name(f"{onnx_path.stem}_nhwc.onnx"))
+
+    model = onnx.load(str(onnx_path))
+    graph = model.graph
+    original = graph.input[0]
+    elem_type = original.type.tensor_type.elem_type
+    n, c, h, w = [d.dim_param or d.dim_value for d in original.type.tensor_type.shape.dim]
+
+    # 기존 입력을 내부 텐서 이름으로 바꾸고, 새 uint8 입력이 같은 이름을 사용
+    input_name = original.name
+    float_name = f"{input_name}_nchw"
+    for node in graph.node:
+        node.input[:] = [float_name if x == input_name else x for x in node.input]
+
+    scale = numpy_helper.from_array(
+        np.array(255, dtype=helper.tensor_dtype_to_np_dtype(elem_type)), 'preprocess_scale')
+    channel_order = numpy_helper.from_array(np.array([2, 1, 0], dtype=np.int64), 'preprocess_rgb')
+    graph.initializer.extend([scale, channel_order])
+
+    # C# Preprocess와 같은 순서: float 변환 → /255 → 채널 분리(RGB) → CHW 배치
+    nodes = [
+        helper.make_node('Cast', [input_name], ['preprocess_float'], to=elem_type),
+        helper.make_node('Div', ['preprocess_float', 'preprocess_scale'], ['preprocess_scaled']),
+        helper.make_node('Gather', ['preprocess_scaled', 'preprocess_rgb'], ['preprocess_rgb_nhwc'],
+                         axis=3),
+        helper.make_node('Transpose', ['preprocess_rgb_nhwc'], [float_name], perm=[0, 3, 1, 2]),
+    ]
+    for i, node in enumerate(nodes):
+        graph.node.insert(i, node)
+
+    graph.input.remove(original)
+    graph.input.insert(0, helper.make_tensor_value_info(input_name, TensorProto.UINT8, [n, h, w, c]))
+
+    onnx.checker.check_model(model)
+    onnx.save(model, str(output_path))
+    print(f"\nFused preprocessing model saved: {output_path} (input uint8 [{n}, {h}, {w}, {c}] BGR)")
+    return output_path
+
+
+def compare_fused_preprocessing(reference_path, fused_path, data_yaml: str = '../data/data.yaml',
+                                num_images: int = 32, runs: int = 3):
+    """
+    전처리 포함 모델과 기존 float 입력 모델의 출력 동등성 검증 + 프레임당 지연 비교
+
+    검증 이미지(없으면 노이즈)를 Letterbox한 뒤
+    기존 경로는 Python 전처리 + 추론, 전처리 포함 모델은 uint8 버퍼를 그대로 추론합니다.
+
+    Returns:
+        dict: max_abs_diff, reference_ms, fused_ms
+    """
+    import time
+    import cv2
+    import numpy as np
+    import onnxruntime as ort
+    from evaluate_onnx import letterbox, load_dataset
+
+    reference = ort.InferenceSession(str(reference_path), providers=['CPUExecutionProvider'])
+    fused = ort.InferenceSession(str(fused_path), providers=['CPUExecutionProvider'])
+    ref_input, fused_input = reference.get_inputs()[0], fused.get_inputs()[0]
+    imgsz = int(ref_input.shape[2])
+    batch = ref_input.shape[0] if isinstance(ref_input.shape[0], int) else 1
+
+    try:
+        image_paths = load_dataset(data_yaml, 'val')[0][:num_images]
+        frames = [cv2.imread(str(p)) for p in image_paths]
+        source = f"{len(frames)} val images"
+    except (FileNotFoundError, OSError):
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(num_images)]
+        source = f"{len(frames)} noise frames"
+
+    def run_reference(frame):
+        canvas = letterbox(frame, imgsz)[0]
+        tensor = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+        tensor = np.ascontiguousarray(tensor.transpose(2, 0, 1)[None].repeat(batch, 0))
+        return reference.run(None, {ref_input.name: tensor})[0]
+
+    def run_fused(frame):
+        canvas = letterbox(frame, imgsz)[0]
+        return fused.run(None, {fused_input.name: canvas[None].repeat(batch, 0)})[0]
+
+    max_diff = 0.0
+    for frame in frames:
+        max_diff = max(max_diff, float(np.abs(run_reference(frame) - run_fused(frame)).max()))
+
+    timings = {}
+    for label, fn in (('reference', run_reference), ('fused', run_fused)):
+        fn(frames[0])  # warm-up
+        start = time.perf_counter()
+        for _ in range(runs):
+            for frame in frames:
+                fn(frame)
+        timings[label] = (time.perf_counter() - start) * 1000 / (runs * len(frames))
+
+    print(f"\nFused preprocessing check ({source}, letterbox + preprocess + inference):")
+    print(f"  Max abs output diff: {max_diff:.2e}")
+    print(f"  Per-frame latency: float input {timings['reference']:.2f} ms, "
+          f"uint8 input {timings['fused']:.2f} ms "
+          f"({timings['reference'] / timings['fused']:.2f}x)")
+
+    return {'max_abs_diff': max_diff, 'reference_ms': timings['reference'],
+            'fused_ms': timings['fused']}
+
+
+def embed_nms_postprocess(onnx_path, output_path=None, max_det: int = 300,
+                          conf_threshold: float = 0.5, iou_threshold: float = 0.45):
+    """
+    YOLOv8 출력 디코딩 + 신뢰도 필터 + NMS를 모델 그래프 뒤에 추가
+
+    앱 YoloDetector.Postprocess와 같은 방식입니다:
+    앵커별 최대 클래스(argmax) 점수로 필터링한 뒤 클래스 구분 없이 NMS를 적용합니다.
+
+    추가 입력 (권장 기본값은 모델 메타데이터 conf_threshold / iou_threshold에 기록):
+        conf_threshold: float [1] (앱 기본 0.5)
+        iou_threshold: float [1] (앱 기본 0.45)
+
+    출력:
+        detections: [N, 6] (x1, y1, x2, y2, conf, class_id) — Letterbox된 입력 이미지 좌표
+        batch_index: [N] 각 탐지가 속한 배치 인덱스 (배치 1이면 무시해도 됨)
+
+    Returns:
+        Path: NMS 포함 모델 경로 (기본: <이름>_nms.onnx)
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+    import numpy as np
+
+    onnx_path = Path(onnx_path)
+    output_path = Path(output_path or onnx_path.with_name(f"{onnx_path.stem}_nms.onnx"))
+
+    model = onnx.load(str(onnx_path))
+    graph = model.graph
+    opset = next(o.version for o in model.opset_import if o.domain in ('', 'ai.onnx'))
+    if opset < 11:
+        raise ValueError(f"opset {opset} is too old for NonMaxSuppression post-processing (need >= 11)")
+
+    raw = graph.output[0]
+    raw_name = raw.name
+    if raw.type.tensor_type.elem_type != TensorProto.FLOAT:
+        graph.node.append(helper.make_node('Cast', [raw_name], ['nms_raw'], to=TensorProto.FLOAT))
+        raw_name = 'nms_raw'
+
+    def const(name, value, dtype=np.int64):
+        graph.initializer.append(numpy_helper.from_array(np.array(value, dtype=dtype), name))
+        return name
+
+    def slice_(src, dst, start, end, axis):
+        graph.node.append(helper.make_node(
+            'Slice', [src, const(f"{dst}_starts", [start]), const(f"{dst}_ends", [end]),
+                      const(f"{dst}_axes", [axis])], [dst]))
+
+    def reduce_max(src, dst, axis, keepdims):
+        # opset 18부터 axes가 속성에서 입력으로 바뀜
+        if opset >= 18:
+            graph.node.append(helper.make_node(
+                'ReduceMax', [src, const(f"{dst}_axes", [axis])], [dst], keepdims=keepdims))
+        else:
+            graph.node.append(helper.make_node('ReduceMax', [src], [dst], axes=[axis],
+                                               keepdims=keepdims))
+
+    # 임계값은 실행 시 입력으로 받고, 기본값은 메타데이터로 남김
+    # (initializer로 기본값을 주면 ORT가 세션 생성마다 경고를 출력)
+    for name, value in (('conf_threshold', conf_threshold), ('iou_threshold', iou_threshold)):
+        graph.input.append(helper.make_tensor_value_info(name, TensorProto.FLOAT, [1]))
+        model.metadata_props.append(onnx.StringStringEntryProto(key=name, value=str(value)))
+
+    # [B, 4 + nc, A] → 박스 [B, A, 4] (cx, cy, w, h), 점수 [B, A], 클래스 [B, A]
+    slice_(raw_name, 'nms_xywh_t', 0, 4, 1)
+    graph.node.append(helper.make_node('Transpose', ['nms_xywh_t'], ['nms_xywh'], perm=[0, 2, 1]))
+    slice_(raw_name, 'nms_cls', 4, np.iinfo(np.int64).max, 1)
+    reduce_max('nms_cls', 'nms_score', 1, 0)
+    graph.node.append(helper.make_node('ArgMax', ['nms_cls'], ['nms_label'], axis=1, keepdims=0))
+
+    # 클래스 구분 없는 NMS: 점수를 단일 클래스 [B, 1, A]로 전달
+    graph.node.append(helper.make_node(
+        'Reshape', ['nms_score', const('nms_score_shape', [0, 1, -1])], ['nms_score_1']))
+    graph.node.append(helper.make_node(
+        'NonMaxSuppression',
+        ['nms_xywh', 'nms_score_1', const('nms_max_det', [max_det]), 'iou_threshold',
+         'conf_threshold'],
+        ['nms_selected'], center_point_box=1))
+
+    # selected [K, 3] = (batch, class, box) → (batch, box)로 후보 수집
+    graph.node.append(helper.make_node(
+        'Gather', ['nms_selected', const('nms_index_cols', [0, 2])], ['nms_index'], axis=1))
+    graph.node.append(helper.make_node(
+        'Gather', ['nms_selected', const('nms_batch_col', 0)], ['batch_index'], axis=1))
+    graph.node.append(helper.make_node('GatherND', ['nms_xywh', 'nms_index'], ['nms_det_xywh']))
+    graph.node.append(helper.make_node('GatherND', ['nms_score', 'nms_index'], ['nms_det_score']))
+    graph.node.append(helper.make_node('GatherND', ['nms_label', 'nms_index'], ['nms_det_label']))
+
+    # xywh → xyxy
+    slice_('nms_det_xywh', 'nms_det_xy', 0, 2, 1)
+    slice_('nms_det_xywh', 'nms_det_wh', 2, 4, 1)
+    graph.node.append(helper.make_node(
+        'Div', ['nms_det_wh', const('nms_two', 2.0, np.float32)], ['nms_det_half']))
+    graph.node.append(helper.make_node('Sub', ['nms_det_xy', 'nms_det_half'], ['nms_det_x1y1']))
+    graph.node.append(helper.make_node('Add', ['nms_det_xy', 'nms_det_half'], ['nms_det_x2y2']))
+
+    column = const('nms_column_shape', [-1, 1])
+    graph.node.append(helper.make_node('Reshape', ['nms_det_score', column], ['nms_det_conf']))
+    graph.node.append(helper.make_node('Cast', ['nms_det_label'], ['nms_det_label_f'],
+                                       to=TensorProto.FLOAT))
+    graph.node.append(helper.make_node('Reshape', ['nms_det_label_f', column], ['nms_det_cls']))
+    graph.node.append(helper.make_node(
+        'Concat', ['nms_det_x1y1', 'nms_det_x2y2', 'nms_det_conf', 'nms_det_cls'], ['detections'],
+        axis=1))
+
+    graph.output.remove(raw)
+    graph.output.extend([
+        helper.make_tensor_value_info('detections', TensorProto.FLOAT, ['num_detections', 6]),
+        helper.make_tensor_value_info('batch_index', TensorProto.INT64, ['num_detections']),
+    ])
+
+    onnx.checker.check_model(model)
+    onnx.save(model, str(output_path))
+    print(f"\nNMS model saved: {output_path} (output detections [N, 6], "
+          f"defaults conf={conf_threshold}, iou={iou_threshold})")
+    return output_path
+
+
+def compare_embedded_nms(reference_path, nms_path, data_yaml: str = '../data/data.yaml',
+                         conf_threshold: float = 0.5, iou_threshold: float = 0.45,
+                         num_images: int = 32, runs: int = 3):
+    """
+    NMS 포함 모델과 기존 모델 + Python 후처리(앱 방식)의 탐지 결과·지연 비교
+
+    두 경로 모두 Letterbox된 입력 좌표로 비교하며, 지연은 추론 + 후처리 기준입니다.
+
+    Returns:
+        dict: matched_images, max_box_diff, reference_ms, nms_ms
+    """
+    import time
+    import cv2
+    import numpy as np
+    import onnxruntime as ort
+    from evaluate_onnx import candidate_boxes, load_dataset, preprocess_batch, select_detections
+
+    reference = ort.InferenceSession(str(reference_path), providers=['CPUExecutionProvider'])
+    with_nms = ort.InferenceSession(str(nms_path), providers=['CPUExecutionProvider'])
+    inp = reference.get_inputs()[0]
+    imgsz = int(inp.shape[2])
+    batch = inp.shape[0] if isinstance(inp.shape[0], int) else 1
+    thresholds = {'conf_threshold': np.array([conf_threshold], dtype=np.float32),
+                  'iou_threshold': np.array([iou_threshold], dtype=np.float32)}
+
+    try:
+        image_paths = load_dataset(data_yaml, 'val')[0][:num_images]
+        frames = [cv2.imread(str(p)) for p in image_paths]
+        source = f"{len(frames)} val images"
+    except (FileNotFoundError, OSError):
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(num_images)]
+        source = f"{len(frames)} noise frames"
+    tensors = [preprocess_batch([frame] * batch, imgsz)[0] for frame in frames]
+    identity = (1.0, 0.0, 0.0)
+
+    def run_reference(tensor):
+        pred = reference.run(None, {inp.name: tensor})[0][0]
+        if pred.shape[0] > pred.shape[1]:  # [A, 4 + nc] 전치 출력 대응
+            pred = pred.T
+        boxes, scores = candidate_boxes(pred, identity, conf_threshold)
+        return select_detections(boxes, scores, (imgsz, imgsz), conf_threshold, iou_threshold,
+                                 multi_label=False, agnostic=True)
+
+    def run_nms(tensor):
+        detections, batch_index = with_nms.run(None, {inp.name: tensor, **thresholds})
+        return detections[batch_index == 0]
+
+    def ordered(det):
+        # 동점 점수(INT8에서 흔함)의 NMS 출력 순서 차이는 무시
+        return det[np.lexsort((det[:, 1], det[:, 0], -det[:, 4]))]
+
+    matched, max_diff = 0, 0.0
+    for tensor in tensors:
+        ref, det = ordered(run_reference(tensor)), ordered(run_nms(tensor))
+        if len(ref) == len(det) and np.array_equal(ref[:, 5], det[:, 5]):
+            matched += 1
+            if len(ref):
+                det[:, :4] = det[:, :4].clip(0, imgsz)
+                max_diff = max(max_diff, float(np.abs(ref[:, :5] - det[:, :5]).max()))
+
+    timings = {}
+    for label, fn in (('reference', run_reference), ('nms', run_nms)):
+        fn(tensors[0])  # warm-up
+        start = time.perf_counter()
+        for _ in range(runs):
+            for tensor in tensors:
+                fn(tensor)
+        timings[label] = (time.perf_counter() - start) * 1000 / (runs * len(tensors))
+
+    print(f"\nEmbedded NMS check ({source}, conf={conf_threshold}, iou={iou_threshold}):")
+    # INT8 모델은 점수가 같은 앵커가 많아 NMS가 다른 앵커를 고를 수 있음 (박스 차이로 나타남)
+    print(f"  Same detection count/classes: {matched}/{len(tensors)} images, "
+          f"max box/score diff {max_diff:.2e}")
+    print(f"  Per-frame latency: raw output + Python postprocess {timings['reference']:.2f} ms, "
+          f"embedded NMS {timings['nms']:.2f} ms "
+          f"({timings['reference'] / timings['nms']:.2f}x)")
+
+    return {'matched_images': matched, 'max_box_diff': max_diff,
+            'reference_ms': timings['reference'], 'nms_ms': timings['nms']}
+
+
+def save_optimized_model(onnx_path, output_path=None, fmt: str = 'onnx', level: str = 'all'):
+    """
+    ONNX Runtime 그래프 최적화를 미리 적용한 모델 저장 (오프라인 최적화)
+
+    앱은 실행할 때마다 ORT_ENABLE_ALL 최적화를 다시 수행합니다.
+    미리 최적화한 모델은 ORT_DISABLE_ALL로 로드하면 이 과정을 건너뜁니다.
+
+    Args:
+        fmt: 'onnx' (<이름>.opt.onnx) 또는 'ort' (<이름>.ort, ORT 포맷)
+        level: 'all'은 현재 CPU에 맞춘 레이아웃(NCHWc 등)까지 포함하므로 같은 CPU 계열에서만 사용,
+               'extended'는 하드웨어 독립적인 최적화만 적용
+
+    Returns:
+        Path: 최적화 모델 경로
+    """
+    import onnxruntime as ort
+
+    onnx_path = Path(onnx_path)
+    suffix = '.ort' if fmt == 'ort' else '.opt.onnx'
+    output_path = Path(output_path or onnx_path.with_name(onnx_path.stem + suffix))
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = {
+        'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[level]
+    options.optimized_model_filepath = str(output_path)
+    if fmt == 'ort':
+        options.add_session_config_entry('session.save_model_format', 'ORT')
+    ort.InferenceSession(str(onnx_path), sess_options=options, providers=['CPUExecutionProvider'])
+
+    print(f"\nOffline-optimized model saved: {output_path} (format={fmt}, level={level})")
+    if level == 'all':
+        print("  ※ Includes CPU-specific optimizations — generate on the target station's CPU")
+    return output_path
+
+
+def compare_startup(reference_path, optimized_path, runs: int = 5):
+    """
+    원본 모델(ORT_ENABLE_ALL로 로드)과 오프라인 최적화 모델(ORT_DISABLE_ALL로 로드)의
+    세션 생성 시간·첫 추론 지연 비교 (+ 출력 동등성)
+
+    Returns:
+        dict: {'reference': {...}, 'optimized': {...}, 'max_abs_diff': float}
+    """
+    import time
+    import numpy as np
+    import onnxruntime as ort
+
+    def load(path, level):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = level
+        return ort.InferenceSession(str(path), sess_options=options,
+                                    providers=['CPUExecutionProvider'])
+
+    variants = (
+        ('reference', reference_path, ort.GraphOptimizationLevel.ORT_ENABLE_ALL),
+        ('optimized', optimized_path, ort.GraphOptimizationLevel.ORT_DISABLE_ALL),
+    )
+
+    # ORT 전역 초기화 비용이 첫 측정에 섞이지 않도록 한 번 로드
+    session = load(reference_path, ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+    noise = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    feed = model_feeds(session, [noise])[0]
+
+    report, outputs = {}, {}
+    for label, path, level in variants:
+        create_ms, first_ms = [], []
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            session = load(path, level)
+            create_ms.append((time.perf_counter_ns() - start) / 1e6)
+            start = time.perf_counter_ns()
+            outputs[label] = session.run(None, feed)[0]
+            first_ms.append((time.perf_counter_ns() - start) / 1e6)
+        report[label] = {
+            'model': str(path),
+            'session_create_ms': float(np.median(create_ms)),
+            'first_inference_ms': float(np.median(first_ms)),
+        }
+    report['max_abs_diff'] = float(np.abs(outputs['reference'] - outputs['optimized']).max())
+
+    ref, opt = report['reference'], report['optimized']
+    print(f"\nStartup comparison (median of {runs} cold sessions):")
+    print(f"  {'':20s} {'create ms':>10s} {'first ms':>10s} {'total ms':>10s}")
+    for label in ('reference', 'optimized'):
+        r = report[label]
+        print(f"  {Path(r['model']).name:20s} {r['session_create_ms']:10.1f} "
+              f"{r['first_inference_ms']:10.1f} "
+              f"{r['session_create_ms'] + r['first_inference_ms']:10.1f}")
+    ref_total = ref['session_create_ms'] + ref['first_inference_ms']
+    opt_total = opt['session_create_ms'] + opt['first_inference_ms']
+    print(f"  Startup speedup: {ref_total / opt_total:.2f}x, "
+          f"max abs output diff {report['max_abs_diff']:.2e}")
+
+    return report
+
+
+def benchmark_batch_sizes(onnx_path: str, batch_sizes=(1, 2, 4, 8, 16), runs: int = 20,
+                          warmup: int = 3):
+    """
+    배치 크기별 CPU 처리량(images/s)과 이미지당 지연(ms) 측정
+
+    고정 배치 모델은 해당 배치 크기만 측정합니다.
+
+    Returns:
+        list[dict]: batch, batch_ms, per_image_ms, images_per_sec
+    """
+    import time
+    import onnxruntime as ort
+    import numpy as np
+
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    inp = session.get_inputs()[0]
+    if isinstance(inp.shape[0], int):
+        batch_sizes = (inp.shape[0],)
+
+    print(f"\nBatch benchmark (CPU, {runs} runs each):")
+    print(f"  {'batch':>5s} {'batch ms':>10s} {'ms/image':>10s} {'images/s':>10s}")
+
+    results = []
+    for batch in batch_sizes:
+        dummy = np.random.rand(batch, 3, inp.shape[2], inp.shape[3]).astype(np.float32)
+        for _ in range(warmup):
+            session.run(None, {inp.name: dummy})
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            session.run(None, {inp.name: dummy})
+            timings.append((time.perf_counter() - start) * 1000)
+
+        batch_ms = float(np.median(timings))
+        results.append({
+            'batch': batch,
+            'batch_ms': batch_ms,
+            'per_image_ms': batch_ms / batch,
+            'images_per_sec': batch * 1000 / batch_ms,
+        })
+        r = results[-1]
+        print(f"  {batch:5d} {batch_ms:10.2f} {r['per_image_ms']:10.2f} {r['images_per_sec']:10.1f}")
+
+    return results
+
+
+def model_feeds(session, frames):
+    """
+    프레임 목록 → 모델 입력 dict 목록
+
+    float NCHW 입력(기본), uint8 NHWC 입력(--fuse-preprocess),
+    임계값 입력(--embed-nms, 메타데이터 기본값 사용) 모델을 모두 지원합니다.
+    """
+    import numpy as np
+    from evaluate_onnx import letterbox, preprocess_batch
+
+    inputs = session.get_inputs()
+    image_input = inputs[0]
+    batch = image_input.shape[0] if isinstance(image_input.shape[0], int) else 1
+    metadata = session.get_modelmeta().custom_metadata_map
+    extras = {inp.name: np.array([float(metadata.get(inp.name, 0.5))], dtype=np.float32)
+              for inp in inputs[1:]}
+
+    feeds = []
+    if image_input.type == 'tensor(uint8)':
+        imgsz = int(image_input.shape[1])
+        for frame in frames:
+            canvas = letterbox(frame, imgsz)[0]
+            feeds.append({image_input.name: np.ascontiguousarray(canvas[None].repeat(batch, 0)),
+                          **extras})
+    else:
+        imgsz = int(image_input.shape[2])
+        dtype = np.float16 if image_input.type == 'tensor(float16)' else np.float32
+        for frame in frames:
+            tensor = preprocess_batch([frame] * batch, imgsz)[0].astype(dtype)
+            feeds.append({image_input.name: tensor, **extras})
+    return feeds
+
+
+def _peak_rss_mb():
+    """프로세스 최대 메모리 사용량 (MB) — Windows는 peak working set, 그 외는 ru_maxrss"""
+    import sys
+    import psutil
+
+    memory = psutil.Process().memory_info()
+    if hasattr(memory, 'peak_wset'):
+        return memory.peak_wset / (1024 * 1024)
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _profile_options(profile):
+    """tune_session 프로파일 → SessionOptions (프로파일 없으면 ORT 기본값)"""
+    if profile is None:
+        import onnxruntime as ort
+        return ort.SessionOptions()
+    from tune_session import session_options
+    return session_options(profile)
+
+
+def benchmark_onnx(onnx_path: str, data_yaml: str = '../data/data.yaml', iterations: int = 200,
+                   warmup: int = 20, num_images: int = 64, output_json=None,
+                   session_profile=None):
+    """
+    CPU 추론 지연 벤치마크 (운영 환경 기준)
+
+    - 세션 생성 시간, 첫 추론 시간 (콜드 스타트)
+    - 워밍업 후 iterations회 perf_counter_ns 측정 → p50 / p95 / p99 / max
+    - 입력: 노이즈 + 실제 검증 이미지 (data.yaml이 없으면 노이즈만)
+    - 프로세스 최대 RSS
+    - session_profile: tune_session.py 프로파일 JSON 지정 시 현재 호스트 프로파일로 세션 생성
+
+    Returns:
+        dict: 벤치마크 결과 (output_json 지정 시 JSON으로도 저장)
+    """
+    import json
+    import os
+    import platform
+    import time
+    import cv2
+    import numpy as np
+    import onnxruntime as ort
+    from evaluate_onnx import load_dataset
+    from prediction_cache import model_hash
+
+    rng = np.random.default_rng(0)
+    frame_sets = {'noise': [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+                            for _ in range(min(num_images, 16))]}
+    try:
+        image_paths = load_dataset(data_yaml, 'val')[0][:num_images]
+        frame_sets['val'] = [cv2.imread(str(p)) for p in image_paths]
+    except (FileNotFoundError, OSError):
+        print(f"  (data.yaml not found: {data_yaml} — benchmarking noise input only)")
+
+    import psutil
+    baseline_rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
+
+    profile = None
+    if session_profile:
+        from tune_session import load_session_profile
+        profile = load_session_profile(str(onnx_path), session_profile)
+        if profile is None:
+            print(f"  (no profile for this host in {session_profile} — using ORT defaults)")
+
+    start = time.perf_counter_ns()
+    session = ort.InferenceSession(str(onnx_path), sess_options=_profile_options(profile),
+                                   providers=['CPUExecutionProvider'])
+    session_create_ms = (time.perf_counter_ns() - start) / 1e6
+
+    feed_sets = {name: model_feeds(session, frames) for name, frames in frame_sets.items()}
+    first_feed = feed_sets.get('val', feed_sets['noise'])[0]
+    start = time.perf_counter_ns()
+    session.run(None, first_feed)
+    first_inference_ms = (time.perf_counter_ns() - start) / 1e6
+
+    report = {
+        'model': str(onnx_path),
+        'model_hash': model_hash(str(onnx_path)),
+        'input_shape': [d if isinstance(d, int) else str(d) for d in session.get_inputs()[0].shape],
+        'onnxruntime': ort.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'iterations': iterations,
+        'warmup': warmup,
+        'session_profile': profile,
+        'session_create_ms': session_create_ms,
+        'first_inference_ms': first_inference_ms,
+        'latency_ms': {},
+    }
+
+    for name, feeds in feed_sets.items():
+        for i in range(warmup):
+            session.run(None, feeds[i % len(feeds)])
+
+        timings = np.empty(iterations, dtype=np.int64)
+        for i in range(iterations):
+            feed = feeds[i % len(feeds)]
+            start = time.perf_counter_ns()
+            session.run(None, feed)
+            timings[i] = time.perf_counter_ns() - start
+
+        ms = timings / 1e6
+        report['latency_ms'][name] = {
+            'images': len(feeds),
+            'mean': float(ms.mean()),
+            'p50': float(np.percentile(ms, 50)),
+            'p95': float(np.percentile(ms, 95)),
+            'p99': float(np.percentile(ms, 99)),
+            'max': float(ms.max()),
+        }
+
+    # 최대 RSS는 프로세스 전체 기준이므로 세션 생성 전 RSS도 함께 기록
+    report['baseline_rss_mb'] = baseline_rss_mb
+    report['peak_rss_mb'] = _peak_rss_mb()
+
+    print(f"\nBenchmark (CPU, {warmup} warm-up + {iterations} iterations):")
+    print(f"  Session creation: {session_create_ms:.1f} ms, first inference: {first_inference_ms:.1f} ms")
+    print(f"  {'input':8s} {'mean':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}")
+    for name, stats in report['latency_ms'].items():
+        print(f"  {name:8s} " + ' '.join(f"{stats[k]:8.2f}" for k in ('mean', 'p50', 'p95', 'p99', 'max')))
+    print(f"  Peak RSS: {report['peak_rss_mb']:.1f} MB (before session: {baseline_rss_mb:.1f} MB)")
+
+    if output_json:
+        output_json = Path(output_json)
+        output_json.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"  Saved: {output_json}")
+
+    return report
+
+
+def verify_onnx(onnx_path: str, imgsz: int = 640, batch_sizes=(1, 2, 4, 8, 16),
+                benchmark: bool = False, data_yaml: str = '../data/data.yaml',
+                iterations: int = 200, warmup: int = 20, benchmark_json=None,
+                session_profile=None):
+    """ONNX 모델 검증 (+ 배치 크기별 CPU 처리량, benchmark=True면 지연 분포 벤치마크)"""
     import onnxruntime as ort
     import numpy as np
 
@@ -102,22 +1120,21 @@ def verify_onnx(onnx_path: str, imgsz: int = 640):
         print(f"  Shape: {out.shape}")
         print(f"  Type: {out.type}")
 
-    # 테스트 추론
+    # 테스트 추론 (지연 측정은 benchmark 모드에서)
     print(f"\nRunning test inference...")
-    dummy_input = np.random.randn(1, 3, imgsz, imgsz).astype(np.float32)
+    noise = np.random.randint(0, 256, (imgsz, imgsz, 3), dtype=np.uint8)
+    outputs = session.run(None, model_feeds(session, [noise])[0])
 
-    import time
-    start = time.time()
-    num_runs = 10
+    print(f"\nOutput shape: {outputs[0].shape}")
 
-    for _ in range(num_runs):
-        outputs = session.run(None, {inputs[0].name: dummy_input})
+    # 배치 처리량은 float NCHW 입력 모델만 측정
+    if batch_sizes and inputs[0].type == 'tensor(float)' and len(inputs) == 1:
+        benchmark_batch_sizes(onnx_path, batch_sizes)
 
-    elapsed = (time.time() - start) / num_runs * 1000
-    print(f"Average inference time: {elapsed:.2f} ms")
-    print(f"Estimated FPS: {1000/elapsed:.1f}")
+    if benchmark:
+        benchmark_onnx(onnx_path, data_yaml, iterations, warmup, output_json=benchmark_json,
+                       session_profile=session_profile)
 
-    print(f"\nOutput shape: {outputs[0].shape}")
     print("ONNX model verification successful!")
 
     return True
@@ -134,19 +1151,71 @@ if __name__ == '__main__':
     parser.add_argument('--no-simplify', action='store_true', help='Disable ONNX simplification')
     parser.add_argument('--opset', type=int, default=12, help='ONNX opset version')
     parser.add_argument('--half', action='store_true', help='Use FP16 half precision')
+    parser.add_argument('--batch', type=int, default=1, help='고정 배치 크기 (N>1 가능)')
+    parser.add_argument('--dynamic-batch', action='store_true',
+                        help='배치 축만 동적으로 내보내기 (공간 크기는 --imgsz로 고정)')
+    parser.add_argument('--int8', action='store_true',
+                        help='INT8 정적 양자화 모델(<이름>_int8.onnx) 추가 생성 + FP32 대비 비교')
+    parser.add_argument('--data', type=str, default='../data/data.yaml',
+                        help='INT8 캘리브레이션·평가, 전처리/NMS 동등성 검증용 data.yaml')
+    parser.add_argument('--calib-samples', type=int, default=300, help='INT8 캘리브레이션 이미지 수')
+    parser.add_argument('--fuse-preprocess', action='store_true',
+                        help='전처리 포함 uint8 NHWC BGR 입력 모델(<이름>_nhwc.onnx) 추가 생성 + 동등성 검증')
+    parser.add_argument('--embed-nms', action='store_true',
+                        help='디코딩·NMS 포함 모델(<이름>_nms.onnx, 출력 [N, 6]) 추가 생성 + 지연 비교')
+    parser.add_argument('--offline-optimize', type=str, choices=['onnx', 'ort'], default=None,
+                        help='현재 CPU 기준 오프라인 최적화 모델(<이름>.opt.onnx / <이름>.ort) 추가 생성 + 시작 시간 비교')
+    parser.add_argument('--parity', action='store_true',
+                        help='.pt 대비 ONNX 출력·탐지 일치도 확인, 기준 미달 시 실패 (종료 코드 1)')
+    parser.add_argument('--parity-threshold', type=float, default=0.95, help='클래스별 탐지 일치도 하한')
+    parser.add_argument('--parity-samples', type=int, default=50, help='일치도 확인 검증 이미지 수')
     parser.add_argument('--verify', action='store_true', help='Verify exported model')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='지연 분포 벤치마크 (워밍업, p50/p95/p99/max, 콜드 스타트, 최대 RSS)')
+    parser.add_argument('--iterations', type=int, default=200, help='벤치마크 반복 횟수')
+    parser.add_argument('--warmup', type=int, default=20, help='벤치마크 워밍업 횟수')
+    parser.add_argument('--benchmark-json', type=str, default=None,
+                        help='벤치마크 결과 JSON 경로 (모델 버전 간 비교용)')
+    parser.add_argument('--session-profile', type=str, default=None,
+                        help='벤치마크 세션에 적용할 tune_session.py 프로파일 JSON')
+    parser.add_argument('--onnx', type=str, default=None,
+                        help='내보내기 없이 기존 ONNX 모델만 검증/벤치마크')
 
     args = parser.parse_args()
 
-    onnx_path = export_to_onnx(
-        model_path=args.model,
-        output_dir=args.output,
-        output_name=args.name,
-        imgsz=args.imgsz,
-        simplify=not args.no_simplify,
-        opset=args.opset,
-        half=args.half
-    )
+    if args.onnx:
+        onnx_path = args.onnx
+        if args.parity and not check_parity(args.model, onnx_path, args.data, args.parity_samples,
+                                            min_agreement=args.parity_threshold)[0]:
+            raise SystemExit(1)
+        if args.offline_optimize:
+            compare_startup(onnx_path, save_optimized_model(onnx_path, fmt=args.offline_optimize))
+    else:
+        try:
+            onnx_path = export_to_onnx(
+                model_path=args.model,
+                output_dir=args.output,
+                output_name=args.name,
+                imgsz=args.imgsz,
+                simplify=not args.no_simplify,
+                opset=args.opset,
+                half=args.half,
+                batch=args.batch,
+                dynamic_batch=args.dynamic_batch,
+                int8=args.int8,
+                fuse_preprocess=args.fuse_preprocess,
+                embed_nms=args.embed_nms,
+                offline_optimize=args.offline_optimize,
+                parity=args.parity,
+                parity_threshold=args.parity_threshold,
+                parity_samples=args.parity_samples,
+                data_yaml=args.data,
+                calib_samples=args.calib_samples
+            )
+        except RuntimeError as e:
+            raise SystemExit(f"Export failed: {e}")
 
-    if args.verify:
-        verify_onnx(str(onnx_path), args.imgsz)
+    if args.verify or args.benchmark:
+        verify_onnx(str(onnx_path), args.imgsz, benchmark=args.benchmark, data_yaml=args.data,
+                    iterations=args.iterations, warmup=args.warmup,
+                    benchmark_json=args.benchmark_json, session_profile=args.session_profile)
@@ -0,0 +1,488 @@
+"""
+공유 메모리 프레임 링 버퍼 (캡처 프로세스 → 추론 프로세스, 복사 없음)
+
+캡처와 추론을 별도 Python 프로세스로 나누면 multiprocessing.Queue가 1080p 프레임을 매번 pickle하느라
+CPU 시간을 대부분 씁니다. FrameRing은 multiprocessing.shared_memory 위에 고정 크기 슬롯을 미리 할당하고,
+쓰는 쪽은 프레임을 슬롯에 한 번 복사, 읽는 쪽은 슬롯을 NumPy 뷰로 바로 읽습니다.
+
+메모리 배치:
+    [헤더 int64 × 8: magic, slots, h, w, c, write_seq, -, -]
+    [슬롯 메타 int64 × slots × 2: seq, timestamp_ns]
+    [슬롯 데이터 uint8 × slots × h × w × c]  (64바이트 정렬)
+
+- 쓰기 1개 + 읽기 여러 개. 쓰는 쪽은 절대 기다리지 않고 가장 오래된 슬롯을 덮어씁니다 (drop-oldest).
+- 슬롯 seq는 쓰는 동안 -1 → 완료 후 프레임 번호 (seqlock). 읽는 쪽은 뷰 사용 후 is_valid(seq)로
+  그 사이 덮어써지지 않았는지 확인합니다. 슬롯 수는 (쓰기 fps × 소비 처리 시간)보다 넉넉하게 잡으세요.
+
+사용 예:
+    ring = FrameRing.create((1080, 1920, 3), slots=8)          # 캡처 프로세스
+    ring.write(frame)
+    reader = FrameRing.attach(ring.name)                        # 추론 프로세스
+    seq, ts, view = reader.wait_next(last_seq)
+    detections = detector.detect(view)
+    if not reader.is_valid(seq): ...                            # 처리 중 덮어써짐 → 결과 버림
+
+벤치마크 (Queue 전송 vs 링 버퍼, 30/60fps, 소비 프로세스 여러 개):
+    python frame_ring.py --fps 30 60 --consumers 1 2 4 --duration 5
+"""
+
+from multiprocessing import shared_memory
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import time
+
+import cv2
+import numpy as np
+
+MAGIC = 0x45474752494E47  # "EGGRING"
+_HEADER = 8
+_ALIGN = 64
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """
+    기존 세그먼트 연결
+
+    Python 3.12 이하 POSIX에서는 연결만 해도 resource_tracker에 등록되어, 별도로 실행한 프로세스가
+    종료될 때 세그먼트가 지워집니다. multiprocessing 자식 프로세스는 부모의 추적기를 공유하므로 그대로 둡니다.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if mp.parent_process() is not None:
+            return shm
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except (ImportError, AttributeError, KeyError):
+            pass  # Windows: 추적기 없음
+        return shm
+
+
+class FrameRing:
+    """
+    고정 크기 프레임 슬롯 링 버퍼 (create()/attach()로 생성)
+
+    Attributes:
+        name: 공유 메모리 이름 (다른 프로세스에서 attach할 때 사용)
+        shape: 프레임 shape (h, w, c), uint8
+        slots: 슬롯 수
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        if int(self.header[0]) != MAGIC:
+            raise ValueError(f"Shared memory {shm.name} is not a FrameRing")
+        self.slots = int(self.header[1])
+        self.shape = tuple(int(x) for x in self.header[2:5])
+        self.meta = np.ndarray(
+            (self.slots, 2), dtype=np.int64, buffer=shm.buf, offset=_HEADER * 8
+        )
+        offset = -(-(_HEADER * 8 + self.meta.nbytes) // _ALIGN) * _ALIGN
+        self.data = np.ndarray(
+            (self.slots, *self.shape), dtype=np.uint8, buffer=shm.buf, offset=offset
+        )
+
+    @classmethod
+    def create(cls, shape: tuple, slots: int = 8, name: str = None) -> "FrameRing":
+        """새 링 버퍼 할당 (쓰는 프로세스에서 호출, 종료 시 unlink())"""
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        meta_bytes = _HEADER * 8 + slots * 16
+        offset = -(-meta_bytes // _ALIGN) * _ALIGN
+        size = offset + slots * int(np.prod(shape))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[1], header[2:5] = slots, shape
+        np.ndarray((slots, 2), dtype=np.int64, buffer=shm.buf, offset=_HEADER * 8)[
+            :
+        ] = -1
+        header[0] = MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        """다른 프로세스가 만든 링 버퍼에 연결"""
+        return cls(_attach_shm(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_seq(self) -> int:
+        """다음에 쓸 프레임 번호 (= 지금까지 쓴 프레임 수)"""
+        return int(self.header[5])
+
+    def write(self, frame: np.ndarray, timestamp_ns: int = None) -> int:
+        """
+        가장 오래된 슬롯에 프레임 복사 (기다리지 않음)
+
+        Returns:
+            int: 프레임 번호
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} != ring shape {self.shape}")
+        seq = int(self.header[5])
+        slot = seq % self.slots
+        self.meta[slot, 0] = -1  # 쓰는 중
+        np.copyto(self.data[slot], frame)
+        self.meta[slot, 1] = (
+            time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        )
+        self.meta[slot, 0] = seq
+        self.header[5] = seq + 1
+        return seq
+
+    def get(self, seq: int):
+        """
+        프레임 번호로 읽기 (복사 없음)
+
+        Returns:
+            tuple | None: (timestamp_ns, 읽기 전용 뷰), 아직 없거나 덮어써졌으면 None
+        """
+        slot = seq % self.slots
+        if int(self.meta[slot, 0]) != seq:
+            return None
+        timestamp = int(self.meta[slot, 1])
+        view = self.data[slot].view()
+        view.flags.writeable = False
+        if int(self.meta[slot, 0]) != seq:  # 타임스탬프 읽는 사이 덮어써짐
+            return None
+        return timestamp, view
+
+    def is_valid(self, seq: int) -> bool:
+        """뷰를 쓰는 동안 슬롯이 덮어써지지 않았는지 확인"""
+        return int(self.meta[seq % self.slots, 0]) == seq
+
+    def next_seq(self, last_seq: int = -1, latest_only: bool = True):
+        """
+        last_seq 다음에 읽을 프레임 번호
+
+        Args:
+            latest_only: True면 가장 최근 프레임, False면 아직 남아 있는 가장 오래된 다음 프레임
+
+        Returns:
+            int | None: 새 프레임이 없으면 None
+        """
+        written = int(self.header[5])
+        if written == 0 or last_seq + 1 >= written:
+            return None
+        if latest_only:
+            return written - 1
+        # 쓰는 쪽이 다음에 덮어쓸 슬롯(written - slots)은 건너뜀
+        return max(last_seq + 1, written - self.slots + 1)
+
+    def wait_next(
+        self,
+        last_seq: int = -1,
+        timeout: float = 1.0,
+        latest_only: bool = True,
+        poll: float = 0.0005,
+    ):
+        """
+        새 프레임이 올 때까지 대기
+
+        Returns:
+            tuple | None: (seq, timestamp_ns, 뷰), 시간 초과면 None
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            seq = self.next_seq(last_seq, latest_only)
+            if seq is not None:
+                item = self.get(seq)
+                if item is not None:
+                    return (seq, *item)
+                continue  # 읽는 사이 덮어써짐 → 다시 선택
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def close(self):
+        # 뷰를 먼저 놓아야 공유 메모리를 닫을 수 있음
+        self.header = self.meta = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        """공유 메모리 해제 (만든 프로세스에서 한 번)"""
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+# ---------------------------------------------------------------------------
+# 벤치마크: multiprocessing.Queue(pickle) vs FrameRing
+# ---------------------------------------------------------------------------
+
+
+def _make_work(model: str):
+    """소비 프로세스의 프레임 처리 (기본: Letterbox만, --model 지정 시 전체 탐지)"""
+    if model:
+        from egg_detector import EggDetector
+
+        return EggDetector(model).detect
+    from egg_detector import letterbox
+
+    return letterbox
+
+
+def _consume(read, model: str, stop, results):
+    """소비 루프 공통: read() → (seq, ts, frame, is_valid)"""
+    work = _make_work(model)
+    latencies, frames, torn = [], 0, 0
+    last_seq = -1
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while not stop.is_set():
+        item = read(last_seq)
+        if item is None:
+            continue
+        seq, ts, frame, is_valid = item
+        work(frame)
+        if not is_valid():
+            torn += 1
+            last_seq = seq
+            continue
+        latencies.append(time.monotonic_ns() - ts)
+        last_seq = seq
+        frames += 1
+    results.put(
+        {
+            "frames": frames,
+            "torn": torn,
+            "latencies_ms": (np.asarray(latencies) / 1e6).tolist(),
+            "cpu_s": time.process_time() - cpu_start,
+            "wall_s": time.perf_counter() - wall_start,
+        }
+    )
+
+
+def _ring_consumer(name: str, model: str, stop, results):
+    ring = FrameRing.attach(name)
+
+    def read(last_seq):
+        item = ring.wait_next(last_seq, timeout=0.1)
+        if item is None:
+            return None
+        seq, ts, view = item
+        return seq, ts, view, lambda: ring.is_valid(seq)
+
+    _consume(read, model, stop, results)
+    ring.close()
+
+
+def _queue_consumer(q, model: str, stop, results):
+    def read(last_seq):
+        try:
+            seq, ts, frame = q.get(timeout=0.1)
+        except queue.Empty:
+            return None
+        return seq, ts, frame, lambda: True
+
+    _consume(read, model, stop, results)
+
+
+def _producer(mode: str, target, frames: list, fps: float, duration: float, results):
+    """캡처 프로세스 흉내: fps 간격으로 프레임 전송 (Queue는 가득 차면 가장 오래된 프레임을 버림)"""
+    ring = FrameRing.attach(target) if mode == "ring" else None
+    cpu_start = time.process_time()
+    start = next_time = time.perf_counter()
+    seq = 0
+    while time.perf_counter() - start < duration:
+        frame = frames[seq % len(frames)]
+        ts = time.monotonic_ns()
+        if ring is not None:
+            ring.write(frame, ts)
+        else:
+            for q in target:
+                try:
+                    q.put_nowait((seq, ts, frame))
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                    try:
+                        q.put_nowait((seq, ts, frame))
+                    except queue.Full:
+                        pass
+        seq += 1
+        next_time += 1 / fps
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+    results.put({"sent": seq, "cpu_s": time.process_time() - cpu_start})
+    if ring is not None:
+        ring.close()
+
+
+def benchmark_transfer(
+    mode: str,
+    frames: list,
+    fps: float,
+    consumers: int,
+    duration: float = 5.0,
+    slots: int = 8,
+    model: str = None,
+) -> dict:
+    """
+    전송 방식 1회 측정 (spawn 프로세스: 캡처 1개 + 소비 consumers개)
+
+    Returns:
+        dict: 소비자별 수신 fps 평균, 버림/손상 비율, 지연(캡처 → 처리 완료) p50/p95, 프로세스별 CPU 사용률
+    """
+    ctx = mp.get_context("spawn")
+    stop, results, producer_results = ctx.Event(), ctx.Queue(), ctx.Queue()
+    ring = None
+    if mode == "ring":
+        ring = FrameRing.create(frames[0].shape, slots=slots)
+        target = ring.name
+        procs = [
+            ctx.Process(target=_ring_consumer, args=(ring.name, model, stop, results))
+            for _ in range(consumers)
+        ]
+    else:
+        target = [ctx.Queue(maxsize=2) for _ in range(consumers)]
+        procs = [
+            ctx.Process(target=_queue_consumer, args=(q, model, stop, results))
+            for q in target
+        ]
+    for p in procs:
+        p.start()
+    time.sleep(2.0)  # 소비 프로세스 import/모델 로드 대기
+
+    producer = ctx.Process(
+        target=_producer,
+        args=(mode, target, frames, fps, duration, producer_results),
+    )
+    producer.start()
+    sent = producer_results.get()
+    producer.join()
+    time.sleep(0.2)
+    stop.set()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    if ring is not None:
+        ring.close()
+        ring.unlink()
+
+    latencies = np.concatenate([s["latencies_ms"] for s in stats] or [[]])
+    received = [s["frames"] for s in stats]
+    return {
+        "mode": mode,
+        "fps": fps,
+        "consumers": consumers,
+        "sent": sent["sent"],
+        "received_fps": float(np.mean(received)) / duration,
+        "drop_rate": 1 - float(np.mean(received)) / max(sent["sent"], 1),
+        "torn": int(sum(s["torn"] for s in stats)),
+        "latency_ms": {
+            f"p{q}": float(np.percentile(latencies, q)) if latencies.size else 0.0
+            for q in (50, 95)
+        },
+        "producer_cpu": sent["cpu_s"] / duration,
+        "consumer_cpu": float(np.mean([s["cpu_s"] / s["wall_s"] for s in stats])),
+    }
+
+
+def benchmark_frames(shape: tuple, video: str = None, count: int = 4) -> list:
+    """벤치마크용 프레임 (영상이 있으면 해당 크기로 리사이즈, 없으면 노이즈)"""
+    h, w, _ = shape
+    frames = []
+    if video:
+        capture = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(cv2.resize(frame, (w, h)))
+        capture.release()
+    rng = np.random.default_rng(0)
+    while len(frames) < count:
+        frames.append(rng.integers(0, 256, shape, dtype=np.uint8))
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark shared-memory frame ring vs multiprocessing.Queue transfer"
+    )
+    parser.add_argument(
+        "--fps", type=float, nargs="+", default=[30, 60], help="캡처 프레임 속도"
+    )
+    parser.add_argument(
+        "--consumers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="소비(추론) 프로세스 수",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5.0, help="설정별 측정 시간 (초)"
+    )
+    parser.add_argument(
+        "--resolution",
+        type=str,
+        default="1920x1080",
+        help="프레임 크기 WxH (기본 1080p)",
+    )
+    parser.add_argument("--slots", type=int, default=8, help="링 버퍼 슬롯 수")
+    parser.add_argument(
+        "--video", type=str, default=None, help="프레임으로 쓸 영상 (없으면 노이즈)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="지정 시 소비 프로세스가 EggDetector 전체 탐지 수행 (기본: Letterbox만)",
+    )
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+
+    w, h = (int(x) for x in args.resolution.lower().split("x"))
+    frames = benchmark_frames((h, w, 3), args.video)
+
+    print(
+        f"\nFrame transfer {w}x{h}, {args.duration:.0f}s per run, work="
+        f"{'detect' if args.model else 'letterbox'}"
+    )
+    print(
+        f"  {'mode':6s} {'fps':>4s} {'cons':>4s} {'recv fps':>8s} {'drop':>6s} {'torn':>4s}"
+        f" {'p50 ms':>7s} {'p95 ms':>7s} {'prod CPU':>8s} {'cons CPU':>8s}"
+    )
+    results = []
+    for fps in args.fps:
+        for consumers in args.consumers:
+            for mode in ("queue", "ring"):
+                r = benchmark_transfer(
+                    mode,
+                    frames,
+                    fps,
+                    consumers,
+                    duration=args.duration,
+                    slots=args.slots,
+                    model=args.model,
+                )
+                results.append(r)
+                print(
+                    f"  {mode:6s} {fps:4.0f} {consumers:4d} {r['received_fps']:8.1f}"
+                    f" {r['drop_rate']:6.1%} {r['torn']:4d} {r['latency_ms']['p50']:7.1f}"
+                    f" {r['latency_ms']['p95']:7.1f} {r['producer_cpu']:8.1%} {r['consumer_cpu']:8.1%}"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved: {args.output}")
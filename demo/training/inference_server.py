@@ -0,0 +1,357 @@
+"""
+로컬 추론 서버 (asyncio + 동적 배치, 표준 라이브러리만 사용)
+
+스테이션 프로세스마다 ONNX 모델을 따로 로드하면 메모리와 시작 시간이 프로세스 수만큼 늘어납니다.
+이 서버는 egg_classifier.onnx를 한 번만 로드하고, 동시에 들어온 요청을 MicroBatchScheduler로 묶어 추론합니다.
+
+엔드포인트 (localhost HTTP/1.1, keep-alive 지원 / --unix 지정 시 Unix 소켓):
+    POST /detect    본문: JPEG/PNG (Content-Type: image/jpeg, image/png)
+                    또는 raw BGR (Content-Type: application/octet-stream + X-Width, X-Height 헤더)
+                    → {"detections": [{class_id, class_name, confidence, box: [x, y, w, h]}], "latency_ms": ...}
+    GET  /health    모델 경로·해시·가동 시간
+    GET  /metrics   요청/거부/오류 수, 대기열 길이, 평균 배치 크기, 최근 지연 백분위
+
+과부하 시 (대기열이 --max-queue에 도달) 즉시 503 + Retry-After를 돌려줍니다.
+
+실행:
+    python inference_server.py --model ../models/egg_classifier_dyn.onnx --port 8765
+부하 테스트:
+    python load_test_server.py --url http://127.0.0.1:8765 --images ../data/images/val
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import json
+import queue
+import time
+
+import cv2
+import numpy as np
+
+from egg_detector import EggDetector
+from prediction_cache import model_hash
+from stream_scheduler import MicroBatchScheduler
+
+MAX_BODY_BYTES = 32 << 20
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class HttpError(Exception):
+    """요청 처리 중 HTTP 오류 응답으로 변환할 예외"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_frame(body: bytes, headers: dict) -> np.ndarray:
+    """
+    요청 본문 → BGR 이미지
+
+    Raises:
+        HttpError: 디코딩 불가, raw 크기 불일치
+    """
+    content_type = headers.get("content-type", "image/jpeg").split(";")[0].strip()
+    if content_type == "application/octet-stream":
+        try:
+            width, height = int(headers["x-width"]), int(headers["x-height"])
+        except (KeyError, ValueError):
+            raise HttpError(400, "raw frames need X-Width and X-Height headers")
+        if width <= 0 or height <= 0:
+            raise HttpError(400, f"invalid raw frame size {width}x{height}")
+        if len(body) != width * height * 3:
+            raise HttpError(
+                400, f"raw frame size {len(body)} != {width}x{height}x3 (BGR uint8)"
+            )
+        return np.frombuffer(body, dtype=np.uint8).reshape(height, width, 3)
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise HttpError(400, f"could not decode {content_type} body")
+    return image
+
+
+class InferenceServer:
+    """
+    공유 세션 1개 + 마이크로 배치 스케줄러를 감싼 asyncio HTTP 서버
+
+    Args:
+        detector: 공유 EggDetector
+        max_batch, max_delay_ms, max_queue: MicroBatchScheduler 설정
+        decode_threads: JPEG 디코딩 + 전처리 스레드 수
+        request_timeout_s: 추론 결과 대기 한도 (초과 시 504)
+    """
+
+    def __init__(
+        self,
+        detector: EggDetector,
+        model_path: str,
+        max_batch: int = 8,
+        max_delay_ms: float = 5.0,
+        max_queue: int = 64,
+        decode_threads: int = 4,
+        request_timeout_s: float = 10.0,
+    ):
+        self.detector = detector
+        self.model_path = model_path
+        self.model_hash = model_hash(model_path)
+        self.scheduler = MicroBatchScheduler(
+            detector, max_batch, max_delay_ms, max_queue
+        )
+        self.max_queue = max_queue
+        self.request_timeout_s = request_timeout_s
+        self.executor = ThreadPoolExecutor(max_workers=decode_threads)
+        self.started = time.time()
+        self.counters = {"requests": 0, "ok": 0, "rejected": 0, "errors": 0}
+        self.in_flight = 0
+        self.latencies = deque(maxlen=1000)  # 최근 요청 지연 (초)
+
+    def _submit(self, body: bytes, headers: dict):
+        """워커 스레드: 디코딩 + 전처리 후 스케줄러에 제출 (과부하면 queue.Full)"""
+        return self.scheduler.submit(None, decode_frame(body, headers))
+
+    async def detect(self, body: bytes, headers: dict) -> dict:
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # 디코딩 전에 먼저 거부해 과부하 시 CPU를 아낌. 디코딩 스레드 대기열에 쌓인 요청도
+        # 세도록 스케줄러 대기열이 아니라 처리 중인 요청 수(이 요청 포함)로 판단
+        if self.in_flight > self.max_queue + self.scheduler.max_batch:
+            raise HttpError(503, "server overloaded")
+        try:
+            future = await loop.run_in_executor(
+                self.executor, self._submit, body, headers
+            )
+        except queue.Full:
+            raise HttpError(503, "server overloaded")
+        try:
+            # shield: 시간 초과로 취소해도 스케줄러가 나중에 채울 Future는 그대로 둠
+            _, detections = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self.request_timeout_s
+            )
+        except asyncio.TimeoutError:
+            raise HttpError(504, "inference timed out")
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        return {
+            "detections": self.detector.to_records(detections),
+            "latency_ms": elapsed * 1000,
+        }
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "model": str(self.model_path),
+            "model_hash": self.model_hash,
+            "batch_size": self.detector.batch_size,
+            "uptime_s": time.time() - self.started,
+        }
+
+    def metrics(self) -> dict:
+        ms = np.asarray(self.latencies) * 1000
+        sizes = self.scheduler.batch_sizes[-1000:]
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "queue_depth": self.scheduler.pending(),
+            "max_queue": self.max_queue,
+            "batches": len(self.scheduler.batch_sizes),
+            "mean_batch": float(np.mean(sizes)) if sizes else 0.0,
+            "latency_ms": {
+                f"p{q}": float(np.percentile(ms, q)) if ms.size else 0.0
+                for q in (50, 95, 99)
+            },
+        }
+
+    async def route(self, method: str, path: str, headers: dict, body: bytes):
+        if path == "/health":
+            if method != "GET":
+                raise HttpError(405, "use GET")
+            return self.health()
+        if path == "/metrics":
+            if method != "GET":
+                raise HttpError(405, "use GET")
+            return self.metrics()
+        if path == "/detect":
+            if method != "POST":
+                raise HttpError(405, "use POST")
+            self.counters["requests"] += 1
+            self.in_flight += 1
+            try:
+                result = await self.detect(body, headers)
+            except HttpError as e:
+                self.counters["rejected" if e.status == 503 else "errors"] += 1
+                raise
+            except Exception:
+                self.counters["errors"] += 1
+                raise
+            finally:
+                self.in_flight -= 1
+            self.counters["ok"] += 1
+            return result
+        raise HttpError(404, f"unknown path {path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 1개 처리 (keep-alive: 클라이언트가 닫거나 Connection: close까지)"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, _ = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad request line"})
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad Content-Length"})
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "body too large"})
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                status, headers_out = 200, {}
+                try:
+                    payload = await self.route(
+                        method, target.split("?")[0], headers, body
+                    )
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    if e.status == 503:
+                        headers_out["Retry-After"] = "1"
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, headers_out, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, headers=None, keep_alive=False):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    def close(self):
+        self.scheduler.close()
+        self.executor.shutdown()
+
+
+async def serve(server: InferenceServer, host: str, port: int, unix: str = None):
+    if unix:
+        listener = await asyncio.start_unix_server(server.handle, path=unix)
+        print(f"Serving on unix:{unix}")
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"Serving on http://{host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local inference server with dynamic batching (one shared ONNX session)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model (동적 배치 모델 권장)",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="바인드 주소 (기본: localhost만)"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="HTTP 포트")
+    parser.add_argument(
+        "--unix", type=str, default=None, help="Unix 소켓 경로 (지정 시 TCP 대신 사용)"
+    )
+    parser.add_argument("--max-batch", type=int, default=8, help="최대 배치 크기")
+    parser.add_argument(
+        "--max-delay-ms", type=float, default=5.0, help="배치 최대 대기 시간 (ms)"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="대기열 최대 길이 (초과 시 503으로 거부)",
+    )
+    parser.add_argument(
+        "--decode-threads", type=int, default=4, help="JPEG 디코딩·전처리 스레드 수"
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=10.0,
+        help="추론 결과 대기 한도 (초, 초과 시 504)",
+    )
+    parser.add_argument("--conf", type=float, default=0.5, help="confidence 임계값")
+    parser.add_argument("--nms", type=float, default=0.45, help="NMS IoU 임계값")
+    parser.add_argument(
+        "--thresholds", type=str, default=None, help="클래스별 임계값 JSON"
+    )
+    parser.add_argument(
+        "--session-profile",
+        type=str,
+        default=None,
+        help="tune_session.py 프로파일 JSON",
+    )
+
+    args = parser.parse_args()
+
+    detector = EggDetector(
+        args.model,
+        conf_threshold=args.conf,
+        nms_threshold=args.nms,
+        thresholds_json=args.thresholds,
+        session_profile=args.session_profile,
+    )
+    server = InferenceServer(
+        detector,
+        args.model,
+        max_batch=args.max_batch,
+        max_delay_ms=args.max_delay_ms,
+        max_queue=args.max_queue,
+        decode_threads=args.decode_threads,
+        request_timeout_s=args.request_timeout,
+    )
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,286 @@
+"""
+inference_server.py 부하 테스트 (한 대의 PC에서 실행)
+
+동시 클라이언트 수를 늘려 가며 /detect 요청을 보내고, 단계별 처리량·지연 백분위·503(과부하 거부) 수와
+서버 /metrics의 평균 배치 크기를 출력합니다. 각 클라이언트는 keep-alive 연결 하나로 응답을 받는 즉시 다음 요청을 보냅니다.
+
+    # 서버를 직접 띄워서 테스트 (종료 시 서버도 종료)
+    python load_test_server.py --spawn --model ../models/egg_classifier_dyn.onnx --images ../data/images/val
+
+    # 이미 실행 중인 서버
+    python load_test_server.py --url http://127.0.0.1:8765 --video line1.mp4 --concurrency 1 4 16 64
+"""
+
+from pathlib import Path
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from evaluate_onnx import IMAGE_SUFFIXES
+
+
+def load_payloads(images: str = None, video: str = None, limit: int = 64, raw=False):
+    """
+    요청 본문 목록 (JPEG 인코딩 또는 raw BGR)
+
+    Returns:
+        list[tuple]: (body bytes, headers dict)
+    """
+    frames = []
+    if images:
+        for path in sorted(Path(images).rglob("*")):
+            if path.suffix.lower() in IMAGE_SUFFIXES:
+                image = cv2.imread(str(path))
+                if image is not None:
+                    frames.append(image)
+            if len(frames) >= limit:
+                break
+    elif video:
+        capture = cv2.VideoCapture(video)
+        while len(frames) < limit:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    if not frames:
+        raise FileNotFoundError("No frames found for --images/--video")
+
+    payloads = []
+    for frame in frames:
+        if raw:
+            h, w = frame.shape[:2]
+            headers = {
+                "Content-Type": "application/octet-stream",
+                "X-Width": w,
+                "X-Height": h,
+            }
+            payloads.append((np.ascontiguousarray(frame).tobytes(), headers))
+        else:
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            payloads.append((jpeg.tobytes(), {"Content-Type": "image/jpeg"}))
+    return payloads
+
+
+class Connection:
+    """keep-alive HTTP/1.1 연결 하나 (TCP 또는 Unix 소켓)"""
+
+    def __init__(self, host: str, port: int, unix: str = None):
+        self.host, self.port, self.unix = host, port, unix
+        self.reader = self.writer = None
+
+    async def open(self):
+        if self.unix:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.unix)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+
+    async def request(self, method: str, path: str, body=b"", headers=None):
+        """요청 전송 → (status, JSON 응답)"""
+        if self.writer is None:
+            await self.open()
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}"]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        head.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        response = await self.reader.readuntil(b"\r\n\r\n")
+        lines = response.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        response_headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                response_headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(
+            int(response_headers.get("content-length", 0))
+        )
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, json.loads(payload) if payload else {}
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_level(target: dict, payloads: list, concurrency: int, requests: int):
+    """
+    동시 클라이언트 concurrency개로 총 requests개 요청
+
+    Returns:
+        dict: 처리량, 지연 백분위(성공 요청), 상태 코드별 개수
+    """
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def client():
+        conn = Connection(**target)
+        try:
+            for i in counter:
+                body, headers = payloads[i % len(payloads)]
+                start = time.perf_counter()
+                try:
+                    status, _ = await conn.request("POST", "/detect", body, headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    status = "conn_error"
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.asarray(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput": len(latencies) / elapsed,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "latency_ms": {
+            f"p{q}": float(np.percentile(ms, q)) if ms.size else 0.0
+            for q in (50, 95, 99)
+        },
+    }
+
+
+async def fetch(target: dict, path: str) -> dict:
+    conn = Connection(**target)
+    try:
+        return (await conn.request("GET", path))[1]
+    finally:
+        conn.close()
+
+
+async def wait_healthy(target: dict, timeout: float = 60.0, process=None):
+    """서버 /health가 응답할 때까지 대기"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            return await fetch(target, "/health")
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            await asyncio.sleep(0.2)
+    raise TimeoutError("Server did not become healthy in time")
+
+
+async def load_test(target: dict, payloads: list, levels: list, requests: int):
+    health = await wait_healthy(target)
+    print(f"\nServer: {health['model']} (hash {health['model_hash']})")
+    print(
+        f"  {'clients':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}"
+        f" {'batch':>6s} {'ok':>6s} {'503':>6s} {'other':>6s}"
+    )
+
+    results = []
+    for concurrency in levels:
+        before = await fetch(target, "/metrics")
+        result = await run_level(target, payloads, concurrency, requests)
+        after = await fetch(target, "/metrics")
+        # 구간 평균 배치 크기 = 처리한 요청 수 / 실행한 배치 수
+        batches = after["batches"] - before["batches"]
+        done = after["ok"] - before["ok"]
+        result["mean_batch"] = done / batches if batches else 0.0
+        results.append(result)
+
+        lat, st = result["latency_ms"], result["statuses"]
+        other = sum(v for k, v in st.items() if k not in ("200", "503"))
+        print(
+            f"  {concurrency:7d} {result['throughput']:8.1f} {lat['p50']:8.1f} {lat['p95']:8.1f}"
+            f" {lat['p99']:8.1f} {result['mean_batch']:6.2f} {st.get('200', 0):6d}"
+            f" {st.get('503', 0):6d} {other:6d}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test inference_server.py on the local machine"
+    )
+    parser.add_argument(
+        "--url", type=str, default="http://127.0.0.1:8765", help="서버 주소"
+    )
+    parser.add_argument(
+        "--unix", type=str, default=None, help="Unix 소켓 경로 (지정 시 --url 무시)"
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="inference_server.py를 직접 실행하고 테스트 후 종료",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="--spawn 시 서버에 넘길 모델",
+    )
+    parser.add_argument(
+        "--server-args",
+        type=str,
+        nargs=argparse.REMAINDER,
+        default=[],
+        help="--spawn 시 서버에 넘길 추가 인자 (마지막에 지정, 예: --server-args --max-batch 16)",
+    )
+    parser.add_argument("--images", type=str, default=None, help="요청 이미지 디렉토리")
+    parser.add_argument("--video", type=str, default=None, help="요청 프레임 영상 파일")
+    parser.add_argument("--frames", type=int, default=64, help="준비할 요청 본문 수")
+    parser.add_argument(
+        "--raw", action="store_true", help="JPEG 대신 raw BGR 프레임 전송"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16, 64],
+        help="동시 클라이언트 수 단계",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="단계당 요청 수")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    target = {"host": url.hostname, "port": url.port or 80, "unix": args.unix}
+    payloads = load_payloads(args.images, args.video, args.frames, args.raw)
+
+    process = None
+    if args.spawn:
+        command = [sys.executable, "inference_server.py", "--model", args.model]
+        command += (
+            ["--unix", args.unix] if args.unix else ["--port", str(target["port"])]
+        )
+        process = subprocess.Popen(
+            command + args.server_args, cwd=Path(__file__).resolve().parent
+        )
+    try:
+        if process is not None:
+            asyncio.run(wait_healthy(target, process=process))
+        results = asyncio.run(
+            load_test(target, payloads, args.concurrency, args.requests)
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved: {args.output}")
@@ -0,0 +1,268 @@
+"""
+움직임 게이트 추론 — 변화 없는 프레임은 탐지를 건너뛰고 직전 결과 재사용
+
+계란 사이 구간에는 컨베이어 화면이 멈춰 있거나 비어 있는데도 매 프레임 640×640 모델을 실행합니다.
+MotionGate는 탐지 전에 축소 흑백 프레임 차분으로 변화 여부만 판단합니다.
+
+    - ROI(선택)만 잘라 --gate-width 폭으로 축소 → 흑백 + 블러
+    - 마지막으로 추론한 프레임(기준)과 픽셀 차이가 --pixel-delta를 넘는 비율이 --threshold 이상이면 변화
+    - 변화 없으면 직전 탐지 결과 재사용, 단 --max-stale 프레임 연속 재사용하면 강제로 추론
+
+녹화 영상으로 CPU 절감량과 놓친 탐지 수 측정 (임계값 여러 개 비교):
+    python motion_gate.py --model ../models/egg_classifier.onnx --video conveyor.mp4 --thresholds 0.002 0.005 0.01
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from egg_detector import EggDetector
+from egg_tracker import iou_matrix
+
+
+class MotionGate:
+    """
+    축소 프레임 차분 게이트
+
+    Args:
+        threshold: 변화로 판단할 변경 픽셀 비율
+        pixel_delta: 변경 픽셀로 셀 밝기 차이 (0~255)
+        width: 비교용 축소 폭 (높이는 비율 유지)
+        roi: (x, y, w, h) 비교 영역, None이면 전체 프레임
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.005,
+        pixel_delta: int = 15,
+        width: int = 160,
+        roi: tuple = None,
+    ):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.roi = roi
+        self.reference = None
+        self._pending = None
+        self.last_score = 0.0
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            frame = frame[y : y + h, x : x + w]
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def changed(self, frame: np.ndarray) -> bool:
+        """기준 프레임 대비 변화 여부 (기준은 update()로 갱신)"""
+        signature = self._signature(frame)
+        if self.reference is None or signature.shape != self.reference.shape:
+            self.last_score = 1.0
+            self._pending = signature
+            return True
+        diff = cv2.absdiff(signature, self.reference)
+        self.last_score = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+        self._pending = signature
+        return self.last_score >= self.threshold
+
+    def update(self):
+        """마지막으로 changed()에 넣은 프레임을 기준으로 (추론을 실행한 프레임)"""
+        self.reference = self._pending
+
+
+class GatedDetector:
+    """
+    EggDetector 앞에 MotionGate를 둔 탐지기
+
+    Args:
+        detector: EggDetector
+        gate: MotionGate
+        max_stale: 결과를 연속 재사용할 수 있는 최대 프레임 수 (0 = 게이트 끔)
+    """
+
+    def __init__(self, detector: EggDetector, gate: MotionGate, max_stale: int = 15):
+        self.detector = detector
+        self.gate = gate
+        self.max_stale = max_stale
+        self.last = None
+        self.stale = 0
+        self.frames = 0
+        self.inferences = 0
+
+    def detect(self, frame: np.ndarray) -> tuple:
+        """
+        Returns:
+            tuple: ([N, 6] 탐지 결과, 이번 프레임에 추론했는지 여부)
+        """
+        self.frames += 1
+        changed = self.gate.changed(frame)
+        if self.last is not None and not changed and self.stale < self.max_stale:
+            self.stale += 1
+            return self.last, False
+        self.last = self.detector.detect(frame)
+        self.gate.update()
+        self.stale = 0
+        self.inferences += 1
+        return self.last, True
+
+
+def missed_detections(
+    fresh: np.ndarray, reused: np.ndarray, conf: float, iou: float = 0.5
+) -> int:
+    """새로 추론했다면 나왔을 탐지 중 재사용 결과에 같은 클래스·IoU로 대응되지 않는 수"""
+    fresh = fresh[fresh[:, 4] >= conf]
+    reused = reused[reused[:, 4] >= conf]
+    if len(fresh) == 0:
+        return 0
+    if len(reused) == 0:
+        return len(fresh)
+    same = fresh[:, None, 5] == reused[None, :, 5]
+    hit = (iou_matrix(fresh[:, :4], reused[:, :4]) >= iou) & same
+    return int((~hit.any(1)).sum())
+
+
+def evaluate_gate(
+    detector: EggDetector,
+    frames: list,
+    thresholds: list,
+    pixel_delta: int = 15,
+    width: int = 160,
+    roi: tuple = None,
+    max_stale: int = 15,
+    conf: float = 0.5,
+) -> list:
+    """
+    녹화 프레임으로 게이트 효과 측정
+
+    매 프레임 추론 결과를 정답으로 보고, 게이트가 재사용한 결과에서 빠진 탐지를 셉니다.
+    CPU 시간은 time.process_time() 기준 (디코딩 제외, 게이트 비용 포함).
+
+    Returns:
+        list[dict]: 임계값별 추론 수, CPU 시간·절감률, 놓친 탐지 수
+    """
+    cpu = time.process_time()
+    reference = [detector.detect(f) for f in frames]
+    full_cpu = time.process_time() - cpu
+    total = sum(int((d[:, 4] >= conf).sum()) for d in reference)
+
+    results = []
+    for threshold in thresholds:
+        gated = GatedDetector(
+            detector, MotionGate(threshold, pixel_delta, width, roi), max_stale
+        )
+        cpu = time.process_time()
+        outputs = [gated.detect(f) for f in frames]
+        gated_cpu = time.process_time() - cpu
+
+        missed = [
+            missed_detections(fresh, dets, conf) if not ran else 0
+            for fresh, (dets, ran) in zip(reference, outputs)
+        ]
+        results.append(
+            {
+                "threshold": threshold,
+                "frames": len(frames),
+                "inferences": gated.inferences,
+                "skip_rate": 1 - gated.inferences / len(frames),
+                "cpu_s": gated_cpu,
+                "full_cpu_s": full_cpu,
+                "cpu_saved": 1 - gated_cpu / full_cpu if full_cpu else 0.0,
+                "detections": total,
+                "missed": int(sum(missed)),
+                "frames_with_miss": int(sum(m > 0 for m in missed)),
+            }
+        )
+    return results
+
+
+def read_frames(video: str, max_frames: int = None) -> list:
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise FileNotFoundError(f"No frames could be read from {video}")
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure motion-gated inference (skip unchanged frames) on recorded footage"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument("--video", type=str, required=True, help="녹화 영상")
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[0.002, 0.005, 0.01, 0.02],
+        help="변화로 판단할 변경 픽셀 비율 (여러 개 비교)",
+    )
+    parser.add_argument(
+        "--pixel-delta", type=int, default=15, help="변경 픽셀 밝기 차이 (0~255)"
+    )
+    parser.add_argument("--gate-width", type=int, default=160, help="비교용 축소 폭")
+    parser.add_argument(
+        "--roi",
+        type=int,
+        nargs=4,
+        default=None,
+        metavar=("X", "Y", "W", "H"),
+        help="비교 영역 (기본: 전체 프레임)",
+    )
+    parser.add_argument(
+        "--max-stale", type=int, default=15, help="결과 최대 연속 재사용 프레임 수"
+    )
+    parser.add_argument("--conf", type=float, default=0.5, help="confidence 임계값")
+    parser.add_argument("--max-frames", type=int, default=None, help="최대 프레임 수")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+
+    detector = EggDetector(args.model, conf_threshold=args.conf)
+    frames = read_frames(args.video, args.max_frames)
+    results = evaluate_gate(
+        detector,
+        frames,
+        args.thresholds,
+        pixel_delta=args.pixel_delta,
+        width=args.gate_width,
+        roi=tuple(args.roi) if args.roi else None,
+        max_stale=args.max_stale,
+        conf=args.conf,
+    )
+
+    r0 = results[0]
+    print(
+        f"\n{args.video}: {r0['frames']} frames, {r0['detections']} detections, "
+        f"every-frame CPU {r0['full_cpu_s']:.2f}s (max stale {args.max_stale})"
+    )
+    print(
+        f"  {'threshold':>9s} {'infer':>6s} {'skipped':>8s} {'CPU s':>7s} {'saved':>7s}"
+        f" {'missed':>7s} {'miss frames':>11s}"
+    )
+    for r in results:
+        print(
+            f"  {r['threshold']:9.4f} {r['inferences']:6d} {r['skip_rate']:8.1%} {r['cpu_s']:7.2f}"
+            f" {r['cpu_saved']:7.1%} {r['missed']:7d} {r['frames_with_miss']:11d}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved: {args.output}")
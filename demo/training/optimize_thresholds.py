@@ -0,0 +1,280 @@
+"""
+클래스별 운영점(confidence 임계값) 최적화 스크립트
+
+앱은 다섯 클래스 모두에 전역 confidence 0.5를 사용하지만, 크랙 미검출은 탈색 오검출보다 훨씬 비쌉니다.
+검증 데이터의 예측 캐시(prediction_cache.py)에서 클래스별 PR 곡선 전체를 계산하고
+클래스마다 F1 최대 지점 또는 목표 Recall을 만족하는 지점의 임계값을 선택해 JSON으로 내보냅니다.
+
+출력 JSON 예시 (../models/egg_classifier.thresholds.json):
+    {
+      "model_hash": "...",
+      "nms_threshold": 0.45,
+      "thresholds": [0.412, 0.183, 0.5, 0.47, 0.39],
+      "classes": [{"id": 0, "name": "normal", "threshold": 0.412, "precision": ..., "recall": ...}, ...]
+    }
+"""
+
+from pathlib import Path
+import argparse
+import json
+import math
+
+import numpy as np
+
+import evaluate_onnx as ev
+from prediction_cache import PredictionCache, build_prediction_cache
+
+
+def class_stats(cache: PredictionCache, conf, iou: float):
+    """
+    앱 방식 후처리 후 IoU 0.5 기준 TP 여부 집계
+
+    Returns:
+        tuple: (tp [N] bool, conf [N], pred_cls [N], target_cls [M])
+    """
+    dets = cache.detections(conf, iou)
+    stats = [ev.image_stats(d, cache.image_labels(i)) for i, d in enumerate(dets)]
+    correct, confs, pred_cls, target_cls = (np.concatenate(x, 0) for x in zip(*stats))
+    return correct[:, 0], confs, pred_cls.astype(np.int64), target_cls.astype(np.int64)
+
+
+def pr_curves(tp, conf, pred_cls, target_cls, nc: int) -> list:
+    """
+    클래스별 PR 곡선 (신뢰도 내림차순 누적)
+
+    Returns:
+        list[dict]: 클래스별 conf / precision / recall / f1 배열과 정답 수 n_gt
+    """
+    curves = []
+    for c in range(nc):
+        mask = pred_cls == c
+        order = np.argsort(-conf[mask])
+        tpc = tp[mask][order].cumsum()
+        fpc = (~tp[mask][order]).cumsum()
+        n_gt = int((target_cls == c).sum())
+
+        precision = tpc / np.maximum(tpc + fpc, 1)
+        recall = tpc / max(n_gt, 1)
+        f1 = 2 * precision * recall / (precision + recall + 1e-16)
+        curves.append(
+            {
+                "conf": conf[mask][order],
+                "precision": precision,
+                "recall": recall,
+                "f1": f1,
+                "n_gt": n_gt,
+            }
+        )
+    return curves
+
+
+def choose_operating_point(curve: dict, target_recall: float = None) -> dict:
+    """
+    PR 곡선에서 운영점 선택
+
+    Args:
+        target_recall: 지정 시 이 Recall 이상인 지점 중 Precision 최대,
+                       도달 불가하면 Recall 최대 지점 (없으면 F1 최대 지점)
+
+    Returns:
+        dict: threshold, precision, recall, f1, objective, reached
+    """
+    if len(curve["conf"]) == 0:
+        return {
+            "threshold": 0.5,
+            "precision": 0.0,
+            "recall": 0.0,
+            "f1": 0.0,
+            "objective": "none",
+            "reached": False,
+        }
+
+    reached = True
+    if target_recall is None:
+        idx = int(curve["f1"].argmax())
+        objective = "f1"
+    else:
+        candidates = np.flatnonzero(curve["recall"] >= target_recall)
+        if candidates.size:
+            idx = int(candidates[curve["precision"][candidates].argmax()])
+        else:
+            idx = int(curve["recall"].argmax())
+            reached = False
+        objective = f"recall>={target_recall}"
+
+    # 소수점 셋째 자리로 내림 → 선택한 탐지가 '>' / '>=' 비교 모두에서 유지됨
+    threshold = math.floor(float(curve["conf"][idx]) * 1000) / 1000
+    return {
+        "threshold": threshold,
+        "precision": float(curve["precision"][idx]),
+        "recall": float(curve["recall"][idx]),
+        "f1": float(curve["f1"][idx]),
+        "objective": objective,
+        "reached": reached,
+    }
+
+
+def per_class_pr(tp, pred_cls, target_cls, nc: int):
+    """클래스별 (precision, recall) — 주어진 탐지 결과 전체 기준"""
+    result = []
+    for c in range(nc):
+        n_pred = int((pred_cls == c).sum())
+        n_tp = int(tp[pred_cls == c].sum())
+        n_gt = int((target_cls == c).sum())
+        result.append((n_tp / n_pred if n_pred else 0.0, n_tp / n_gt if n_gt else 0.0))
+    return result
+
+
+def optimize_thresholds(
+    cache_dir,
+    nms_threshold: float = 0.45,
+    target_recall: dict = None,
+    baseline_conf: float = 0.5,
+) -> dict:
+    """
+    클래스별 임계값 최적화 + 실제 재채점으로 검증
+
+    Args:
+        nms_threshold: 앱 NMS IoU 임계값
+        target_recall: {클래스 이름: 목표 Recall} — 없는 클래스는 F1 최대화
+        baseline_conf: 비교 기준 전역 임계값
+
+    Returns:
+        dict: JSON으로 내보낼 결과
+    """
+    cache = PredictionCache(cache_dir)
+    names = cache.class_names
+    nc = len(names)
+    target_recall = target_recall or {}
+
+    unknown = set(target_recall) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown class names in target recall: {sorted(unknown)}")
+
+    # 1) 캐시 하한 임계값에서 클래스별 PR 곡선
+    curves = pr_curves(*class_stats(cache, cache.meta["floor_conf"], nms_threshold), nc)
+    points = [
+        choose_operating_point(curves[c], target_recall.get(names[c]))
+        for c in range(nc)
+    ]
+    thresholds = np.array([p["threshold"] for p in points], dtype=np.float32)
+
+    # 2) 선택한 임계값을 NMS 이전에 적용하여 다시 채점 (런타임과 동일한 순서)
+    tuned = class_stats(cache, thresholds, nms_threshold)
+    tuned_pr = per_class_pr(tuned[0], tuned[2], tuned[3], nc)
+    tuned_f1 = [2 * p * r / (p + r) if p + r else 0.0 for p, r in tuned_pr]
+    base = class_stats(cache, baseline_conf, nms_threshold)
+    base_pr = per_class_pr(base[0], base[2], base[3], nc)
+
+    print(
+        f"\nPer-class operating points (NMS IoU {nms_threshold}, baseline conf {baseline_conf}):"
+    )
+    print(
+        f"  {'Class':16s} {'Objective':14s} {'Thr':>6s} {'P':>7s} {'R':>7s}"
+        f" {'F1':>7s} | {'P@base':>7s} {'R@base':>7s}"
+    )
+    for c, name in enumerate(names):
+        p = points[c]
+        flag = "" if p["reached"] else "  (target not reached)"
+        print(
+            f"  {name:16s} {p['objective']:14s} {p['threshold']:6.3f} {tuned_pr[c][0]:7.4f}"
+            f" {tuned_pr[c][1]:7.4f} {tuned_f1[c]:7.4f} | {base_pr[c][0]:7.4f} {base_pr[c][1]:7.4f}{flag}"
+        )
+
+    return {
+        "model": cache.meta["model"],
+        "model_hash": cache.meta["model_hash"],
+        "nms_threshold": nms_threshold,
+        "thresholds": [p["threshold"] for p in points],
+        "classes": [
+            {
+                "id": c,
+                "name": name,
+                "threshold": points[c]["threshold"],
+                "objective": points[c]["objective"],
+                "precision": tuned_pr[c][0],
+                "recall": tuned_pr[c][1],
+                "f1": tuned_f1[c],
+                "baseline_precision": base_pr[c][0],
+                "baseline_recall": base_pr[c][1],
+            }
+            for c, name in enumerate(names)
+        ],
+    }
+
+
+def _parse_target_recall(values: list) -> dict:
+    """['crack=0.95', 'deformed=0.9'] → {'crack': 0.95, 'deformed': 0.9}"""
+    targets = {}
+    for value in values or []:
+        name, _, recall = value.partition("=")
+        try:
+            targets[name] = float(recall)
+        except ValueError:
+            raise ValueError(
+                f"Invalid --target-recall {value!r} (expected NAME=RECALL, e.g. crack=0.95)"
+            ) from None
+        if not name or not 0.0 < targets[name] <= 1.0:
+            raise ValueError(
+                f"Invalid --target-recall {value!r} (expected NAME=RECALL with 0 < RECALL <= 1)"
+            )
+    return targets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Optimize per-class confidence thresholds from cached predictions"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--nms", type=float, default=0.45, help="NMS IoU threshold (앱 기본값 0.45)"
+    )
+    parser.add_argument(
+        "--target-recall",
+        type=str,
+        nargs="*",
+        default=None,
+        help="클래스별 목표 Recall (예: crack=0.95 deformed=0.9), 나머지는 F1 최대화",
+    )
+    parser.add_argument(
+        "--baseline-conf", type=float, default=0.5, help="비교 기준 전역 임계값"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="출력 JSON 경로 (기본: 모델 옆 <모델 이름>.thresholds.json)",
+    )
+
+    args = parser.parse_args()
+    try:
+        target_recall = _parse_target_recall(args.target_recall)
+    except ValueError as e:
+        parser.error(str(e))
+
+    cache_dir = build_prediction_cache(args.model, args.data)
+    try:
+        result = optimize_thresholds(
+            cache_dir,
+            nms_threshold=args.nms,
+            target_recall=target_recall,
+            baseline_conf=args.baseline_conf,
+        )
+    except ValueError as e:  # 데이터셋에 없는 클래스 이름
+        parser.error(str(e))
+
+    model_path = Path(args.model)
+    output = Path(
+        args.output or model_path.with_name(f"{model_path.stem}.thresholds.json")
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved thresholds: {output}")
@@ -0,0 +1,367 @@
+"""
+NMS 이전 예측 캐시 + 임계값 스윕 스크립트
+
+검증 데이터셋에 대한 ONNX 모델의 NMS 이전 후보(박스 + 클래스별 점수)를 모델 해시별로 한 번만 저장하고,
+이후에는 모델 실행 없이 임의의 confidence / NMS IoU 조합으로 즉시 재채점합니다.
+앱(YoloDetector.Detect)의 confidenceThreshold=0.5, nmsThreshold=0.45를 바꿨을 때의 효과를
+임계값 격자 전체에 대해 확인할 수 있습니다.
+
+캐시 형식 (runs/pred_cache/<모델 해시>_<split>_<데이터 해시>/, 모두 np.load(mmap_mode="r")로 로드):
+    boxes.npy          [K, 4] float32   후보 박스 (원본 이미지 좌표, xyxy)
+    scores.npy         [K, nc] float16  후보별 클래스 점수
+    offsets.npy        [N + 1] int64    이미지 i의 후보 = boxes[offsets[i]:offsets[i + 1]]
+    labels.npy         [M, 5] float32   정답 (class_id, x1, y1, x2, y2)
+    label_offsets.npy  [N + 1] int64
+    shapes.npy         [N, 2] int32     원본 이미지 (h, w)
+    meta.json                           모델·데이터·클래스 정보 (마지막에 기록)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import evaluate_onnx as ev
+
+
+def model_hash(onnx_path: str) -> str:
+    """ONNX 파일 내용 해시 (앞 16자리)"""
+    digest = hashlib.sha1()
+    with open(onnx_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def dataset_hash(image_paths: list, label_paths: list, class_names: list) -> str:
+    """이미지·라벨 목록과 각 파일의 크기·수정 시각 해시 (앞 12자리) — 데이터가 바뀌면 캐시 무효화"""
+    digest = hashlib.sha1(json.dumps(class_names).encode())
+    for path in itertools.chain(image_paths, label_paths):
+        path = Path(path)
+        stat = path.stat() if path.exists() else None
+        digest.update(
+            f"{path}|{stat.st_size if stat else -1}|{stat.st_mtime_ns if stat else -1}\n".encode()
+        )
+    return digest.hexdigest()[:12]
+
+
+def _cache_chunk(args):
+    """워커: 이미지 묶음 추론 → NMS 이전 후보 + 정답 라벨 반환"""
+    image_paths, label_paths, batch, floor_conf = args
+    session = ev._worker["session"]
+
+    images = [cv2.imread(str(p)) for p in image_paths]
+    shapes = [img.shape[:2] for img in images]
+    raw, params = ev.run_inference(session, images, batch)
+    if raw.shape[1] > raw.shape[2]:
+        raw = raw.transpose(0, 2, 1)
+
+    results = []
+    for pred, p, (h, w), label_path in zip(raw, params, shapes, label_paths):
+        boxes, scores = ev.candidate_boxes(pred, p, floor_conf)
+        results.append((boxes, scores, ev.load_labels(label_path, w, h), (h, w)))
+    return results
+
+
+def build_prediction_cache(
+    onnx_path: str,
+    data_yaml: str,
+    split: str = "val",
+    floor_conf: float = 0.001,
+    batch: int = 8,
+    workers: int = None,
+    cache_root: str = "runs/pred_cache",
+    chunk_size: int = 64,
+) -> Path:
+    """
+    NMS 이전 예측 캐시 생성 (같은 모델·split·데이터의 캐시가 있으면 재사용)
+
+    Args:
+        floor_conf: 저장할 후보의 최소 클래스 점수 (이보다 낮은 임계값은 스윕 불가)
+
+    Returns:
+        Path: 캐시 디렉토리
+    """
+    image_paths, label_paths, class_names = ev.load_dataset(data_yaml, split)
+    data_hash = dataset_hash(image_paths, label_paths, class_names)
+    cache_dir = Path(cache_root) / f"{model_hash(onnx_path)}_{split}_{data_hash}"
+    meta_path = cache_dir / "meta.json"
+    if meta_path.exists():
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["floor_conf"] <= floor_conf:
+            print(f"\nReusing prediction cache: {cache_dir}")
+            return cache_dir
+
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    intra_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    print(f"\nBuilding prediction cache: {cache_dir}")
+    print(f"  Model: {onnx_path}")
+    print(f"  Images: {len(image_paths)} (workers: {workers})")
+
+    tasks = [
+        (
+            image_paths[i : i + chunk_size],
+            label_paths[i : i + chunk_size],
+            batch,
+            floor_conf,
+        )
+        for i in range(0, len(image_paths), chunk_size)
+    ]
+
+    start = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=ev._init_worker,
+        initargs=(str(onnx_path), intra_threads),
+    ) as pool:
+        for chunk in pool.map(_cache_chunk, tasks):
+            entries.extend(chunk)
+    elapsed = time.perf_counter() - start
+
+    boxes, scores, labels, shapes = zip(*entries)
+    nc = len(class_names)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "boxes": np.concatenate(boxes).astype(np.float32).reshape(-1, 4),
+        "scores": np.concatenate(scores).astype(np.float16).reshape(-1, nc),
+        "offsets": np.concatenate([[0], np.cumsum([len(b) for b in boxes])]),
+        "labels": np.concatenate(labels).astype(np.float32).reshape(-1, 5),
+        "label_offsets": np.concatenate([[0], np.cumsum([len(l) for l in labels])]),
+        "shapes": np.array(shapes, dtype=np.int32),
+    }
+    for name, array in arrays.items():
+        np.save(cache_dir / f"{name}.npy", array)
+
+    # meta.json은 마지막에 기록 → 중단된 캐시는 재사용되지 않음
+    meta = {
+        "model": str(onnx_path),
+        "model_hash": model_hash(onnx_path),
+        "data": str(data_yaml),
+        "split": split,
+        "data_hash": data_hash,
+        "floor_conf": floor_conf,
+        "class_names": class_names,
+        "images": [str(p) for p in image_paths],
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    size_mb = sum(p.stat().st_size for p in cache_dir.glob("*.npy")) / (1024 * 1024)
+    print(f"  Candidates: {len(arrays['boxes'])} ({size_mb:.1f} MB, {elapsed:.1f}s)")
+    return cache_dir
+
+
+class PredictionCache:
+    """캐시 디렉토리를 memmap으로 열어 모델 실행 없이 재채점"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.class_names = self.meta["class_names"]
+
+        for name in ("boxes", "scores", "offsets", "labels", "label_offsets", "shapes"):
+            setattr(self, name, np.load(self.cache_dir / f"{name}.npy", mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def candidates(self, i: int):
+        """이미지 i의 NMS 이전 후보 (boxes [K, 4], scores [K, nc])"""
+        s, e = self.offsets[i], self.offsets[i + 1]
+        return self.boxes[s:e], self.scores[s:e].astype(np.float32)
+
+    def image_labels(self, i: int) -> np.ndarray:
+        """이미지 i의 정답 [M, 5]"""
+        return self.labels[self.label_offsets[i] : self.label_offsets[i + 1]]
+
+    def detections(
+        self, conf: float, iou: float, multi_label: bool = False, agnostic: bool = True
+    ) -> list:
+        """
+        모든 이미지에 대해 신뢰도 필터 + NMS 재적용
+
+        기본값(multi_label=False, agnostic=True)은 앱과 같은 방식입니다:
+        앵커별 최대 클래스 하나만 사용하고 클래스 구분 없이 NMS를 적용합니다.
+        conf에 클래스별 임계값 배열 [nc]를 넘기면 클래스마다 다른 임계값을 적용합니다.
+        """
+        if np.min(conf) < self.meta["floor_conf"]:
+            raise ValueError(
+                f"conf {conf} is below the cache floor {self.meta['floor_conf']}"
+            )
+        return [
+            ev.select_detections(
+                *self.candidates(i),
+                tuple(self.shapes[i]),
+                conf,
+                iou,
+                multi_label=multi_label,
+                agnostic=agnostic,
+            )
+            for i in range(len(self))
+        ]
+
+    def score(
+        self, conf: float, iou: float, multi_label: bool = False, agnostic: bool = True
+    ) -> dict:
+        """
+        주어진 임계값에서의 메트릭
+
+        Returns:
+            dict: summarize() 결과 + 운영점(IoU 0.5) precision / recall / f1
+        """
+        dets = self.detections(conf, iou, multi_label, agnostic)
+        stats = [ev.image_stats(d, self.image_labels(i)) for i, d in enumerate(dets)]
+        metrics = ev.summarize(stats, self.class_names)
+
+        tp = sum(int(s[0][:, 0].sum()) for s in stats)
+        n_pred = sum(len(s[1]) for s in stats)
+        n_gt = sum(len(s[3]) for s in stats)
+        precision = tp / n_pred if n_pred else 0.0
+        recall = tp / n_gt if n_gt else 0.0
+
+        metrics.update(
+            {
+                "conf": conf if np.isscalar(conf) else [float(c) for c in conf],
+                "iou": iou,
+                "op_precision": precision,
+                "op_recall": recall,
+                "op_f1": 2 * precision * recall / (precision + recall + 1e-16),
+            }
+        )
+        return metrics
+
+
+_sweep_cache = {}
+
+
+def _score_point(args):
+    cache_dir, conf, iou, multi_label, agnostic = args
+    if cache_dir not in _sweep_cache:
+        _sweep_cache[cache_dir] = PredictionCache(cache_dir)
+    m = _sweep_cache[cache_dir].score(conf, iou, multi_label, agnostic)
+    m.pop("per_class")
+    return m
+
+
+def sweep(
+    cache_dir,
+    confs: list,
+    ious: list,
+    multi_label: bool = False,
+    agnostic: bool = True,
+    workers: int = None,
+) -> list:
+    """
+    confidence × IoU 격자 전체 재채점 (격자점 단위로 프로세스 병렬)
+
+    Returns:
+        list[dict]: 격자점별 메트릭
+    """
+    grid = [
+        (str(cache_dir), c, i, multi_label, agnostic)
+        for c, i in itertools.product(confs, ious)
+    ]
+    workers = workers or min(len(grid), os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(_score_point, grid))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nThreshold sweep ({len(grid)} points in {elapsed:.1f}s, no model execution):"
+    )
+    print(
+        f"  {'conf':>6s} {'iou':>6s} {'P':>7s} {'R':>7s} {'F1':>7s} "
+        f"{'mAP50':>7s} {'mAP50-95':>9s}"
+    )
+    for r in rows:
+        print(
+            f"  {r['conf']:6.3f} {r['iou']:6.3f} {r['op_precision']:7.4f} "
+            f"{r['op_recall']:7.4f} {r['op_f1']:7.4f} {r['mAP50']:7.4f} {r['mAP50-95']:9.4f}"
+        )
+
+    best = max(rows, key=lambda r: r["op_f1"])
+    print(
+        f"\n  Best F1: conf={best['conf']:.3f}, iou={best['iou']:.3f} (F1={best['op_f1']:.4f})"
+    )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cache pre-NMS predictions and sweep confidence / NMS thresholds"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--split", type=str, default="val", help="평가할 split (data.yaml 키)"
+    )
+    parser.add_argument(
+        "--floor-conf", type=float, default=0.001, help="캐시에 저장할 후보의 최소 점수"
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        nargs="+",
+        default=[0.25, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7],
+        help="스윕할 confidence 임계값 목록",
+    )
+    parser.add_argument(
+        "--iou",
+        type=float,
+        nargs="+",
+        default=[0.3, 0.45, 0.6, 0.7],
+        help="스윕할 NMS IoU 임계값 목록",
+    )
+    parser.add_argument(
+        "--ultralytics-nms",
+        action="store_true",
+        help="ultralytics val 방식(multi-label, 클래스별 NMS) 사용 (기본: 앱 방식)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수")
+    parser.add_argument(
+        "--output", type=str, default=None, help="스윕 결과 JSON 저장 경로"
+    )
+
+    args = parser.parse_args()
+
+    cache_dir = build_prediction_cache(
+        args.model,
+        args.data,
+        split=args.split,
+        floor_conf=args.floor_conf,
+        workers=args.workers,
+    )
+    rows = sweep(
+        cache_dir,
+        args.conf,
+        args.iou,
+        multi_label=args.ultralytics_nms,
+        agnostic=not args.ultralytics_nms,
+        workers=args.workers,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nSaved sweep results: {args.output}")
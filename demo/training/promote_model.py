@@ -0,0 +1,332 @@
+"""
+모델 승격 게이트: 후보 모델 vs 현재 배포 모델 비교 후 조건 충족 시에만 교체
+
+같은 호스트·같은 검증 데이터에서 두 모델의 mAP, 운영점(앱 방식 후처리) 클래스별 Recall,
+p95 지연, 최대 메모리, 파일 크기를 측정합니다. 지연은 두 모델을 라운드마다 번갈아 측정해
+라운드별 p95의 중앙값으로 비교합니다. 모든 허용 기준을 통과하고 mAP 또는 p95 지연 중
+하나 이상에서 최소 개선폭 이상 나을 때만 후보를 egg_classifier.onnx로 원자적으로 교체하며,
+기존 모델은 ../models/archive/에 보관합니다.
+
+승격 이력은 ../models/promotion_log.jsonl에 한 줄씩 기록됩니다.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import time
+
+from optimize_thresholds import class_stats, per_class_pr
+from prediction_cache import PredictionCache, build_prediction_cache, model_hash
+
+
+def thresholds_path(onnx_path) -> Path:
+    """optimize_thresholds.py가 모델 옆에 저장하는 클래스별 임계값 파일 경로"""
+    onnx_path = Path(onnx_path)
+    return onnx_path.with_name(f"{onnx_path.stem}.thresholds.json")
+
+
+def operating_thresholds(onnx_path: str, default_conf: float = 0.5):
+    """모델 옆 <이름>.thresholds.json이 있으면 클래스별 임계값, 없으면 전역 임계값"""
+    path = thresholds_path(onnx_path)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["thresholds"]
+    return default_conf
+
+
+def _benchmark_isolated(onnx_path: str, data_yaml: str, iterations: int) -> dict:
+    """새 프로세스(spawn)에서 벤치마크 — 최대 RSS가 다른 모델 측정에 오염되지 않도록"""
+    from export_onnx import benchmark_onnx
+
+    return benchmark_onnx(onnx_path, data_yaml, iterations=iterations)
+
+
+def measure_model(
+    onnx_path: str,
+    data_yaml: str,
+    conf: float = 0.5,
+    nms_threshold: float = 0.45,
+) -> dict:
+    """
+    승격 판단용 정확도·크기 지표 측정 (지연·메모리는 measure_latency)
+
+    Returns:
+        dict: mAP50, mAP50-95, recall(클래스별, 운영점), size_mb
+    """
+    cache = PredictionCache(build_prediction_cache(onnx_path, data_yaml))
+    metrics = cache.score(
+        cache.meta["floor_conf"], 0.7, multi_label=True, agnostic=False
+    )
+
+    thresholds = operating_thresholds(onnx_path, conf)
+    tp, _, pred_cls, target_cls = class_stats(cache, thresholds, nms_threshold)
+    op = per_class_pr(tp, pred_cls, target_cls, len(cache.class_names))
+
+    return {
+        "model": str(onnx_path),
+        "model_hash": model_hash(str(onnx_path)),
+        "mAP50": metrics["mAP50"],
+        "mAP50-95": metrics["mAP50-95"],
+        "thresholds": thresholds,
+        "recall": {name: op[c][1] for c, name in enumerate(cache.class_names)},
+        "size_mb": os.path.getsize(onnx_path) / (1024 * 1024),
+    }
+
+
+def measure_latency(
+    onnx_paths: list, data_yaml: str, iterations: int = 200, rounds: int = 5
+) -> list:
+    """
+    여러 모델의 지연을 라운드마다 번갈아 측정 (호스트 부하 변화가 한 모델에만 몰리지 않도록)
+
+    라운드마다 모델별로 새 프로세스에서 iterations회 측정하고, 홀수 라운드는 순서를 뒤집습니다.
+
+    Returns:
+        list[dict]: 모델별 p95_ms·p50_ms(라운드 중앙값), p95_range_ms(최소, 최대), peak_rss_mb(최대)
+    """
+    context = multiprocessing.get_context("spawn")
+    runs = [[] for _ in onnx_paths]
+    for r in range(rounds):
+        order = list(range(len(onnx_paths)))
+        for i in order if r % 2 == 0 else order[::-1]:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                bench = pool.submit(
+                    _benchmark_isolated, str(onnx_paths[i]), data_yaml, iterations
+                ).result()
+            latency = bench["latency_ms"].get("val", bench["latency_ms"]["noise"])
+            runs[i].append((latency["p95"], latency["p50"], bench["peak_rss_mb"]))
+
+    results = []
+    for samples in runs:
+        p95 = [p for p, _, _ in samples]
+        results.append(
+            {
+                "p95_ms": statistics.median(p95),
+                "p50_ms": statistics.median(p for _, p, _ in samples),
+                "p95_range_ms": [min(p95), max(p95)],
+                "peak_rss_mb": max(m for _, _, m in samples),
+            }
+        )
+    return results
+
+
+def evaluate_gate(
+    candidate: dict,
+    incumbent: dict,
+    max_map_drop: float = 0.0,
+    max_recall_drop: float = 0.02,
+    max_latency_increase: float = 0.05,
+    max_memory_increase: float = 0.10,
+    max_size_increase: float = 0.10,
+    min_map_gain: float = 0.005,
+    min_latency_gain: float = 0.05,
+) -> tuple:
+    """
+    승격 조건 판정
+
+    - 허용 기준: mAP50 하락, 클래스별 Recall 하락, p95 / 메모리 / 크기 증가율이 모두 허용치 이내
+    - 우위 조건: mAP50이 min_map_gain 이상 높거나 p95 지연이 min_latency_gain(비율) 이상 낮음
+      (같은 모델을 다시 내보낸 후보가 측정 잡음만으로 승격되지 않도록)
+
+    Returns:
+        tuple: (승격 여부, 항목별 검사 결과 list[(이름, 통과 여부, 설명)])
+    """
+    checks = [
+        (
+            "mAP50",
+            candidate["mAP50"] >= incumbent["mAP50"] - max_map_drop,
+            f"{incumbent['mAP50']:.4f} -> {candidate['mAP50']:.4f} (max drop {max_map_drop})",
+        )
+    ]
+    for name, recall in incumbent["recall"].items():
+        checks.append(
+            (
+                f"recall[{name}]",
+                candidate["recall"].get(name, 0.0) >= recall - max_recall_drop,
+                f"{recall:.4f} -> {candidate['recall'].get(name, 0.0):.4f} (max drop {max_recall_drop})",
+            )
+        )
+    for key, limit in (
+        ("p95_ms", max_latency_increase),
+        ("peak_rss_mb", max_memory_increase),
+        ("size_mb", max_size_increase),
+    ):
+        checks.append(
+            (
+                key,
+                candidate[key] <= incumbent[key] * (1 + limit),
+                f"{incumbent[key]:.2f} -> {candidate[key]:.2f} (max +{limit:.0%})",
+            )
+        )
+
+    map_gain = candidate["mAP50"] - incumbent["mAP50"]
+    latency_gain = 1 - candidate["p95_ms"] / incumbent["p95_ms"]
+    wins = (map_gain > 0 and map_gain >= min_map_gain) or (
+        latency_gain > 0 and latency_gain >= min_latency_gain
+    )
+    checks.append(
+        (
+            "wins (mAP50 or p95)",
+            wins,
+            f"mAP50 {map_gain:+.4f} (min +{min_map_gain}), "
+            f"p95 {-latency_gain:+.1%} (min -{min_latency_gain:.0%})",
+        )
+    )
+    return all(ok for _, ok, _ in checks), checks
+
+
+def promote(candidate_path: str, target_path: str, archive_dir: str = None) -> Path:
+    """
+    후보 모델을 target_path로 원자적으로 교체 (기존 모델은 archive에 보관)
+
+    같은 디렉토리의 임시 파일에 복사한 뒤 os.replace로 바꾸므로
+    앱이 읽는 도중에도 반쯤 쓰인 파일이 보이지 않습니다.
+    클래스별 임계값 파일(<이름>.thresholds.json)도 모델과 함께 교체하고,
+    후보에 임계값 파일이 없으면 이전 모델용 파일은 보관 후 제거합니다.
+
+    Returns:
+        Path: 보관된 기존 모델 경로 (없었으면 None)
+    """
+    target_path = Path(target_path)
+    archived = None
+    if target_path.exists():
+        archive_dir = Path(archive_dir or target_path.parent / "archive")
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        prefix = f"{target_path.stem}_{time.strftime('%Y%m%d-%H%M%S')}_{model_hash(str(target_path))}"
+        archived = archive_dir / f"{prefix}{target_path.suffix}"
+        shutil.copy2(target_path, archived)
+        if thresholds_path(target_path).exists():
+            shutil.copy2(
+                thresholds_path(target_path), archive_dir / f"{prefix}.thresholds.json"
+            )
+
+    pairs = [(Path(candidate_path), target_path)]
+    if thresholds_path(candidate_path).exists():
+        pairs.append((thresholds_path(candidate_path), thresholds_path(target_path)))
+    elif thresholds_path(target_path).exists():
+        thresholds_path(target_path).unlink()
+
+    for source, target in pairs:
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, target)
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare a candidate ONNX model with the deployed one and promote it if it wins"
+    )
+    parser.add_argument(
+        "--candidate", type=str, required=True, help="후보 .onnx 모델 경로"
+    )
+    parser.add_argument(
+        "--current",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="현재 배포 모델 (승격 대상 경로)",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=0.5,
+        help="운영점 confidence (모델 옆 thresholds.json이 있으면 그 값을 사용)",
+    )
+    parser.add_argument("--nms", type=float, default=0.45, help="운영점 NMS IoU 임계값")
+    parser.add_argument(
+        "--iterations", type=int, default=200, help="라운드당 지연 측정 반복 횟수"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=5, help="두 모델을 번갈아 측정할 라운드 수"
+    )
+    parser.add_argument("--max-map-drop", type=float, default=0.0)
+    parser.add_argument("--max-recall-drop", type=float, default=0.02)
+    parser.add_argument("--max-latency-increase", type=float, default=0.05)
+    parser.add_argument("--max-memory-increase", type=float, default=0.10)
+    parser.add_argument("--max-size-increase", type=float, default=0.10)
+    parser.add_argument(
+        "--min-map-gain",
+        type=float,
+        default=0.005,
+        help="mAP50 우위로 인정할 최소 상승폭",
+    )
+    parser.add_argument(
+        "--min-latency-gain",
+        type=float,
+        default=0.05,
+        help="p95 지연 우위로 인정할 최소 감소율 (0.05 = 5%%)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="비교만 하고 승격하지 않음"
+    )
+
+    args = parser.parse_args()
+
+    current_path = Path(args.current)
+    candidate = measure_model(args.candidate, args.data, args.conf, args.nms)
+
+    if current_path.exists():
+        incumbent = measure_model(str(current_path), args.data, args.conf, args.nms)
+        latency = measure_latency(
+            [args.candidate, str(current_path)], args.data, args.iterations, args.rounds
+        )
+        candidate.update(latency[0])
+        incumbent.update(latency[1])
+        passed, checks = evaluate_gate(
+            candidate,
+            incumbent,
+            args.max_map_drop,
+            args.max_recall_drop,
+            args.max_latency_increase,
+            args.max_memory_increase,
+            args.max_size_increase,
+            args.min_map_gain,
+            args.min_latency_gain,
+        )
+        print(f"\nPromotion gate: {args.candidate} vs {current_path}")
+        print(
+            f"  p95 median over {args.rounds} interleaved rounds: candidate "
+            f"{candidate['p95_ms']:.2f} ms ({candidate['p95_range_ms'][0]:.2f}-"
+            f"{candidate['p95_range_ms'][1]:.2f}), incumbent {incumbent['p95_ms']:.2f} ms "
+            f"({incumbent['p95_range_ms'][0]:.2f}-{incumbent['p95_range_ms'][1]:.2f})"
+        )
+        for name, ok, detail in checks:
+            print(f"  [{'PASS' if ok else 'FAIL'}] {name:24s} {detail}")
+    else:
+        print(f"\nNo deployed model at {current_path} — candidate will be installed")
+        candidate.update(
+            measure_latency([args.candidate], args.data, args.iterations, 1)[0]
+        )
+        incumbent, passed, checks = None, True, []
+
+    if not passed:
+        print("\nCandidate NOT promoted.")
+        raise SystemExit(1)
+    if args.dry_run:
+        print("\nGate passed (dry run, not promoted).")
+        raise SystemExit(0)
+
+    archived = promote(args.candidate, current_path)
+    with open(
+        current_path.with_name("promotion_log.jsonl"), "a", encoding="utf-8"
+    ) as f:
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "target": str(current_path),
+            "archived": str(archived) if archived else None,
+            "candidate": candidate,
+            "incumbent": incumbent,
+        }
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print(f"\nPromoted {args.candidate} -> {current_path}")
+    if archived:
+        print(f"  Previous model archived: {archived}")
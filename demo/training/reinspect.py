@@ -0,0 +1,367 @@
+"""
+보관 영상·이미지 일괄 재검사 CLI (파이프라인 처리)
+
+새 모델을 배포할 때 기존 검사 영상/이미지 덤프를 다시 채점합니다.
+프레임을 하나씩 처리하지 않고, 크기가 제한된 큐로 연결된 단계를 동시에 실행합니다.
+
+    [디코드 스레드 × N] → decode 큐 → [추론 스레드: 배치 추론] → infer 큐 → [후처리 스레드 → JSONL/CSV]
+
+- 디코드 단계: 이미지 읽기 + Letterbox + 텐서 변환 (디렉토리는 N개 스레드, 영상은 순차 디코딩이라 1개)
+- 추론 단계: 최대 --batch 프레임을 모아 한 번에 추론 (동적 배치 모델 권장: export_onnx.py --dynamic-batch)
+- 후처리 단계: EggDetector와 같은 디코딩 + NMS, 결과 기록
+
+종료 시 지속 처리량(frames/s)과 큐 점유율(평균/최대)을 출력합니다.
+"""
+
+from pathlib import Path
+import argparse
+import csv
+import json
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from egg_detector import EggDetector
+from evaluate_onnx import IMAGE_SUFFIXES
+
+_DONE = object()  # 단계 종료 신호
+
+
+def list_sources(source: str) -> list:
+    """
+    재검사 대상 목록
+
+    Returns:
+        list[Path]: 디렉토리면 이미지 파일 전체(하위 폴더 포함, 정렬), 아니면 [영상 파일]
+    """
+    source = Path(source)
+    if source.is_dir():
+        return sorted(
+            p for p in source.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES
+        )
+    return [source]
+
+
+class PipelineStats:
+    """단계별 큐 점유율 샘플링 + 처리량 집계"""
+
+    def __init__(self, queues: dict, interval: float = 0.05):
+        self.queues = queues
+        self.interval = interval
+        self.samples = {name: [] for name in queues}
+        self.frames = 0
+        self.start = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            for name, q in self.queues.items():
+                self.samples[name].append(q.qsize() / q.maxsize)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.start
+        return {
+            "frames": self.frames,
+            "elapsed_s": elapsed,
+            "frames_per_sec": self.frames / elapsed if elapsed else 0.0,
+            "queue_occupancy": {
+                name: {
+                    "mean": float(np.mean(s)) if s else 0.0,
+                    "max": float(np.max(s)) if s else 0.0,
+                }
+                for name, s in self.samples.items()
+            },
+        }
+
+
+class ResultWriter:
+    """탐지 결과 기록 (.jsonl: 프레임당 한 줄, .csv: 탐지당 한 줄)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "w", encoding="utf-8", newline="")
+        self.csv = None
+        if self.path.suffix.lower() == ".csv":
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(
+                [
+                    "source",
+                    "frame",
+                    "class_id",
+                    "class_name",
+                    "confidence",
+                    "x",
+                    "y",
+                    "w",
+                    "h",
+                ]
+            )
+
+    def write(self, source: str, frame: int, records: list):
+        if self.csv is None:
+            self.file.write(
+                json.dumps(
+                    {"source": source, "frame": frame, "detections": records},
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+            return
+        for r in records:
+            self.csv.writerow(
+                [
+                    source,
+                    frame,
+                    r["class_id"],
+                    r["class_name"],
+                    f"{r['confidence']:.4f}",
+                    *r["box"],
+                ]
+            )
+
+    def close(self):
+        self.file.close()
+
+
+def reinspect(
+    model_path: str,
+    source: str,
+    output: str,
+    decode_threads: int = 4,
+    batch: int = 8,
+    queue_size: int = 32,
+    conf_threshold=0.5,
+    nms_threshold: float = 0.45,
+    thresholds_json: str = None,
+    session_profile: str = None,
+    progress_interval: float = 5.0,
+) -> dict:
+    """
+    디렉토리/영상 재검사 파이프라인 실행
+
+    Returns:
+        dict: 처리 프레임 수, 처리량, 큐 점유율
+    """
+    detector = EggDetector(
+        model_path,
+        conf_threshold=conf_threshold,
+        nms_threshold=nms_threshold,
+        thresholds_json=thresholds_json,
+        session_profile=session_profile,
+    )
+    items = list_sources(source)
+    is_video = len(items) == 1 and items[0].suffix.lower() not in IMAGE_SUFFIXES
+    if is_video:
+        decode_threads = 1  # 영상은 순차 디코딩
+
+    decode_q = queue.Queue(maxsize=queue_size)
+    infer_q = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def guarded(fn):
+        def run(*args):
+            try:
+                fn(*args)
+            except Exception as e:  # 한 단계가 실패하면 나머지 단계도 멈추도록 기록
+                errors.append(e)
+
+        return run
+
+    def put(q, item):
+        # 다음 단계가 실패해 큐가 비워지지 않아도 멈추지 않도록 제한 시간마다 오류 확인
+        while not errors:
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q):
+        # 앞 단계가 실패해 _DONE이 오지 않아도 멈추지 않도록 제한 시간마다 오류 확인
+        while not errors:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    # 1) 디코드: (source, frame, shape, tensor, params)
+    path_q = queue.Queue()
+    for item in items:
+        path_q.put(item)
+
+    def decode_worker():
+        while not errors:
+            try:
+                path = path_q.get_nowait()
+            except queue.Empty:
+                break
+            if is_video:
+                capture = cv2.VideoCapture(str(path))
+                index = 0
+                while not errors:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    tensor, params = detector.preprocess(frame)
+                    put(decode_q, (str(path), index, frame.shape[:2], tensor, params))
+                    index += 1
+                capture.release()
+            else:
+                image = cv2.imread(str(path))
+                if image is None:
+                    print(f"  Skipping unreadable image: {path}")
+                    continue
+                tensor, params = detector.preprocess(image)
+                put(decode_q, (str(path), 0, image.shape[:2], tensor, params))
+
+    # 2) 추론: 큐에 있는 만큼(최대 batch) 모아서 한 번에 실행
+    def infer_worker():
+        finished = False
+        try:
+            while not finished and not errors:
+                pending = [get(decode_q)]
+                while len(pending) < batch and pending[-1] is not _DONE:
+                    try:
+                        pending.append(decode_q.get_nowait())
+                    except queue.Empty:
+                        break
+                if pending[-1] is _DONE:
+                    pending.pop()
+                    finished = True
+                if pending:
+                    outputs = detector.infer_batch([p[3] for p in pending])
+                    for p, out in zip(pending, outputs):
+                        put(infer_q, (p[0], p[1], p[2], out, p[4]))
+        finally:
+            put(infer_q, _DONE)
+
+    # 3) 후처리 + 기록
+    writer = ResultWriter(output)
+
+    def post_worker(stats):
+        last_report = time.perf_counter()
+        while not errors:
+            item = get(infer_q)
+            if item is _DONE:
+                break
+            source_name, index, shape, out, params = item
+            detections = detector.postprocess(out, params, shape)
+            writer.write(source_name, index, detector.to_records(detections))
+            stats.frames += 1
+            if time.perf_counter() - last_report >= progress_interval:
+                last_report = time.perf_counter()
+                s = stats.summary()
+                print(
+                    f"  {s['frames']} frames, {s['frames_per_sec']:.1f} frames/s, "
+                    f"queues decode={decode_q.qsize()}/{queue_size} infer={infer_q.qsize()}/{queue_size}"
+                )
+
+    print(f"\nRe-inspecting {source} with {model_path}")
+    print(
+        f"  {'video' if is_video else f'{len(items)} images'}, decode threads={decode_threads}, "
+        f"batch={batch}, queue size={queue_size}"
+    )
+
+    with PipelineStats({"decode": decode_q, "infer": infer_q}) as stats:
+        decoders = [
+            threading.Thread(target=guarded(decode_worker), daemon=True)
+            for _ in range(decode_threads)
+        ]
+        inference = threading.Thread(target=guarded(infer_worker), daemon=True)
+        post = threading.Thread(target=guarded(post_worker), args=(stats,), daemon=True)
+        for t in decoders + [inference, post]:
+            t.start()
+
+        for t in decoders:
+            t.join()
+        put(decode_q, _DONE)
+        inference.join()
+        post.join()
+    writer.close()
+
+    if errors:
+        raise errors[0]
+
+    summary = stats.summary()
+    print(
+        f"\nProcessed {summary['frames']} frames in {summary['elapsed_s']:.1f}s "
+        f"({summary['frames_per_sec']:.1f} frames/s sustained)"
+    )
+    for name, occ in summary["queue_occupancy"].items():
+        print(
+            f"  {name:7s} queue occupancy: mean {occ['mean']:.0%}, max {occ['max']:.0%}"
+        )
+    print(f"  Results: {output}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-score an image folder or video file with an ONNX model (pipelined)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model (동적 배치 모델 권장)",
+    )
+    parser.add_argument(
+        "--source", type=str, required=True, help="이미지 디렉토리 또는 영상 파일"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="runs/reinspect/detections.jsonl",
+        help="결과 파일 (.jsonl 또는 .csv)",
+    )
+    parser.add_argument(
+        "--decode-threads", type=int, default=4, help="디코드 스레드 수"
+    )
+    parser.add_argument("--batch", type=int, default=8, help="최대 추론 배치 크기")
+    parser.add_argument("--queue-size", type=int, default=32, help="단계 간 큐 크기")
+    parser.add_argument("--conf", type=float, default=0.5, help="confidence 임계값")
+    parser.add_argument("--nms", type=float, default=0.45, help="NMS IoU 임계값")
+    parser.add_argument(
+        "--thresholds", type=str, default=None, help="클래스별 임계값 JSON"
+    )
+    parser.add_argument(
+        "--session-profile",
+        type=str,
+        default=None,
+        help="tune_session.py 프로파일 JSON",
+    )
+    parser.add_argument(
+        "--summary", type=str, default=None, help="처리량·큐 점유율 JSON 저장 경로"
+    )
+
+    args = parser.parse_args()
+
+    summary = reinspect(
+        args.model,
+        args.source,
+        args.output,
+        decode_threads=args.decode_threads,
+        batch=args.batch,
+        queue_size=args.queue_size,
+        conf_threshold=args.conf,
+        nms_threshold=args.nms,
+        thresholds_json=args.thresholds,
+        session_profile=args.session_profile,
+    )
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
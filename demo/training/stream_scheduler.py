@@ -0,0 +1,343 @@
+"""
+다중 카메라 스트림용 마이크로 배치 추론 스케줄러
+
+검사 PC 한 대에 카메라가 여러 대 연결되어 있어도 지금은 카메라마다 프레임당 동기 Detect를 호출합니다.
+MicroBatchScheduler는 여러 스트림의 프레임을 하나의 공유 ONNX Runtime 세션으로 모아 처리합니다.
+    - 최대 배치 크기(max_batch) 또는 최대 대기 시간(max_delay_ms) 중 먼저 도달하는 쪽에서 배치를 실행
+    - 결과는 submit()이 돌려준 Future로 각 스트림에 전달
+    - 대기열이 가득 차면 submit()이 queue.Full을 발생 (실시간 카메라는 오래된 프레임을 버리는 편이 낫기 때문)
+
+배치 이득을 보려면 동적 배치 모델(export_onnx.py --dynamic-batch)을 사용하세요.
+
+시뮬레이션 (영상 파일을 카메라처럼 재생):
+    python stream_scheduler.py --model ../models/egg_classifier_dyn.onnx --videos line1.mp4 line2.mp4 \\
+        --streams 1 2 4 8 --fps 15 --compare-sync
+"""
+
+from concurrent.futures import Future
+import argparse
+import json
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from egg_detector import EggDetector
+
+_STOP = object()
+
+
+class MicroBatchScheduler:
+    """
+    여러 스트림의 프레임을 마이크로 배치로 묶어 공유 세션에서 추론
+
+    Args:
+        detector: 공유 EggDetector (세션 1개)
+        max_batch: 배치당 최대 프레임 수
+        max_delay_ms: 배치의 첫 프레임이 대기열에 들어온 뒤 최대 대기 시간
+        max_queue: 대기열 최대 길이 (초과 시 submit()에서 queue.Full)
+    """
+
+    def __init__(
+        self,
+        detector: EggDetector,
+        max_batch: int = 8,
+        max_delay_ms: float = 5.0,
+        max_queue: int = 64,
+    ):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.batch_sizes = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, stream_id, frame: np.ndarray) -> Future:
+        """
+        프레임 제출 (전처리는 호출한 스트림 스레드에서 수행)
+
+        Returns:
+            Future: 결과는 (stream_id, [N, 6] 탐지 결과)
+        """
+        tensor, params = self.detector.preprocess(frame)
+        future = Future()
+        self._queue.put_nowait(
+            (stream_id, tensor, params, frame.shape[:2], future, time.perf_counter())
+        )
+        return future
+
+    def pending(self) -> int:
+        """대기 중인 프레임 수"""
+        return self._queue.qsize()
+
+    def _collect(self):
+        """첫 프레임 도착 후 max_batch개 또는 max_delay까지 모으기"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = first[5] + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # 현재 배치 처리 후 종료
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            self.batch_sizes.append(len(batch))
+            try:
+                outputs = self.detector.infer_batch([item[1] for item in batch])
+            except Exception as e:
+                for item in batch:
+                    item[4].set_exception(e)
+                continue
+            for (stream_id, _, params, shape, future, _), out in zip(batch, outputs):
+                # 한 프레임의 후처리 실패가 워커 스레드를 죽이지 않도록 프레임별로 전달
+                try:
+                    result = (stream_id, self.detector.postprocess(out, params, shape))
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+
+    def close(self):
+        """대기 중인 프레임을 모두 처리한 뒤 종료"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_frames(video_path: str, max_frames: int = 120) -> list:
+    """시뮬레이션용 프레임을 메모리에 미리 디코딩 (카메라 캡처 비용 제외)"""
+    capture = cv2.VideoCapture(str(video_path))
+    frames = []
+    while len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise FileNotFoundError(f"No frames could be read from {video_path}")
+    return frames
+
+
+def _percentiles(values: list) -> dict:
+    ms = np.asarray(values) * 1000
+    if ms.size == 0:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {f"p{q}": float(np.percentile(ms, q)) for q in (50, 95, 99)}
+
+
+def simulate(
+    detector: EggDetector,
+    videos: list,
+    num_streams: int,
+    frames_per_stream: int = 100,
+    fps: float = 15.0,
+    max_batch: int = 8,
+    max_delay_ms: float = 5.0,
+    max_queue: int = 64,
+) -> dict:
+    """
+    N개 스트림 시뮬레이션
+
+    각 스트림은 영상 프레임을 fps 간격으로 제출합니다 (fps=0이면 결과를 받은 즉시 다음 프레임 제출).
+    지연 = 제출 직전 시각 → 결과 수신 시각 (전처리 + 대기 + 추론 + 후처리)
+
+    Returns:
+        dict: 스트림별 지연 백분위, 버린 프레임 수, 전체 처리량, 평균 배치 크기
+    """
+    sources = [load_frames(v) for v in videos]
+    latencies = [[] for _ in range(num_streams)]
+    dropped = [0] * num_streams
+    lock = threading.Lock()
+
+    def stream(sid, scheduler):
+        frames = sources[sid % len(sources)]
+        futures = []
+        next_time = time.perf_counter()
+        for i in range(frames_per_stream):
+            if fps:
+                next_time += 1 / fps
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+            start = time.perf_counter()
+            try:
+                future = scheduler.submit(sid, frames[i % len(frames)])
+            except queue.Full:
+                dropped[sid] += 1
+                continue
+
+            def record(f, start=start):
+                f.result()
+                with lock:
+                    latencies[sid].append(time.perf_counter() - start)
+
+            future.add_done_callback(record)
+            futures.append(future)
+            if not fps:
+                future.result()
+        for future in futures:
+            future.result()
+
+    start = time.perf_counter()
+    with MicroBatchScheduler(detector, max_batch, max_delay_ms, max_queue) as scheduler:
+        threads = [
+            threading.Thread(target=stream, args=(sid, scheduler))
+            for sid in range(num_streams)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - start
+
+    completed = sum(len(l) for l in latencies)
+    return {
+        "streams": num_streams,
+        "max_batch": max_batch,
+        "max_delay_ms": max_delay_ms,
+        "fps_per_stream": fps,
+        "throughput": completed / elapsed,
+        "mean_batch": (
+            float(np.mean(scheduler.batch_sizes)) if scheduler.batch_sizes else 0.0
+        ),
+        "dropped": sum(dropped),
+        "latency_ms": _percentiles([x for l in latencies for x in l]),
+        "per_stream": [
+            {
+                "stream": sid,
+                "frames": len(l),
+                "dropped": dropped[sid],
+                **_percentiles(l),
+            }
+            for sid, l in enumerate(latencies)
+        ],
+    }
+
+
+def print_result(result: dict, label: str):
+    lat = result["latency_ms"]
+    print(
+        f"  {label:12s} {result['streams']:7d} {result['throughput']:9.1f} "
+        f"{result['mean_batch']:6.2f} {result['dropped']:7d} "
+        f"{lat['p50']:8.1f} {lat['p95']:8.1f} {lat['p99']:8.1f}"
+    )
+    for s in result["per_stream"]:
+        print(
+            f"  {'':12s} {'#' + str(s['stream']):>7s} {'':9s} {'':6s} {s['dropped']:7d} "
+            f"{s['p50']:8.1f} {s['p95']:8.1f} {s['p99']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate several camera streams sharing one ONNX session via micro-batching"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model (동적 배치 모델 권장)",
+    )
+    parser.add_argument(
+        "--videos",
+        type=str,
+        nargs="+",
+        required=True,
+        help="스트림으로 재생할 영상 파일",
+    )
+    parser.add_argument(
+        "--streams",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="시뮬레이션할 스트림 수",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=100, help="스트림당 제출 프레임 수"
+    )
+    parser.add_argument(
+        "--fps", type=float, default=15.0, help="스트림당 프레임 속도 (0 = 최대 속도)"
+    )
+    parser.add_argument("--max-batch", type=int, default=8, help="최대 배치 크기")
+    parser.add_argument(
+        "--max-delay-ms", type=float, default=5.0, help="배치 최대 대기 시간 (ms)"
+    )
+    parser.add_argument("--max-queue", type=int, default=64, help="대기열 최대 길이")
+    parser.add_argument(
+        "--compare-sync",
+        action="store_true",
+        help="배치 없는 기준(max_batch=1)도 함께 측정",
+    )
+    parser.add_argument(
+        "--session-profile",
+        type=str,
+        default=None,
+        help="tune_session.py 프로파일 JSON",
+    )
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+
+    detector = EggDetector(args.model, session_profile=args.session_profile)
+    if detector.batch_size == 1:
+        print(
+            "  ※ Fixed batch-1 model: batches run frame by frame (export with --dynamic-batch)"
+        )
+
+    print(
+        f"\nStreams @ {args.fps or 'max'} fps, {args.frames} frames each, "
+        f"max_batch={args.max_batch}, max_delay={args.max_delay_ms} ms"
+    )
+    print(
+        f"  {'mode':12s} {'streams':>7s} {'frames/s':>9s} {'batch':>6s} {'dropped':>7s}"
+        f" {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}"
+    )
+
+    results = []
+    for n in args.streams:
+        modes = [("micro-batch", args.max_batch, args.max_delay_ms)]
+        if args.compare_sync:
+            modes.append(("sync", 1, 0.0))
+        for label, max_batch, max_delay in modes:
+            result = simulate(
+                detector,
+                args.videos,
+                n,
+                frames_per_stream=args.frames,
+                fps=args.fps,
+                max_batch=max_batch,
+                max_delay_ms=max_delay,
+                max_queue=args.max_queue,
+            )
+            result["mode"] = label
+            results.append(result)
+            print_result(result, label)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved: {args.output}")
@@ -0,0 +1,342 @@
+"""
+고해상도 트레이 이미지용 타일 추론
+
+트레이 전체 사진(계란 30개, 고해상도)을 640×640으로 Letterbox하면 작은 크랙이 사라지고,
+모델을 더 큰 입력으로 내보내면 너무 느립니다. TiledDetector는 내보낸 모델 그대로
+겹치는 타일로 잘라 한 세션에서 배치로 추론하고, 타일 좌표를 원본 좌표로 옮긴 뒤 타일 경계의 중복 박스를 합칩니다.
+
+    - 타일 크기·겹침 비율 조절 (--tiles, --overlaps), 타일 크기 = 모델 입력 크기면 축소 없음
+    - 내부 타일 경계에 닿은 박스는 잘린 계란이므로 버림 (겹침이 계란 크기보다 크면 이웃 타일에 온전히 있음)
+    - 전체 이미지 Letterbox 결과도 함께 합침 (타일보다 큰 물체용, --no-full로 끔)
+    - 합치기: nms (앱과 같은 클래스 무관 Greedy NMS) 또는 wbf (Weighted Box Fusion, 같은 클래스 묶음의 confidence 가중 평균 박스)
+
+검증 데이터로 정확도 vs 처리량 리포트:
+    python tiled_inference.py --model ../models/egg_classifier_dyn.onnx --data ../data/trays.yaml \\
+        --tiles 640 960 --overlaps 0.1 0.25 --merge nms wbf
+
+단일 이미지:
+    python tiled_inference.py --model ../models/egg_classifier.onnx --source tray.jpg --tiles 640 --overlaps 0.2
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+import evaluate_onnx as ev
+from egg_detector import EggDetector, nms_rects
+from egg_tracker import iou_matrix
+
+
+def tile_grid(h: int, w: int, tile: int, overlap: float) -> list:
+    """
+    겹치는 타일 좌표 (마지막 타일은 이미지 끝에 맞춤)
+
+    Returns:
+        list[tuple]: (x0, y0, x1, y1)
+    """
+    step = max(1, int(tile * (1 - overlap)))
+
+    def starts(size):
+        if size <= tile:
+            return [0]
+        points = list(range(0, size - tile + 1, step))
+        if points[-1] != size - tile:
+            points.append(size - tile)
+        return points
+
+    return [
+        (x, y, min(x + tile, w), min(y + tile, h)) for y in starts(h) for x in starts(w)
+    ]
+
+
+def merge_nms(dets: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """앱 ApplyNMS와 같은 클래스 무관 Greedy NMS로 합치기"""
+    if len(dets) == 0:
+        return dets
+    rects = np.concatenate([dets[:, :2], dets[:, 2:4] - dets[:, :2]], 1).astype(
+        np.int32
+    )
+    return dets[nms_rects(rects, dets[:, 4], iou_threshold)]
+
+
+def merge_wbf(dets: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Weighted Box Fusion으로 합치기
+
+    confidence 내림차순으로 같은 클래스·IoU 이상 박스를 묶고, 묶음 박스는 confidence 가중 평균,
+    confidence는 묶음 최댓값 (타일마다 같은 계란이 보이는 횟수가 달라 평균은 쓰지 않음)
+    """
+    if len(dets) == 0:
+        return dets
+    dets = dets[np.argsort(-dets[:, 4], kind="stable")]
+    fused, members = [], []
+    for det in dets:
+        if fused:
+            boxes = np.array(fused)
+            ious = iou_matrix(det[None, :4], boxes[:, :4])[0]
+            ious[boxes[:, 5] != det[5]] = 0
+            best = int(ious.argmax())
+            if ious[best] > iou_threshold:
+                members[best].append(det)
+                group = np.array(members[best])
+                weights = group[:, 4:5]
+                fused[best][:4] = (group[:, :4] * weights).sum(0) / weights.sum()
+                continue
+        fused.append(det.copy())
+        members.append([det])
+    merged = np.array(fused, dtype=np.float32)
+    merged[:, :4] = np.round(merged[:, :4])
+    return merged[np.argsort(-merged[:, 4], kind="stable")]
+
+
+class TiledDetector:
+    """
+    겹치는 타일 배치 추론 + 경계 박스 병합
+
+    Args:
+        detector: EggDetector (동적 배치 모델이면 타일 전체가 한 번에 추론됨)
+        tile: 타일 크기 (px)
+        overlap: 타일 겹침 비율 (0~1)
+        merge: "nms" 또는 "wbf"
+        merge_iou: 병합 IoU 임계값 (기본: detector.nms_threshold)
+        include_full: 전체 이미지 Letterbox 결과도 합칠지 여부
+        edge_margin: 내부 타일 경계에서 이 거리(px) 안에 닿은 박스는 버림
+    """
+
+    def __init__(
+        self,
+        detector: EggDetector,
+        tile: int = 640,
+        overlap: float = 0.2,
+        merge: str = "nms",
+        merge_iou: float = None,
+        include_full: bool = True,
+        edge_margin: int = 4,
+    ):
+        if merge not in ("nms", "wbf"):
+            raise ValueError(f"Unknown merge method: {merge}")
+        self.detector = detector
+        self.tile = tile
+        self.overlap = overlap
+        self.merge = merge
+        self.merge_iou = detector.nms_threshold if merge_iou is None else merge_iou
+        self.include_full = include_full
+        self.edge_margin = edge_margin
+
+    def _keep_inside(self, dets: np.ndarray, box: tuple, shape: tuple) -> np.ndarray:
+        """이미지 테두리가 아닌 타일 경계에 닿은 (잘린) 박스 제거"""
+        x0, y0, x1, y1 = box
+        h, w = shape
+        m = self.edge_margin
+        cut = np.zeros(len(dets), dtype=bool)
+        if x0 > 0:
+            cut |= dets[:, 0] <= m
+        if y0 > 0:
+            cut |= dets[:, 1] <= m
+        if x1 < w:
+            cut |= dets[:, 2] >= (x1 - x0) - m
+        if y1 < h:
+            cut |= dets[:, 3] >= (y1 - y0) - m
+        return dets[~cut]
+
+    def detect(self, image: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: [N, 6] (x1, y1, x2, y2, conf, class_id), 신뢰도 내림차순
+        """
+        shape = image.shape[:2]
+        boxes = tile_grid(*shape, self.tile, self.overlap)
+        crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in boxes]
+        if self.include_full and len(boxes) > 1:
+            crops.append(image)
+        inputs = [self.detector.preprocess(crop) for crop in crops]
+        outputs = self.detector.infer_batch([t for t, _ in inputs])
+
+        merged = []
+        for i, (crop, (_, params), out) in enumerate(zip(crops, inputs, outputs)):
+            dets = self.detector.postprocess(out, params, crop.shape[:2])
+            if i < len(boxes) and len(boxes) > 1:
+                x0, y0 = boxes[i][:2]
+                dets = self._keep_inside(dets, boxes[i], shape)
+                dets[:, [0, 2]] += x0
+                dets[:, [1, 3]] += y0
+            merged.append(dets)
+        dets = np.concatenate(merged) if merged else np.zeros((0, 6), np.float32)
+        if self.merge == "wbf":
+            return merge_wbf(dets, self.merge_iou)
+        return merge_nms(dets, self.merge_iou)
+
+
+def evaluate_tiling(
+    detector: EggDetector,
+    data_yaml: str,
+    configs: list,
+    num_images: int = None,
+    split: str = "val",
+    include_full: bool = True,
+) -> list:
+    """
+    타일 구성별 정확도(mAP) vs 처리량
+
+    Args:
+        configs: [(tile, overlap, merge)] — tile=None이면 기존 전체 Letterbox
+
+    Returns:
+        list[dict]: 구성별 mAP50, mAP50-95, precision, recall, 이미지당 타일 수, images/s
+    """
+    image_paths, label_paths, class_names = ev.load_dataset(data_yaml, split)
+    image_paths, label_paths = image_paths[:num_images], label_paths[:num_images]
+    images = [cv2.imread(str(p)) for p in image_paths]
+    labels = [
+        ev.load_labels(lp, img.shape[1], img.shape[0])
+        for lp, img in zip(label_paths, images)
+    ]
+    detector.detect(images[0])  # 워밍업
+
+    rows = []
+    for tile, overlap, merge in configs:
+        if tile is None:
+            run, tiles = detector.detect, 1.0
+        else:
+            run = TiledDetector(
+                detector, tile, overlap, merge, include_full=include_full
+            ).detect
+            counts = [len(tile_grid(*img.shape[:2], tile, overlap)) for img in images]
+            tiles = float(np.mean([n + (include_full and n > 1) for n in counts]))
+        start = time.perf_counter()
+        dets = [run(img) for img in images]
+        elapsed = time.perf_counter() - start
+
+        metrics = ev.summarize(
+            [ev.image_stats(d, l) for d, l in zip(dets, labels)], class_names
+        )
+        rows.append(
+            {
+                "tile": tile,
+                "overlap": overlap,
+                "merge": merge,
+                "tiles_per_image": tiles,
+                "images_per_sec": len(images) / elapsed,
+                "latency_ms": elapsed / len(images) * 1000,
+                **{k: metrics[k] for k in ("mAP50", "mAP50-95", "precision", "recall")},
+            }
+        )
+    return rows
+
+
+def print_report(rows: list):
+    print(
+        f"\n  {'config':24s} {'tiles':>6s} {'img/s':>7s} {'ms/img':>8s}"
+        f" {'mAP50':>7s} {'mAP50-95':>9s} {'P':>7s} {'R':>7s}"
+    )
+    for r in rows:
+        label = (
+            "letterbox (full image)"
+            if r["tile"] is None
+            else f"tile {r['tile']} ov {r['overlap']:.2f} {r['merge']}"
+        )
+        print(
+            f"  {label:24s} {r['tiles_per_image']:6.1f} {r['images_per_sec']:7.2f} {r['latency_ms']:8.1f}"
+            f" {r['mAP50']:7.4f} {r['mAP50-95']:9.4f} {r['precision']:7.4f} {r['recall']:7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tiled inference for high-resolution tray images"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model (동적 배치 모델 권장)",
+    )
+    parser.add_argument(
+        "--data", type=str, default=None, help="평가용 data.yaml (트레이 이미지)"
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=None,
+        help="단일 이미지 추론 (탐지 결과 JSON 출력)",
+    )
+    parser.add_argument(
+        "--tiles", type=int, nargs="+", default=[640], help="타일 크기 (px)"
+    )
+    parser.add_argument(
+        "--overlaps", type=float, nargs="+", default=[0.2], help="타일 겹침 비율"
+    )
+    parser.add_argument(
+        "--merge",
+        type=str,
+        nargs="+",
+        default=["nms"],
+        choices=["nms", "wbf"],
+        help="경계 박스 병합 방식",
+    )
+    parser.add_argument(
+        "--no-full",
+        action="store_true",
+        help="전체 이미지 Letterbox 결과를 합치지 않음",
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=None,
+        help="confidence 임계값 (기본: 평가 0.001, 단일 이미지 0.5)",
+    )
+    parser.add_argument("--nms", type=float, default=0.45, help="NMS IoU 임계값")
+    parser.add_argument(
+        "--num-images", type=int, default=None, help="평가 이미지 수 (기본: 전체)"
+    )
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+    if not args.data and not args.source:
+        parser.error("--data 또는 --source 중 하나가 필요합니다")
+
+    conf = args.conf if args.conf is not None else (0.5 if args.source else 0.001)
+    detector = EggDetector(args.model, conf_threshold=conf, nms_threshold=args.nms)
+
+    if args.source:
+        image = cv2.imread(args.source)
+        if image is None:
+            raise FileNotFoundError(f"Could not read {args.source}")
+        tiled = TiledDetector(
+            detector,
+            args.tiles[0],
+            args.overlaps[0],
+            args.merge[0],
+            include_full=not args.no_full,
+        )
+        start = time.perf_counter()
+        detections = tiled.detect(image)
+        elapsed = (time.perf_counter() - start) * 1000
+        result = {
+            "source": args.source,
+            "tiles": len(tile_grid(*image.shape[:2], args.tiles[0], args.overlaps[0])),
+            "latency_ms": elapsed,
+            "detections": detector.to_records(detections),
+        }
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        configs = [(None, 0.0, "nms")] + [
+            (t, o, m) for t in args.tiles for o in args.overlaps for m in args.merge
+        ]
+        rows = evaluate_tiling(
+            detector,
+            args.data,
+            configs,
+            args.num_images,
+            include_full=not args.no_full,
+        )
+        print_report(rows)
+        result = rows
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved: {args.output}")
@@ -13,6 +13,8 @@ import numpy as np
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 import sys
+import hashlib
+import json
 
 
 # ============================================================================
@@ -169,6 +171,15 @@ def train_model(
     pretrained: bool = True,
     # 클래스 가중치 (불균형 대응)
     auto_weight: bool = False,
+    # 지식 증류 (Teacher .pt 지정 시 활성화)
+    teacher: str = None,
+    distill_samples: int = 2000,
+    distill_feat_weight: float = 1.0,
+    distill_logit_weight: float = 1.0,
+    distill_temperature: float = 2.0,
+    copy_to_models: bool = True,
+    # 실험 캐시 (동일 조건 재학습 방지)
+    force: bool = False,
 ):
     """
     YOLOv8 고도화 학습
@@ -178,6 +189,10 @@ def train_model(
     2. 고급 데이터 증강 (CopyPaste, MixUp)
     3. Learning rate 스케줄링 (Cosine Annealing)
     4. Warm-up + Early stopping 조정
+    5. (선택) Teacher 모델로부터 지식 증류 (teacher 지정 시)
+
+    데이터·학습 파라미터·모델·라이브러리 버전이 모두 같은 완료된 실험이 있으면
+    학습을 건너뛰고 그 결과를 재사용합니다 (force=True 시 재학습).
     """
 
     # 사전 학습 모델 로드
@@ -204,6 +219,8 @@ def train_model(
     print(f"  📈 Cosine LR: {'ON' if cos_lr else 'OFF'}")
     print(f"  🔥 Warm-up: {warmup_epochs} epochs")
     print(f"  ⏸️  Early stopping: {early_stopping} patience")
+    if teacher:
+        print(f"  🧑‍🏫 지식 증류: {teacher} (T={distill_temperature})")
     print("=" * 60 + "\n")
 
     # ========================================
@@ -282,27 +299,78 @@ def train_model(
         )
 
     # ========================================
-    # 학습 시작
-    # ========================================
-    results = model.train(**train_args)
-
+    # 실험 캐시 확인
     # ========================================
-    # 결과 출력
-    # ========================================
-    print("\n" + "=" * 60)
-    print("🎉 학습 완료!")
-    print("=" * 60)
+    exp_key = experiment_key(
+        data_yaml,
+        train_args,
+        model_name,
+        teacher=teacher,
+        distill={
+            "samples": distill_samples,
+            "feat_weight": distill_feat_weight,
+            "logit_weight": distill_logit_weight,
+            "temperature": distill_temperature,
+        },
+    )
+    cached = None if force else lookup_experiment(exp_key)
 
-    best_model = Path(project) / name / "weights" / "best.pt"
-    last_model = Path(project) / name / "weights" / "last.pt"
+    if cached:
+        print("\n" + "=" * 60)
+        print(f"♻️  동일 조건의 완료된 실험 재사용 (키: {exp_key})")
+        print("   재학습하려면 --force 옵션을 사용하세요.")
+        print("=" * 60)
 
-    print(f"\n📦 모델 저장 위치:")
-    print(f"  Best: {best_model}")
-    print(f"  Last: {last_model}")
+        best_model = cached["best_model"]
+        metrics = cached["metrics"]
+    else:
+        # 지식 증류: Teacher 출력 캐시 준비 후 손실 교체 콜백 등록
+        if teacher:
+            cache_dir = build_teacher_cache(
+                teacher,
+                data_yaml,
+                imgsz=imgsz,
+                num_samples=distill_samples,
+                device=device,
+            )
+            model.add_callback(
+                "on_pretrain_routine_end",
+                _attach_distillation(
+                    cache_dir,
+                    kd_batch=batch if batch > 0 else 16,  # --batch -1 (autobatch)
+                    feat_weight=distill_feat_weight,
+                    logit_weight=distill_logit_weight,
+                    temperature=distill_temperature,
+                ),
+            )
+
+        # ========================================
+        # 학습 시작
+        # ========================================
+        results = model.train(**train_args)
+
+        # ========================================
+        # 결과 출력
+        # ========================================
+        print("\n" + "=" * 60)
+        print("🎉 학습 완료!")
+        print("=" * 60)
+
+        # ultralytics 버전에 따라 실제 저장 위치가 다를 수 있으므로 trainer 기준으로 확인
+        save_dir = Path(getattr(model.trainer, "save_dir", Path(project) / name))
+        best_model = save_dir / "weights" / "best.pt"
+        last_model = save_dir / "weights" / "last.pt"
+
+        print(f"\n📦 모델 저장 위치:")
+        print(f"  Best: {best_model}")
+        print(f"  Last: {last_model}")
+
+        metrics = getattr(results, "results_dict", None)
+        if best_model.exists():
+            store_experiment(exp_key, best_model, metrics, train_args)
 
     # 최종 메트릭 출력
-    if hasattr(results, "results_dict"):
-        metrics = results.results_dict
+    if metrics:
         print(f"\n📊 최종 검증 메트릭:")
         print(f"  mAP50:       {metrics.get('metrics/mAP50(B)', 0):.4f}")
         print(f"  mAP50-95:    {metrics.get('metrics/mAP50-95(B)', 0):.4f}")
@@ -313,8 +381,14 @@ def train_model(
     models_dir = Path(__file__).parent.parent / "models"
     models_dir.mkdir(exist_ok=True)
 
-    final_model_path = models_dir / "egg_classifier_best.pt"
-    if best_model.exists():
+    # 증류 Student는 Teacher(egg_classifier_best.pt)를 덮어쓰지 않도록 별도 이름 사용
+    if teacher:
+        final_model_path = models_dir / f"egg_classifier_{model_size}_distilled.pt"
+    else:
+        final_model_path = models_dir / "egg_classifier_best.pt"
+    if not copy_to_models:
+        final_model_path = best_model
+    elif best_model.exists():
         import shutil
 
         shutil.copy2(best_model, final_model_path)
@@ -386,6 +460,437 @@ def tune_hyperparameters(
     return result
 
 
+# ============================================================================
+# 4. 지식 증류 (YOLOv8s Teacher → YOLOv8n Student)
+# ============================================================================
+
+
+def _letterbox(img: np.ndarray, imgsz: int = 640) -> np.ndarray:
+    """앱(YoloDetector.Preprocess)과 동일한 Letterbox: 종횡비 유지 + 114 회색 패딩"""
+    h, w = img.shape[:2]
+    scale = min(imgsz / w, imgsz / h)
+    new_w, new_h = int(w * scale), int(h * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[pad_y : pad_y + new_h, pad_x : pad_x + new_w] = cv2.resize(
+        img, (new_w, new_h)
+    )
+    return canvas
+
+
+def _head_outputs(head, feats: list, nc: int):
+    """
+    Detect 헤드 입력(P3/P4/P5 특징맵)에서 증류 대상 값을 계산
+
+    Returns:
+        tuple: (attention, logits)
+            attention: [B, A] 레벨별 L2 정규화된 공간 어텐션 맵 (채널 수와 무관)
+            logits:    [B, nc, A] 시그모이드 이전 클래스 로짓
+    """
+    import torch
+
+    b = feats[0].shape[0]
+    attention = [
+        torch.nn.functional.normalize(f.float().pow(2).mean(1).flatten(1), dim=1)
+        for f in feats
+    ]
+    logits = [head.cv3[i](f).view(b, nc, -1) for i, f in enumerate(feats)]
+    return torch.cat(attention, 1), torch.cat(logits, 2).float()
+
+
+def _to_tensor(images: np.ndarray, device):
+    """Letterbox된 BGR uint8 [B, H, W, 3] → RGB float [B, 3, H, W] (0~1)"""
+    import torch
+
+    rgb = np.ascontiguousarray(images[..., ::-1].transpose(0, 3, 1, 2))
+    return torch.from_numpy(rgb).to(device).float() / 255.0
+
+
+def build_teacher_cache(
+    teacher_path: str,
+    data_yaml: str,
+    imgsz: int = 640,
+    num_samples: int = 2000,
+    device: str = "0",
+    cache_root: str = "runs/distill_cache",
+    batch: int = 16,
+) -> Path:
+    """
+    Teacher 출력 캐시 생성 (학습 중 매 에포크 재계산 방지)
+
+    학습 이미지 중 num_samples장을 고정 샘플링하여 증강 없이 Letterbox한 뒤,
+    Teacher의 공간 어텐션 맵과 클래스 로짓을 .npy(memmap)로 저장합니다.
+    Teacher 가중치·샘플 목록·입력 크기가 같으면 기존 캐시를 재사용합니다.
+
+    Returns:
+        Path: 캐시 디렉토리
+    """
+    import torch
+    import random
+
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    train_images = Path(data["path"]) / data["train"]
+    image_files = sorted(
+        list(train_images.glob("*.jpg")) + list(train_images.glob("*.png"))
+    )
+    if num_samples < len(image_files):
+        image_files = sorted(random.Random(0).sample(image_files, num_samples))
+
+    # 캐시 키: Teacher 가중치 + 입력 크기 + 샘플 목록
+    key = hashlib.sha1()
+    with open(teacher_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            key.update(chunk)
+    key.update(str(imgsz).encode())
+    for p in image_files:
+        key.update(p.name.encode())
+    cache_dir = Path(cache_root) / key.hexdigest()[:16]
+
+    meta_path = cache_dir / "meta.json"
+    if meta_path.exists():
+        print(f"\n♻️  Teacher 캐시 재사용: {cache_dir}")
+        return cache_dir
+
+    print("\n" + "=" * 60)
+    print(f"🧑‍🏫 Teacher 출력 캐시 생성: {len(image_files)}장")
+    print("=" * 60)
+
+    torch_device = torch.device(
+        "cpu" if device == "cpu" or not torch.cuda.is_available() else f"cuda:{device}"
+    )
+    teacher = YOLO(teacher_path).model.float().to(torch_device).eval()
+    head = teacher.model[-1]
+    nc = head.nc
+
+    captured = {}
+    hook = head.register_forward_pre_hook(
+        lambda module, args: captured.update(feats=args[0])
+    )
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    n = len(image_files)
+    images = np.lib.format.open_memmap(
+        cache_dir / "images.npy", mode="w+", dtype=np.uint8, shape=(n, imgsz, imgsz, 3)
+    )
+    attention = logits = None
+
+    try:
+        with torch.no_grad():
+            for start in tqdm(range(0, n, batch)):
+                paths = image_files[start : start + batch]
+                chunk = np.stack([_letterbox(cv2.imread(str(p)), imgsz) for p in paths])
+                images[start : start + len(paths)] = chunk
+
+                teacher(_to_tensor(chunk, torch_device))
+                att, logit = _head_outputs(head, captured["feats"], nc)
+
+                if attention is None:
+                    attention = np.lib.format.open_memmap(
+                        cache_dir / "attention.npy",
+                        mode="w+",
+                        dtype=np.float16,
+                        shape=(n, att.shape[1]),
+                    )
+                    logits = np.lib.format.open_memmap(
+                        cache_dir / "logits.npy",
+                        mode="w+",
+                        dtype=np.float16,
+                        shape=(n, nc, logit.shape[2]),
+                    )
+                attention[start : start + len(paths)] = att.cpu().numpy()
+                logits[start : start + len(paths)] = logit.cpu().numpy()
+    finally:
+        hook.remove()
+
+    images.flush()
+    attention.flush()
+    logits.flush()
+
+    # meta.json은 마지막에 기록 → 중단된 캐시는 재사용되지 않음
+    meta = {
+        "teacher": str(teacher_path),
+        "imgsz": imgsz,
+        "num_samples": n,
+        "nc": nc,
+        "images": [str(p) for p in image_files],
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    size_mb = sum(p.stat().st_size for p in cache_dir.glob("*.npy")) / (1024 * 1024)
+    print(f"\n✅ Teacher 캐시 저장 완료: {cache_dir} ({size_mb:.1f} MB)")
+    return cache_dir
+
+
+class DistillationLoss:
+    """
+    기본 YOLOv8 손실 + 지식 증류 손실
+
+    매 학습 스텝마다 Teacher 캐시에서 kd_batch장을 뽑아 Student를 한 번 더 통과시키고,
+    - 특징 증류: P3/P4/P5 공간 어텐션 맵 MSE (Attention Transfer, 채널 수 무관)
+    - 로짓 증류: 온도 T로 부드럽게 한 클래스 확률에 대한 BCE (× T²)
+    를 기본 손실에 더합니다.
+    """
+
+    def __init__(
+        self,
+        model,
+        cache_dir: Path,
+        kd_batch: int = 8,
+        feat_weight: float = 1.0,
+        logit_weight: float = 1.0,
+        temperature: float = 2.0,
+    ):
+        self.base = model.init_criterion()
+        self.model = model
+        self.head = model.model[-1]
+        self.device = next(model.parameters()).device
+        self.feat_weight = feat_weight
+        self.logit_weight = logit_weight
+        self.temperature = temperature
+
+        self.images = np.load(cache_dir / "images.npy", mmap_mode="r")
+        self.attention = np.load(cache_dir / "attention.npy", mmap_mode="r")
+        self.logits = np.load(cache_dir / "logits.npy", mmap_mode="r")
+        self.rng = np.random.default_rng(0)
+        # 캐시 이미지 수보다 많이 뽑을 수 없음 (비복원 추출)
+        self.kd_batch = min(max(kd_batch, 1), len(self.images))
+
+        self._feats = None
+        self.head.register_forward_pre_hook(self._capture)
+
+    def _capture(self, module, args):
+        self._feats = args[0]
+
+    def __getattr__(self, name):
+        # update() 등 기본 손실의 나머지 속성은 그대로 위임
+        if name == "base":
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    def distill_loss(self):
+        """캐시된 Teacher 출력과 Student 출력 간의 증류 손실"""
+        import torch
+        import torch.nn.functional as F
+
+        idx = np.sort(
+            self.rng.choice(len(self.images), size=self.kd_batch, replace=False)
+        )
+        self.model(_to_tensor(self.images[idx], self.device))
+        att, logit = _head_outputs(self.head, self._feats, self.head.nc)
+
+        t_att = torch.from_numpy(self.attention[idx].astype(np.float32)).to(self.device)
+        t_logit = torch.from_numpy(self.logits[idx].astype(np.float32)).to(self.device)
+
+        feat_loss = F.mse_loss(att, t_att, reduction="sum") / len(idx)
+        T = self.temperature
+        logit_loss = (
+            F.binary_cross_entropy_with_logits(logit / T, torch.sigmoid(t_logit / T))
+            * T
+            * T
+        )
+        return self.feat_weight * feat_loss + self.logit_weight * logit_loss
+
+    def __call__(self, preds, batch):
+        loss, loss_items = self.base(preds, batch)
+        batch_size = batch["img"].shape[0]
+        return loss.sum() + self.distill_loss() * batch_size, loss_items
+
+
+def _attach_distillation(cache_dir: Path, **kd_kwargs):
+    """학습 준비 완료 시점(on_pretrain_routine_end)에 Student 손실을 증류 손실로 교체하는 콜백"""
+
+    def callback(trainer):
+        model = getattr(trainer.model, "module", trainer.model)
+        model.criterion = DistillationLoss(model, cache_dir, **kd_kwargs)
+        print(f"\n🧑‍🏫 지식 증류 활성화 (Teacher 캐시: {cache_dir})")
+
+    return callback
+
+
+def measure_cpu_latency(model_path: str, imgsz: int = 640, runs: int = 50) -> float:
+    """PyTorch 모델의 CPU 단일 이미지 추론 지연 (ms, 중앙값)"""
+    import time
+    import torch
+
+    model = YOLO(model_path).model.float().fuse().eval().cpu()
+    dummy = torch.zeros(1, 3, imgsz, imgsz)
+
+    timings = []
+    with torch.no_grad():
+        for _ in range(5):  # warm-up
+            model(dummy)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(dummy)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(timings))
+
+
+def report_distillation(
+    models: dict, data_yaml: str, imgsz: int = 640, output: str = None
+) -> dict:
+    """
+    정확도/지연 트레이드오프 비교표 출력
+
+    Args:
+        models: {라벨: .pt 경로} (예: teacher, distilled, scratch)
+        output: 결과 JSON 저장 경로 (선택)
+    """
+    report = {}
+    for label, path in models.items():
+        metrics = YOLO(str(path)).val(
+            data=data_yaml, imgsz=imgsz, verbose=False, plots=False
+        )
+        report[label] = {
+            "model": str(path),
+            "mAP50": float(metrics.box.map50),
+            "mAP50-95": float(metrics.box.map),
+            "cpu_latency_ms": measure_cpu_latency(str(path), imgsz),
+        }
+
+    print("\n" + "=" * 60)
+    print("📊 지식 증류 결과 비교 (CPU 지연은 배치 1 중앙값)")
+    print("=" * 60)
+    print(f"  {'모델':12s} {'mAP50':>8s} {'mAP50-95':>10s} {'CPU ms':>9s}")
+    for label, r in report.items():
+        print(
+            f"  {label:12s} {r['mAP50']:8.4f} {r['mAP50-95']:10.4f} "
+            f"{r['cpu_latency_ms']:9.2f}"
+        )
+    print("=" * 60)
+
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📁 비교 결과 저장: {output}")
+
+    return report
+
+
+# ============================================================================
+# 5. 실험 캐시 (동일 조건 재학습 방지)
+# ============================================================================
+
+# 결과에 영향을 주지 않는 출력 위치 관련 인자는 키에서 제외
+_EXPERIMENT_KEY_IGNORE = ("project", "name", "exist_ok")
+
+
+def dataset_fingerprint(data_yaml: str) -> str:
+    """
+    데이터셋 지문: data.yaml 내용 + 라벨 파일 내용 + 이미지 파일명/크기의 해시
+
+    이미지 전체를 읽지 않으므로 수만 장 규모에서도 수 초 내에 계산됩니다.
+    """
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    digest = hashlib.sha1()
+    digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+
+    data_path = Path(data["path"])
+    for split in ("train", "val"):
+        images = data_path / data[split]
+        labels = data_path / data[split].replace("images", "labels")
+
+        for img_path in sorted(images.glob("*")):
+            digest.update(f"{img_path.name}:{img_path.stat().st_size}".encode())
+        for label_file in sorted(labels.glob("*.txt")):
+            digest.update(label_file.name.encode())
+            digest.update(label_file.read_bytes())
+
+    return digest.hexdigest()
+
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def experiment_key(
+    data_yaml: str,
+    train_args: dict,
+    model_name: str,
+    teacher: str = None,
+    distill: dict = None,
+) -> str:
+    """
+    실험 키: (데이터셋 지문, 전체 train_args, 모델, ultralytics/torch 버전)의 해시
+
+    지식 증류 시에는 Teacher 가중치 해시와 증류 파라미터도 포함합니다.
+    """
+    import torch
+    import ultralytics
+
+    record = {
+        "dataset": dataset_fingerprint(data_yaml),
+        "train_args": {
+            k: v for k, v in train_args.items() if k not in _EXPERIMENT_KEY_IGNORE
+        },
+        "model": model_name,
+        "ultralytics": ultralytics.__version__,
+        "torch": torch.__version__,
+    }
+    if teacher:
+        record["teacher"] = _file_sha1(teacher)
+        record["distill"] = distill
+
+    payload = json.dumps(record, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def lookup_experiment(key: str, cache_root: str = "runs/experiment_cache"):
+    """
+    완료된 실험 조회
+
+    Returns:
+        dict | None: {"best_model": Path, "metrics": dict} (없으면 None)
+    """
+    entry = Path(cache_root) / key
+    best_model = entry / "best.pt"
+    metrics_path = entry / "metrics.json"
+    if not (best_model.exists() and metrics_path.exists()):
+        return None
+
+    with open(metrics_path, "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+
+    return {"best_model": best_model, "metrics": metrics}
+
+
+def store_experiment(
+    key: str,
+    best_model: Path,
+    metrics: dict,
+    train_args: dict,
+    cache_root: str = "runs/experiment_cache",
+) -> Path:
+    """완료된 실험의 best.pt·메트릭·학습 인자를 캐시에 저장"""
+    import shutil
+
+    entry = Path(cache_root) / key
+    entry.mkdir(parents=True, exist_ok=True)
+
+    shutil.copy2(best_model, entry / "best.pt")
+    with open(entry / "train_args.json", "w", encoding="utf-8") as f:
+        json.dump(train_args, f, ensure_ascii=False, indent=2, default=str)
+
+    # metrics.json은 마지막에 기록 → 중단된 항목은 완료된 실험으로 조회되지 않음
+    with open(entry / "metrics.json", "w", encoding="utf-8") as f:
+        json.dump({k: float(v) for k, v in (metrics or {}).items()}, f, indent=2)
+
+    print(f"\n🗂️  실험 캐시 저장: {entry}")
+    return entry
+
+
 # ============================================================================
 # CLI 진입점
 # ============================================================================
@@ -410,6 +915,9 @@ if __name__ == "__main__":
 
   # 하이퍼파라미터 자동 튜닝
   python train.py --tune --model s --iterations 20
+
+  # 지식 증류 (YOLOv8s Teacher → YOLOv8n Student) + 처음부터 학습한 n과 비교
+  python train.py --model n --distill-teacher ../models/egg_classifier_best.pt --distill-compare
         """,
     )
 
@@ -464,10 +972,38 @@ if __name__ == "__main__":
         "--validate-only", type=str, default=None, help="특정 모델만 검증"
     )
     parser.add_argument("--tune", action="store_true", help="하이퍼파라미터 자동 튜닝")
+    parser.add_argument(
+        "--force", action="store_true", help="동일 조건의 완료된 실험이 있어도 재학습"
+    )
     parser.add_argument(
         "--tune-iterations", type=int, default=30, help="튜닝 반복 횟수"
     )
 
+    # 지식 증류
+    parser.add_argument(
+        "--distill-teacher",
+        type=str,
+        default=None,
+        help="Teacher 모델 경로 (예: ../models/egg_classifier_best.pt)",
+    )
+    parser.add_argument(
+        "--distill-samples", type=int, default=2000, help="Teacher 캐시 이미지 수"
+    )
+    parser.add_argument(
+        "--distill-feat-weight", type=float, default=1.0, help="특징 증류 손실 가중치"
+    )
+    parser.add_argument(
+        "--distill-logit-weight", type=float, default=1.0, help="로짓 증류 손실 가중치"
+    )
+    parser.add_argument(
+        "--distill-temperature", type=float, default=2.0, help="로짓 증류 온도"
+    )
+    parser.add_argument(
+        "--distill-compare",
+        action="store_true",
+        help="증류 없이 학습한 동일 크기 모델과 정확도/CPU 지연 비교",
+    )
+
     args = parser.parse_args()
 
     # ========================================
@@ -514,7 +1050,7 @@ if __name__ == "__main__":
     # Step 3: 학습
     input("\n분석 완료! 엔터를 눌러 학습을 시작하세요... (Ctrl+C로 취소)")
 
-    train_model(
+    train_kwargs = dict(
         data_yaml=args.data,
         model_size=args.model,
         epochs=args.epochs,
@@ -527,4 +1063,29 @@ if __name__ == "__main__":
         early_stopping=args.early_stop,
         warmup_epochs=args.warmup,
         pretrained=not args.no_pretrained,
+        force=args.force,
     )
+
+    final_model_path = train_model(
+        **train_kwargs,
+        teacher=args.distill_teacher,
+        distill_samples=args.distill_samples,
+        distill_feat_weight=args.distill_feat_weight,
+        distill_logit_weight=args.distill_logit_weight,
+        distill_temperature=args.distill_temperature,
+    )
+
+    # Step 4: (선택) 증류 모델 vs 처음부터 학습한 모델 비교
+    if args.distill_teacher and args.distill_compare:
+        train_kwargs["name"] = f"{args.name}_scratch"
+        scratch_model = train_model(**train_kwargs, copy_to_models=False)
+        report_distillation(
+            {
+                "teacher": args.distill_teacher,
+                "distilled": final_model_path,
+                "scratch": scratch_model,
+            },
+            args.data,
+            imgsz=args.imgsz,
+            output=str(Path("runs") / args.name / "distill_report.json"),
+        )
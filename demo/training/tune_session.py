@@ -0,0 +1,337 @@
+"""
+ONNX Runtime 세션 옵션 자동 튜닝 스크립트
+
+스테이션마다 CPU가 달라 intra-op / inter-op 스레드 수, 실행 모드, 그래프 최적화 수준에 따라
+지연이 크게 달라집니다. 현재 호스트에서 SessionOptions 조합을 스윕하여 지연(p50/p95)과
+처리량(images/s)을 측정하고, 최적 프로파일을 CPU 모델·코어 수 키로 JSON에 저장합니다.
+
+프로파일 파일 형식 (../models/session_profiles.json):
+    {
+      "Intel(R) Core(TM) i5-10400 CPU @ 2.90GHz | 6C/12T": {
+        "egg_classifier": {
+          "intra_op_num_threads": 6, "inter_op_num_threads": 1,
+          "execution_mode": "sequential", "graph_optimization_level": "all",
+          "allow_spinning": true, "model_hash": "...", "p50_ms": ..., ...
+        }
+      }
+    }
+
+런타임·벤치마크에서는 load_session_profile() + session_options()로 불러 사용합니다.
+"""
+
+from pathlib import Path
+import argparse
+import itertools
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+DEFAULT_PROFILE_PATH = "../models/session_profiles.json"
+
+EXECUTION_MODES = ("sequential", "parallel")
+OPTIMIZATION_LEVELS = ("basic", "extended", "all")
+
+
+def cpu_model() -> str:
+    """CPU 모델 이름 (Linux는 /proc/cpuinfo, 그 외는 platform 정보)"""
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        for line in cpuinfo.read_text(errors="ignore").splitlines():
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    return platform.processor() or platform.machine() or "unknown"
+
+
+def host_key() -> str:
+    """프로파일 키: 'CPU 모델 | 물리코어C/논리코어T'"""
+    import psutil
+
+    physical = psutil.cpu_count(logical=False) or os.cpu_count()
+    logical = psutil.cpu_count(logical=True) or os.cpu_count()
+    return f"{cpu_model()} | {physical}C/{logical}T"
+
+
+def session_options(profile: dict = None):
+    """프로파일 dict → ort.SessionOptions (None이면 ORT 기본값 + ORT_ENABLE_ALL)"""
+    import onnxruntime as ort
+
+    profile = profile or {}
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = profile.get("intra_op_num_threads", 0)
+    options.inter_op_num_threads = profile.get("inter_op_num_threads", 0)
+    options.execution_mode = {
+        "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+        "parallel": ort.ExecutionMode.ORT_PARALLEL,
+    }[profile.get("execution_mode", "sequential")]
+    options.graph_optimization_level = {
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[profile.get("graph_optimization_level", "all")]
+    if not profile.get("allow_spinning", True):
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+
+def load_session_profile(
+    onnx_path: str = None, profile_path: str = DEFAULT_PROFILE_PATH
+):
+    """
+    현재 호스트의 저장된 프로파일 조회
+
+    Args:
+        onnx_path: 지정 시 같은 모델 이름의 프로파일 우선, 없으면 호스트의 아무 프로파일
+
+    Returns:
+        dict 또는 None (파일·호스트 항목이 없을 때)
+    """
+    profile_path = Path(profile_path)
+    if not profile_path.exists():
+        return None
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profiles = json.load(f).get(host_key(), {})
+    if not profiles:
+        return None
+    if onnx_path and Path(onnx_path).stem in profiles:
+        return profiles[Path(onnx_path).stem]
+    return next(iter(profiles.values()))
+
+
+def candidate_profiles(sweep_spinning: bool = True) -> list:
+    """스윕할 SessionOptions 조합 목록"""
+    import psutil
+
+    logical = psutil.cpu_count(logical=True) or os.cpu_count() or 1
+    physical = psutil.cpu_count(logical=False) or logical
+    intra = sorted({1, 2, 4, physical, logical} & set(range(1, logical + 1)))
+    inter = sorted({2, physical} & set(range(2, logical + 1))) or [1]
+
+    # 첫 항목은 앱·verify_onnx가 쓰는 ORT 기본값 (스레드 0 = ORT 자동)
+    profiles = [
+        {
+            "intra_op_num_threads": 0,
+            "graph_optimization_level": "all",
+            "allow_spinning": True,
+            "execution_mode": "sequential",
+            "inter_op_num_threads": 0,
+        }
+    ]
+    for level, threads in itertools.product(OPTIMIZATION_LEVELS, intra):
+        # 스레드 1개면 스피닝 여부는 의미 없음
+        spinning = (True, False) if sweep_spinning and threads > 1 else (True,)
+        for spin in spinning:
+            base = {
+                "intra_op_num_threads": threads,
+                "graph_optimization_level": level,
+                "allow_spinning": spin,
+            }
+            profiles.append(
+                {**base, "execution_mode": "sequential", "inter_op_num_threads": 1}
+            )
+            # 병렬 실행 모드는 독립 분기를 동시에 실행 (inter-op 스레드 사용)
+            if logical > 1:
+                profiles += [
+                    {**base, "execution_mode": "parallel", "inter_op_num_threads": n}
+                    for n in inter
+                ]
+    return profiles
+
+
+def measure_profile(
+    onnx_path: str, profile: dict, feeds: list, runs: int = 30, warmup: int = 5
+) -> dict:
+    """
+    단일 프로파일의 세션 생성 시간 / 지연 분포 / 처리량 측정
+
+    Returns:
+        dict: session_create_ms, p50_ms, p95_ms, mean_ms, images_per_sec
+    """
+    import onnxruntime as ort
+
+    start = time.perf_counter_ns()
+    session = ort.InferenceSession(
+        onnx_path,
+        sess_options=session_options(profile),
+        providers=["CPUExecutionProvider"],
+    )
+    session_create_ms = (time.perf_counter_ns() - start) / 1e6
+
+    for i in range(warmup):
+        session.run(None, feeds[i % len(feeds)])
+
+    timings = np.empty(runs, dtype=np.int64)
+    for i in range(runs):
+        start = time.perf_counter_ns()
+        session.run(None, feeds[i % len(feeds)])
+        timings[i] = time.perf_counter_ns() - start
+
+    ms = timings / 1e6
+    batch = next(iter(feeds[0].values())).shape[0]
+    return {
+        "session_create_ms": session_create_ms,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "mean_ms": float(ms.mean()),
+        "images_per_sec": batch * 1000 / float(ms.mean()),
+    }
+
+
+def tune_session(
+    onnx_path: str,
+    data_yaml: str = "../data/data.yaml",
+    objective: str = "latency",
+    runs: int = 30,
+    warmup: int = 5,
+    num_images: int = 16,
+    sweep_spinning: bool = True,
+) -> tuple:
+    """
+    SessionOptions 스윕 후 최적 프로파일 선택
+
+    Args:
+        objective: "latency" (p50 최소, 동률이면 p95) 또는 "throughput" (images/s 최대)
+
+    Returns:
+        tuple: (best 프로파일 dict, 전체 결과 list)
+    """
+    import cv2
+    import onnxruntime as ort
+    from evaluate_onnx import load_dataset
+    from export_onnx import model_feeds
+    from prediction_cache import model_hash
+
+    try:
+        image_paths = load_dataset(data_yaml, "val")[0][:num_images]
+        frames = [cv2.imread(str(p)) for p in image_paths]
+    except (FileNotFoundError, OSError):
+        rng = np.random.default_rng(0)
+        frames = [
+            rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+            for _ in range(num_images)
+        ]
+    feeds = model_feeds(
+        ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]), frames
+    )
+
+    profiles = candidate_profiles(sweep_spinning)
+    print(f"\nTuning session options: {onnx_path}")
+    print(f"  Host: {host_key()}")
+    print(f"  Profiles: {len(profiles)}, {warmup} warm-up + {runs} runs each")
+    print(
+        f"  {'level':8s} {'mode':10s} {'intra':>5s} {'inter':>5s} {'spin':>5s}"
+        f" {'create':>8s} {'p50':>8s} {'p95':>8s} {'img/s':>8s}"
+    )
+
+    results = []
+    for profile in profiles:
+        result = {**profile, **measure_profile(onnx_path, profile, feeds, runs, warmup)}
+        results.append(result)
+        print(
+            f"  {result['graph_optimization_level']:8s} {result['execution_mode']:10s}"
+            f" {result['intra_op_num_threads']:5d} {result['inter_op_num_threads']:5d}"
+            f" {str(result['allow_spinning']):>5s} {result['session_create_ms']:8.1f}"
+            f" {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['images_per_sec']:8.1f}"
+        )
+
+    if objective == "throughput":
+        best = max(results, key=lambda r: r["images_per_sec"])
+    else:
+        best = min(results, key=lambda r: (r["p50_ms"], r["p95_ms"]))
+
+    default = results[0]
+    best = {
+        **best,
+        "objective": objective,
+        "model_hash": model_hash(onnx_path),
+        "onnxruntime": ort.__version__,
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    print(
+        f"\nBest ({objective}): level={best['graph_optimization_level']}, "
+        f"mode={best['execution_mode']}, intra={best['intra_op_num_threads']}, "
+        f"inter={best['inter_op_num_threads']}, spinning={best['allow_spinning']}"
+    )
+    print(
+        f"  p50 {best['p50_ms']:.2f} ms (ORT default {default['p50_ms']:.2f} ms), "
+        f"{best['images_per_sec']:.1f} images/s"
+    )
+    return best, results
+
+
+def save_session_profile(
+    onnx_path: str, profile: dict, profile_path: str = DEFAULT_PROFILE_PATH
+):
+    """프로파일을 호스트 키 / 모델 이름 아래에 저장 (다른 호스트 항목은 유지)"""
+    profile_path = Path(profile_path)
+    profiles = {}
+    if profile_path.exists():
+        with open(profile_path, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+
+    profiles.setdefault(host_key(), {})[Path(onnx_path).stem] = profile
+
+    profile_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = profile_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, profile_path)
+    print(f"\nSaved session profile: {profile_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep ONNX Runtime SessionOptions and save the best profile for this host"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="../models/egg_classifier.onnx",
+        help="Path to .onnx model",
+    )
+    parser.add_argument(
+        "--data", type=str, default="../data/data.yaml", help="data.yaml 경로"
+    )
+    parser.add_argument(
+        "--objective",
+        type=str,
+        choices=["latency", "throughput"],
+        default="latency",
+        help="최적화 기준 (latency: p50 최소, throughput: images/s 최대)",
+    )
+    parser.add_argument("--runs", type=int, default=30, help="프로파일별 측정 횟수")
+    parser.add_argument("--warmup", type=int, default=5, help="프로파일별 워밍업 횟수")
+    parser.add_argument(
+        "--no-spinning-sweep",
+        action="store_true",
+        help="intra-op 스피닝 on/off 스윕 생략 (항상 on)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE_PATH,
+        help="프로파일 JSON 경로",
+    )
+    parser.add_argument(
+        "--results", type=str, default=None, help="전체 스윕 결과 JSON 저장 경로"
+    )
+
+    args = parser.parse_args()
+
+    best, results = tune_session(
+        args.model,
+        args.data,
+        objective=args.objective,
+        runs=args.runs,
+        warmup=args.warmup,
+        sweep_spinning=not args.no_spinning_sweep,
+    )
+    save_session_profile(args.model, best, args.profile)
+
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved sweep results: {args.results}")